@@ -7,6 +7,7 @@ from .models import User
 class UserAdmin(BaseUserAdmin):
     ordering = ('email',)
     list_display = ('email', 'role', 'tenant', 'company', 'is_active', 'is_staff', 'is_superuser')
+    list_select_related = ('tenant', 'company')
     search_fields = ('email',)
     list_filter = ('role', 'tenant', 'is_active', 'is_superuser')
     readonly_fields = ('id', 'created_at', 'updated_at', 'last_login', 'date_joined')
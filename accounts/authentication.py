@@ -0,0 +1,105 @@
+import hmac
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.utils.functional import cached_property
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from core import metrics
+from tenants.cache import tenant_cache, company_cache
+from .models import User
+
+
+def _uuid_claim(value):
+    return uuid.UUID(value) if value else None
+
+
+class ClaimsUser(TokenUser):
+    """
+    Request user backed by the claims of a validated access token.
+
+    Exposes what the permission classes and tenant scoping read (``role``,
+    ``tenant_id``, ``company_id``, ``is_superuser``) straight from the token.
+    ``tenant``, ``company`` and the full ``user`` row are only fetched when
+    a view actually dereferences them.
+    """
+
+    @cached_property
+    def id(self):
+        return uuid.UUID(str(self.token[api_settings.USER_ID_CLAIM]))
+
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+
+    @cached_property
+    def tenant_id(self):
+        return _uuid_claim(self.token.get('tenant_id'))
+
+    @cached_property
+    def company_id(self):
+        return _uuid_claim(self.token.get('company_id'))
+
+    @cached_property
+    def tenant(self):
+        return tenant_cache.get(self.tenant_id)
+
+    @cached_property
+    def company(self):
+        return company_cache.get(self.company_id, scope=self.tenant_id)
+
+    @cached_property
+    def user(self):
+        return User.objects.get(pk=self.id)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the RBAC claims embedded by
+    ``TenantRefreshToken`` instead of loading the user on every request.
+    Tokens issued before the claims existed fall back to the database lookup.
+    Refreshing reloads the user, so role or tenant changes and deactivation
+    take effect when the access token is next refreshed.
+    """
+
+    def authenticate(self, request):
+        try:
+            return super().authenticate(request)
+        except AuthenticationFailed as exc:
+            codes = exc.get_codes()
+            metrics.jwt_failures.inc(codes.get('code', 'token_not_valid') if isinstance(codes, dict) else codes)
+            raise
+
+    def get_user(self, validated_token):
+        if 'tenant_id' not in validated_token:
+            return super().get_user(validated_token)
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        return ClaimsUser(validated_token)
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """
+    Accepts ``Authorization: Bearer <METRICS_TOKEN>`` from metrics scrapers,
+    which cannot log in and refresh JWTs. The request stays anonymous with
+    ``request.auth == METRICS_SCRAPER``; any other bearer token is left to
+    the JWT authentication that follows.
+    """
+    METRICS_SCRAPER = 'metrics-scraper'
+
+    def authenticate(self, request):
+        expected = settings.METRICS_TOKEN
+        parts = get_authorization_header(request).split()
+        if not expected or len(parts) != 2 or parts[0].lower() != b'bearer':
+            return None
+        if not hmac.compare_digest(parts[1], expected.encode()):
+            return None
+        return AnonymousUser(), self.METRICS_SCRAPER
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
@@ -0,0 +1,28 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def hashing_executor():
+    """Bounded pool that runs password hashing off the event loop."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    thread_name_prefix='password-hash',
+                )
+    return _executor
+
+
+async def amake_password(raw_password):
+    """Async ``make_password``: at most PASSWORD_HASH_WORKERS hashes run at once."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hashing_executor(), make_password, raw_password)
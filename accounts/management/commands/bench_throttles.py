@@ -0,0 +1,51 @@
+import pickle
+import statistics
+import time
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from rest_framework.throttling import AnonRateThrottle
+
+from accounts.throttles import AnonCounterRateThrottle
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark one throttle check: DRF's timestamp-list throttle "
+        "against the sliding-window counter throttle, on the configured cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=5000, help='Checks per throttle.')
+        parser.add_argument('--rate', default='100000/hour', help='Rate high enough not to reject.')
+
+    def handle(self, *args, **options):
+        request = SimpleNamespace(user=None, META={'REMOTE_ADDR': '203.0.113.7'})
+        results = {}
+        for base in (AnonRateThrottle, AnonCounterRateThrottle):
+            throttle_class = type(f"Bench{base.__name__}", (base,), {'rate': options['rate']})
+            cache.clear()
+            samples = []
+            for _ in range(options['checks']):
+                throttle = throttle_class()
+                start = time.perf_counter()
+                allowed = throttle.allow_request(request, None)
+                samples.append((time.perf_counter() - start) * 1_000_000)
+                assert allowed, "Rate too low for the benchmark; raise --rate."
+            state = sum(
+                len(pickle.dumps(cache.get(key)))
+                for key in self.keys(throttle)
+            )
+            results[base.__name__] = (statistics.mean(samples), statistics.median(samples), samples[-1], state)
+
+        self.stdout.write(f"{options['checks']} checks at {options['rate']} for one client")
+        self.stdout.write(f"  {'throttle':<26}{'mean us':>10}{'median us':>11}{'last us':>10}{'state bytes':>13}")
+        for name, (mean, median, last, state) in results.items():
+            self.stdout.write(f"  {name:<26}{mean:>10.1f}{median:>11.1f}{last:>10.1f}{state:>13}")
+
+    def keys(self, throttle):
+        if isinstance(throttle, AnonCounterRateThrottle):
+            window = int(throttle.timer() // throttle.duration)
+            return [f"{throttle.key}:{window}"]
+        return [throttle.key]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.1 on 2026-10-18 07:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_resettoken"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("tenants", "0002_company_company_tenant_created_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["tenant", "role", "created_at", "id"],
+                name="user_tenant_role_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.0.1 on 2026-10-18 08:02
+
+from django.db import migrations, models
+
+# A user's company must belong to the user's tenant. The rule spans two
+# tables, so it is a trigger rather than a CheckConstraint.
+VIOLATION = (
+    "NEW.company_id IS NOT NULL AND NOT EXISTS ("
+    "SELECT 1 FROM tenants_company WHERE id = NEW.company_id AND tenant_id = NEW.tenant_id)"
+)
+MESSAGE = "User company must belong to the user tenant."
+
+TRIGGERS = {
+    "sqlite": [
+        f"CREATE TRIGGER user_company_tenant_insert BEFORE INSERT ON accounts_user "
+        f"FOR EACH ROW WHEN {VIOLATION} BEGIN SELECT RAISE(ABORT, '{MESSAGE}'); END",
+        f"CREATE TRIGGER user_company_tenant_update BEFORE UPDATE OF company_id, tenant_id ON accounts_user "
+        f"FOR EACH ROW WHEN {VIOLATION} BEGIN SELECT RAISE(ABORT, '{MESSAGE}'); END",
+    ],
+    "postgresql": [
+        f"""CREATE FUNCTION user_company_tenant_check() RETURNS trigger AS $$
+        BEGIN
+            IF {VIOLATION} THEN
+                RAISE EXCEPTION '{MESSAGE}' USING ERRCODE = 'integrity_constraint_violation';
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql""",
+        "CREATE TRIGGER user_company_tenant BEFORE INSERT OR UPDATE OF company_id, tenant_id ON accounts_user "
+        "FOR EACH ROW EXECUTE FUNCTION user_company_tenant_check()",
+    ],
+}
+DROP_TRIGGERS = {
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS user_company_tenant_insert",
+        "DROP TRIGGER IF EXISTS user_company_tenant_update",
+    ],
+    "postgresql": [
+        "DROP TRIGGER IF EXISTS user_company_tenant ON accounts_user",
+        "DROP FUNCTION IF EXISTS user_company_tenant_check()",
+    ],
+}
+
+
+def create_triggers(apps, schema_editor):
+    for sql in TRIGGERS.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql, params=None)
+
+
+def drop_triggers(apps, schema_editor):
+    for sql in DROP_TRIGGERS.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_user_user_tenant_role_idx"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("tenants", "0002_company_company_tenant_created_idx"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="user",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    models.Q(("role", "STAFF"), _negated=True),
+                    ("company__isnull", False),
+                    _connector="OR",
+                ),
+                name="user_staff_has_company",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="user",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    models.Q(
+                        ("role__in", ["ADMIN", "MANAGER", "CUSTOMER"]), _negated=True
+                    ),
+                    ("company__isnull", True),
+                    _connector="OR",
+                ),
+                name="user_company_only_for_staff",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="user",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    ("is_superuser", True), ("tenant__isnull", False), _connector="OR"
+                ),
+                name="user_tenant_unless_superuser",
+            ),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -4,9 +4,11 @@ from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from datetime import timedelta
-import uuid
 import secrets
 
+from core.ids import uuid7
+from core.models import prevalidated_relations, related_for_validation
+
 ROLE_CHOICES = (
     ('ADMIN', 'Admin'),
     ('MANAGER', 'Manager'),
@@ -32,7 +34,7 @@ class UserManager(BaseUserManager):
 
 
 class User(AbstractUser):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     email = models.EmailField(_('email address'), unique=True)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, null=True, blank=True)
     tenant = models.ForeignKey(
@@ -58,15 +60,54 @@ class User(AbstractUser):
             raise ValidationError(_('Admins, Managers, and Customers cannot have a company assigned.'))
         if not self.is_superuser and not self.tenant_id:
             raise ValidationError(_('Non-superadmin users must belong to a tenant.'))
-        if self.company_id and self.tenant_id and self.tenant_id != self.company.tenant_id:
+        company = related_for_validation(self, 'company') if self.company_id and self.tenant_id else None
+        if company is not None and self.tenant_id != company.tenant_id:
             raise ValidationError(_('Company tenant must match user tenant.'))
 
-    def save(self, *args, **kwargs):
-        self.full_clean()
+    def save(self, *args, related=None, validate_unique=True, validate=True, **kwargs):
+        """
+        See ``Product.save``: ``related`` supplies in-memory related objects
+        to validation, ``validate_unique=False`` lets trusted callers skip
+        the uniqueness probes the serializer layer already performed and
+        ``validate=False`` skips ``full_clean()`` for writes that cannot
+        break its rules.
+        """
+        if validate:
+            self._validation_related = related or {}
+            try:
+                exclude = prevalidated_relations(self, self._validation_related)
+                if 'company' in exclude and self.tenant_id:
+                    # clean() pins tenant to the company's tenant.
+                    exclude.append('tenant')
+                # clean() checks Meta.constraints in memory; the database
+                # enforces them, so skip Django's one query per constraint.
+                self.full_clean(exclude=exclude, validate_unique=validate_unique, validate_constraints=False)
+            finally:
+                del self._validation_related
         super().save(*args, **kwargs)
 
     class Meta:
         db_table = 'accounts_user'
+        indexes = [
+            models.Index(fields=['tenant', 'role', 'created_at', 'id'], name='user_tenant_role_idx'),
+        ]
+        # The rules of clean(), enforced by the database for writes that skip
+        # it (bulk_create, QuerySet.update). The company/tenant match spans
+        # tables and is a trigger (migration 0004).
+        constraints = [
+            models.CheckConstraint(
+                check=~models.Q(role='STAFF') | models.Q(company__isnull=False),
+                name='user_staff_has_company',
+            ),
+            models.CheckConstraint(
+                check=~models.Q(role__in=['ADMIN', 'MANAGER', 'CUSTOMER']) | models.Q(company__isnull=True),
+                name='user_company_only_for_staff',
+            ),
+            models.CheckConstraint(
+                check=models.Q(is_superuser=True) | models.Q(tenant__isnull=False),
+                name='user_tenant_unless_superuser',
+            ),
+        ]
 
 
 def generate_reset_token():
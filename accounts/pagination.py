@@ -0,0 +1,6 @@
+from core.pagination import KeysetPagination
+
+
+class UserPagination(KeysetPagination):
+    page_size = 50
+    max_page_size = 100
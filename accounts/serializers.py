@@ -1,9 +1,15 @@
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from core import rbac
+from core.serializers import DynamicFieldsMixin
 from .models import User, ROLE_CHOICES
+from .tokens import TenantRefreshToken
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False)
 
     class Meta:
@@ -14,6 +20,10 @@ class UserSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at', 'password',
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'is_superuser']
+        expandable_fields = {
+            'tenant': 'tenants.serializers.TenantSerializer',
+            'company': 'tenants.serializers.CompanySerializer',
+        }
 
     def validate_role(self, value):
         valid_roles = [choice[0] for choice in ROLE_CHOICES]
@@ -41,6 +51,28 @@ class UserSerializer(serializers.ModelSerializer):
         return instance
 
 
+class UserSummarySerializer(serializers.ModelSerializer):
+    """
+    A user expanded into another object, e.g. a product's ``created_by``.
+    The email is only shown to roles that may list users of that role
+    (``directories``); everyone else gets the id.
+    """
+    directories = {'STAFF': 'accounts.staff', 'CUSTOMER': 'accounts.customers'}
+
+    class Meta:
+        model = User
+        fields = ['id', 'email']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        directory = self.directories.get(instance.role)
+        request = self.context.get('request')
+        role = rbac.role_of(request.user) if request is not None else None
+        if directory is None or not rbac.policy.allows(role, directory, 'get'):
+            del data['email']
+        return data
+
+
 class StaffCreateSerializer(serializers.ModelSerializer):
     """Used by Admin/Manager to create staff directly with a password."""
     company_id = serializers.UUIDField(write_only=True)
@@ -57,11 +89,10 @@ class StaffCreateSerializer(serializers.ModelSerializer):
         }
 
     def validate_company_id(self, value):
-        from tenants.models import Company
+        from tenants.cache import company_cache
         request = self.context['request']
-        try:
-            company = Company.objects.get(id=value, tenant=request.user.tenant)
-        except Company.DoesNotExist:
+        company = company_cache.get(value, scope=request.user.tenant_id)
+        if company is None:
             raise serializers.ValidationError("Company not found in your tenant.")
         return company  # returns Company instance
 
@@ -72,15 +103,18 @@ class StaffCreateSerializer(serializers.ModelSerializer):
         user = User(
             email=validated_data['email'],
             role='STAFF',
-            tenant=request.user.tenant,
+            tenant_id=request.user.tenant_id,
             company=company,
         )
         user.set_password(password)
-        user.save()
+        # Email uniqueness was already checked by the serializer's validator.
+        user.save(validate_unique=False)
         return user
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = TenantRefreshToken
+
     def validate(self, attrs):
         data = super().validate(attrs)
         data['user'] = {
@@ -89,3 +123,29 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             'role': self.user.role,
         }
         return data
+
+
+class TenantTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Reloads the user on refresh: inactive or deleted users get no new
+    access token, and the role/tenant/company claims are stamped from the
+    current row rather than copied from the login-time refresh token.
+    """
+    token_class = TenantRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.only('id', 'role', 'tenant_id', 'company_id', 'is_superuser').filter(
+            pk=refresh[api_settings.USER_ID_CLAIM], is_active=True,
+        ).first()
+        if user is None:
+            raise AuthenticationFailed("User is inactive or no longer exists.", code='user_inactive')
+        refresh.stamp(user)
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
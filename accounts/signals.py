@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import response_cache
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_responses(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no list renders.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    response_cache.bump(instance.tenant_id)
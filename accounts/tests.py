@@ -1,3 +1,216 @@
-from django.test import TestCase
+import csv
+import io
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.tokens import TenantRefreshToken
+from core.perf import PASSWORD, ROLES, QueryBudgetTestCase
+from tenants.models import Tenant, Company
+from .models import ResetToken, User
+from .throttles import LoginRateThrottle, local_counters
+
+
+class AccountRouteBudgetTests(QueryBudgetTestCase):
+    """Query and wall-time budgets for /api/auth/, /api/staff/ and /api/admin/customers/."""
+
+    def test_login(self):
+        for role in ROLES:
+            self.reset_caches()  # Login is throttled per client address.
+            with self.subTest(role=role):
+                self.assertBudget(None, 'POST', '/api/auth/login/', 1, data={
+                    'email': self.seeded.users[role].email, 'password': PASSWORD,
+                })
+
+    def test_token_refresh(self):
+        for role in ROLES:
+            with self.subTest(role=role):
+                # One narrow SELECT to re-stamp the claims from the current row.
+                refresh = TenantRefreshToken.for_user(self.seeded.users[role])
+                self.assertBudget(None, 'POST', '/api/auth/token/refresh/', 1, data={'refresh': str(refresh)})
+
+    def test_access_token_claims_authorize_without_a_user_query(self):
+        staff = self.seeded.users['STAFF']
+        access = TenantRefreshToken.for_user(staff).access_token
+        self.assertEqual(
+            (access['role'], access['tenant_id'], access['company_id'], access['is_superuser']),
+            ('STAFF', str(staff.tenant_id), str(staff.company_id), False),
+        )
+        # The product detail is the only query: no user row is loaded.
+        path = f"/api/products/{self.seeded.owned_products[0].id}/"
+        self.assertBudget('STAFF', 'GET', path, 1)
+
+    def test_refresh_reloads_role_and_rejects_inactive_users(self):
+        staff = self.seeded.users['STAFF']
+        refresh = str(TenantRefreshToken.for_user(staff))
+        manager_company = self.seeded.companies[1]
+        User.objects.filter(pk=staff.pk).update(company=manager_company)
+
+        access = AccessToken(self.client.post('/api/auth/token/refresh/', {'refresh': refresh}).data['access'])
+        self.assertEqual(access['company_id'], str(manager_company.id))
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(client.get(f"/api/products/{self.seeded.owned_products[0].id}/").status_code, 404)
+
+        User.objects.filter(pk=staff.pk).update(is_active=False)
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': refresh})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data, {'detail': 'User is inactive or no longer exists.'})
+
+    def test_password_reset(self):
+        for role in ROLES:
+            self.reset_caches()  # Reset requests are throttled per client address.
+            user = self.seeded.users[role]
+            with self.subTest(role=role, step='request'):
+                self.assertBudget(None, 'POST', '/api/auth/password-reset/request/', 5, data={
+                    'email': user.email,
+                })
+            with self.subTest(role=role, step='confirm'):
+                # Token + user in one SELECT, then two narrow UPDATEs; no full_clean() probes.
+                self.assertBudget(None, 'POST', '/api/auth/password-reset/confirm/', 3, data={
+                    'reset_token': ResetToken.objects.get(user=user).token, 'new_password': PASSWORD,
+                })
+
+    def test_staff_list(self):
+        for path in ('/api/staff/', '/api/staff/?expand=company'):
+            with self.subTest(path=path):
+                self.assertBudgets('GET', path, {
+                    'ADMIN': (200, 1), 'MANAGER': (200, 1), 'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+                })
+
+    def test_staff_list_sparse_fields(self):
+        response = self.client_for('MANAGER').get('/api/staff/?fields=id,email,company,password&expand=company')
+        self.assertTrue(response.data['results'])
+        for row in response.data['results']:
+            self.assertEqual(set(row), {'id', 'email', 'company'})
+            self.assertEqual(set(row['company']), {'id', 'tenant', 'name', 'created_at', 'updated_at'})
+
+    def test_staff_list_reads_the_tenant_role_index(self):
+        self.assertPlan('ADMIN', '/api/staff/?page_size=10', 'user_tenant_role_idx')
+        self.assertPlan('ADMIN', '/api/admin/customers/?page_size=10', 'user_tenant_role_idx')
+
+    def test_staff_create(self):
+        company_id = str(self.seeded.companies[1].id)
+        self.assertBudgets('POST', '/api/staff/', {
+            'ADMIN': (201, 3), 'MANAGER': (201, 3), 'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+        }, data=lambda role: {
+            'email': f"new.{role.lower()}@budget.test", 'password': PASSWORD, 'company_id': company_id,
+        })
+
+    def test_customer_list(self):
+        for path in ('/api/admin/customers/', '/api/admin/customers/?expand=tenant'):
+            with self.subTest(path=path):
+                self.assertBudgets('GET', path, {
+                    'ADMIN': (200, 1), 'MANAGER': (403, 0), 'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+                })
+
+    def test_customer_products(self):
+        path = f"/api/admin/customers/{self.seeded.users['CUSTOMER'].id}/products/"
+        for query in ('', '?expand=company,created_by,customer'):
+            with self.subTest(query=query):
+                self.assertBudgets('GET', path + query, {
+                    'ADMIN': (200, 1), 'MANAGER': (403, 0), 'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+                })
+
+
+    def test_user_export(self):
+        self.assertBudgets('GET', '/api/admin/users/export/', {
+            'MANAGER': (403, 0), 'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+        })
+        response = self.client_for('ADMIN').get('/api/admin/users/export/?fmt=csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(
+            sorted(row['email'] for row in rows),
+            sorted(User.objects.filter(tenant=self.seeded.tenant).values_list('email', flat=True)),
+        )
+        self.assertNotIn('password', rows[0])
+
+
+class UserIntegrityTests(TestCase):
+    """The role/company/tenant rules hold for writes that skip full_clean()."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name='Integrity tenant')
+        cls.company = Company.objects.create(tenant=cls.tenant, name='Integrity company')
+        other = Tenant.objects.create(name='Other tenant')
+        cls.foreign_company = Company.objects.create(tenant=other, name='Foreign company')
+
+    def assertRejected(self, **fields):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.bulk_create([User(email='rejected@integrity.test', **fields)])
+
+    def test_save_uses_the_company_it_is_given(self):
+        staff = User(email='staff@integrity.test', role='STAFF', tenant_id=self.tenant.id, company_id=self.company.id)
+        staff.set_unusable_password()
+        with self.assertNumQueries(1):
+            staff.save(related={'company': self.company}, validate_unique=False)
+        staff.company_id = self.foreign_company.id
+        with self.assertNumQueries(0), self.assertRaises(ValidationError):
+            staff.save(related={'company': self.foreign_company}, validate_unique=False)
+
+    def test_bulk_create_is_checked(self):
+        self.assertRejected(role='STAFF', tenant=self.tenant)
+        self.assertRejected(role='CUSTOMER', tenant=self.tenant, company=self.company)
+        self.assertRejected(role='CUSTOMER')
+        self.assertRejected(role='STAFF', tenant=self.tenant, company=self.foreign_company)
+        User.objects.bulk_create([
+            User(email='staff@integrity.test', role='STAFF', tenant=self.tenant, company=self.company),
+            User(email='root@integrity.test', is_superuser=True),
+        ])
+
+    def test_queryset_update_is_checked(self):
+        staff = User.objects.create_user(
+            email='staff@integrity.test', password='pw', role='STAFF',
+            tenant=self.tenant, company=self.company,
+        )
+        for changes in ({'company': None}, {'role': 'MANAGER'}, {'company': self.foreign_company}):
+            with self.subTest(changes=changes):
+                with self.assertRaises(IntegrityError), transaction.atomic():
+                    User.objects.filter(pk=staff.pk).update(**changes)
+
+
+class SlidingWindowThrottleTests(SimpleTestCase):
+    """The login throttle (5/minute) as a sliding window over two counters."""
+
+    def setUp(self):
+        cache.clear()
+        self.now = 6000.0  # the start of a one-minute window
+
+    def attempts(self, count, address='10.1.1.1'):
+        request = RequestFactory().post('/api/auth/login/', REMOTE_ADDR=address)
+        request.user = AnonymousUser()
+        results = []
+        for _ in range(count):
+            throttle = LoginRateThrottle()
+            throttle.timer = lambda: self.now
+            results.append(throttle.allow_request(request, None))
+        self.last = throttle
+        return results
+
+    def test_limit_within_a_window(self):
+        self.assertEqual(self.attempts(6), [True] * 5 + [False])
+        self.assertEqual(self.last.wait(), 60)
+        self.assertEqual(self.attempts(1, address='10.1.1.2'), [True])
+
+    def test_previous_window_counts_by_its_overlap(self):
+        self.attempts(6)  # rejected attempts count too
+        self.now += 90    # half way through the next window: 6 * 0.5 = 3 carried over
+        self.assertEqual(self.attempts(3), [True, True, False])
+        self.assertEqual(self.last.wait(), 30)
+        self.now += 60    # the full window later, nothing carries over
+        self.assertEqual(self.attempts(1), [True])
+
+    def test_per_process_counters_when_the_cache_is_down(self):
+        self.addCleanup(local_counters._counters.clear)
+        unreachable = mock.Mock(**{'add.side_effect': ConnectionError})
+        with mock.patch('accounts.throttles.caches', {'default': unreachable}), \
+                self.assertLogs('accounts.throttles', 'WARNING'):
+            self.assertEqual(self.attempts(6), [True] * 5 + [False])
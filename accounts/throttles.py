@@ -1,9 +1,115 @@
-from rest_framework.throttling import AnonRateThrottle
+import logging
+import threading
+import time
 
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import AnonRateThrottle, SimpleRateThrottle, UserRateThrottle
 
-class LoginRateThrottle(AnonRateThrottle):
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCounterStore:
+    """
+    In-process fixed-window counters, used when the shared cache cannot be
+    reached. Limits are then enforced per worker rather than globally.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def incr(self, key, timeout):
+        now = time.monotonic()
+        with self._lock:
+            count, expires = self._counters.get(key, (0, 0))
+            if expires <= now:
+                count, expires = 0, now + timeout
+            count += 1
+            self._counters[key] = (count, expires)
+            if len(self._counters) > 10000:
+                self._counters = {k: v for k, v in self._counters.items() if v[1] > now}
+            return count
+
+    def get(self, key):
+        with self._lock:
+            count, expires = self._counters.get(key, (0, 0))
+        return count if expires > time.monotonic() else 0
+
+
+local_counters = LocalCounterStore()
+
+
+class CounterRateThrottle(SimpleRateThrottle):
+    """
+    Sliding-window-counter throttle with O(1) state per client.
+
+    Instead of pickling a list of request timestamps, each client has one
+    integer counter per window, bumped with an atomic ``incr`` on the shared
+    cache (``THROTTLE_CACHE_ALIAS``). The request rate is estimated as the
+    current window's count plus the previous window's count weighted by how
+    much of it still overlaps the sliding window. Attempts are counted even
+    when rejected, so hammering a limited endpoint keeps it limited.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        window = int(now // self.duration)
+        elapsed = (now % self.duration) / self.duration
+        self.window_end = (window + 1) * self.duration
+
+        try:
+            cache = caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+            current = self._incr(cache, f"{self.key}:{window}")
+            previous = cache.get(f"{self.key}:{window - 1}", 0)
+        except Exception:
+            logger.warning("Throttle cache unavailable; using per-process counters.", exc_info=True)
+            current = local_counters.incr(f"{self.key}:{window}", self.duration * 2)
+            previous = local_counters.get(f"{self.key}:{window - 1}")
+
+        if previous * (1 - elapsed) + current > self.num_requests:
+            metrics.throttle_rejections.inc(self.scope)
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def _incr(self, cache, key):
+        timeout = self.duration * 2
+        for _ in range(3):
+            if cache.add(key, 1, timeout):
+                return 1
+            try:
+                return cache.incr(key)
+            except ValueError:
+                continue  # Expired between add() and incr(); try again.
+        return cache.incr(key)
+
+    def throttle_success(self):
+        return True
+
+    def wait(self):
+        return max(self.window_end - self.timer(), 0)
+
+
+class AnonCounterRateThrottle(CounterRateThrottle, AnonRateThrottle):
+    pass
+
+
+class UserCounterRateThrottle(CounterRateThrottle, UserRateThrottle):
+    pass
+
+
+class LoginRateThrottle(AnonCounterRateThrottle):
     scope = 'login'
 
 
-class PasswordResetRateThrottle(AnonRateThrottle):
+class PasswordResetRateThrottle(AnonCounterRateThrottle):
     scope = 'password_reset'
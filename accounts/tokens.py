@@ -0,0 +1,23 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class TenantRefreshToken(RefreshToken):
+    """
+    Refresh token that also carries the user's RBAC scope. The claims are
+    copied onto every access token minted from it, which lets
+    ``StatelessJWTAuthentication`` authorize requests without a user lookup.
+    ``TenantTokenRefreshSerializer`` stamps them again from the database on
+    every refresh.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.stamp(user)
+        return token
+
+    def stamp(self, user):
+        self['role'] = user.role
+        self['tenant_id'] = str(user.tenant_id) if user.tenant_id else None
+        self['company_id'] = str(user.company_id) if user.company_id else None
+        self['is_superuser'] = user.is_superuser
@@ -7,6 +7,7 @@ from .views import (
     StaffListCreateView,
     AdminCustomerListView,
     AdminCustomerProductsView,
+    UserExportView,
 )
 
 urlpatterns = [
@@ -16,5 +17,6 @@ urlpatterns = [
     path('auth/password-reset/confirm/', PasswordResetConfirmView.as_view(), name='password_reset_confirm'),
     path('staff/', StaffListCreateView.as_view(), name='staff-list-create'),
     path('admin/customers/', AdminCustomerListView.as_view(), name='admin-customers'),
+    path('admin/users/export/', UserExportView.as_view(), name='admin-users-export'),
     path('admin/customers/<uuid:customer_id>/products/', AdminCustomerProductsView.as_view(), name='admin-customer-products'),
 ]
@@ -5,14 +5,18 @@ from django.core.exceptions import ValidationError
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 import secrets
 
-from core.mixins import TenantScopedMixin
-from core.permissions import IsAdminOrManager, IsTenantAdmin
-from .serializers import CustomTokenObtainPairSerializer, StaffCreateSerializer, UserSerializer
+from core.exports import ExportMixin
+from core.mixins import CachedListMixin, DynamicFieldsQuerysetMixin, TenantScopedMixin
+from core.permissions import HasRolePermission
+from products.pagination import ProductPagination
+from .serializers import (
+    CustomTokenObtainPairSerializer, StaffCreateSerializer, TenantTokenRefreshSerializer, UserSerializer,
+)
 from .models import User, ResetToken
+from .pagination import UserPagination
 from .throttles import LoginRateThrottle, PasswordResetRateThrottle
 
 
@@ -22,6 +26,7 @@ class CustomTokenObtainPairView(TokenObtainPairView):
 
 
 class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = TenantTokenRefreshSerializer
     throttle_classes = []
 
 
@@ -70,13 +75,14 @@ class PasswordResetConfirmView(APIView):
             )
 
         try:
-            reset_obj = ResetToken.objects.get(token=reset_token_str)
+            reset_obj = ResetToken.objects.select_related('user').get(token=reset_token_str)
             reset_obj.is_valid()
             user = reset_obj.user
             user.set_password(new_password)
-            user.save()
+            # Only the password changes, which no model rule depends on.
+            user.save(update_fields=['password', 'updated_at'], validate=False)
             reset_obj.used_at = timezone.now()
-            reset_obj.save()
+            reset_obj.save(update_fields=['used_at'])
             return Response({"detail": "Password updated"}, status=status.HTTP_200_OK)
         except ResetToken.DoesNotExist:
             return Response(
@@ -90,9 +96,11 @@ class PasswordResetConfirmView(APIView):
             )
 
 
-class StaffListCreateView(TenantScopedMixin, generics.ListCreateAPIView):
+class StaffListCreateView(CachedListMixin, TenantScopedMixin, DynamicFieldsQuerysetMixin, generics.ListCreateAPIView):
     queryset = User.objects.filter(role='STAFF')
-    permission_classes = [IsAuthenticated, IsAdminOrManager]
+    permission_classes = [HasRolePermission]
+    rbac_view = 'accounts.staff'
+    pagination_class = UserPagination
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -101,21 +109,43 @@ class StaffListCreateView(TenantScopedMixin, generics.ListCreateAPIView):
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        return queryset.filter(tenant=self.request.user.tenant)
+        return queryset.filter(tenant_id=self.request.user.tenant_id)
 
 
-class AdminCustomerListView(TenantScopedMixin, generics.ListAPIView):
+class AdminCustomerListView(CachedListMixin, TenantScopedMixin, DynamicFieldsQuerysetMixin, generics.ListAPIView):
     queryset = User.objects.filter(role='CUSTOMER')
     serializer_class = UserSerializer
-    permission_classes = [IsAuthenticated, IsTenantAdmin]
+    permission_classes = [HasRolePermission]
+    rbac_view = 'accounts.customers'
+    pagination_class = UserPagination
 
     def get_queryset(self):
-        return super().get_queryset().filter(tenant=self.request.user.tenant)
+        return super().get_queryset().filter(tenant_id=self.request.user.tenant_id)
 
 
-class AdminCustomerProductsView(generics.ListAPIView):
+class UserExportView(ExportMixin, TenantScopedMixin, generics.GenericAPIView):
+    """
+    Streams every user of the admin's tenant as NDJSON or CSV (``?fmt=csv``),
+    oldest first, gzipped if the client accepts it.
+    """
+    queryset = User.objects.all()
+    permission_classes = [HasRolePermission]
+    rbac_view = 'accounts.users_export'
+    export_fields = (
+        'id', 'email', 'role', 'tenant', 'company',
+        'is_active', 'is_staff', 'is_superuser', 'created_at', 'updated_at',
+    )
+    export_name = 'users'
+
+    def get(self, request):
+        return self.export_response(request, self.get_queryset().order_by('created_at', 'id'))
+
+
+class AdminCustomerProductsView(DynamicFieldsQuerysetMixin, generics.ListAPIView):
     serializer_class = UserSerializer  # overridden below
-    permission_classes = [IsAuthenticated, IsTenantAdmin]
+    permission_classes = [HasRolePermission]
+    rbac_view = 'accounts.customer_products'
+    pagination_class = ProductPagination
 
     def get_serializer_class(self):
         from products.serializers import ProductSerializer
@@ -124,7 +154,7 @@ class AdminCustomerProductsView(generics.ListAPIView):
     def get_queryset(self):
         from products.models import Product
         customer_id = self.kwargs['customer_id']
-        return Product.objects.filter(
+        return self.shape_queryset(Product.objects.filter(
             customer_id=customer_id,
-            tenant=self.request.user.tenant,
-        )
+            tenant_id=self.request.user.tenant_id,
+        ))
@@ -1,3 +1,4 @@
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 from decouple import config
@@ -28,6 +29,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.RequestTimingMiddleware",  # first, so it times everything below
+    "core.middleware.RequestProfilerMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -65,10 +68,78 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # File-backed test database: the shared in-memory one fails concurrent
+        # writers with table locks instead of waiting, which the claim race
+        # tests need.
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
 
+# Cache
+# LocMem is per process; point CACHE_BACKEND/CACHE_LOCATION at Redis or
+# Memcached in production so all workers share cached rows and counters.
+
+CACHES = {
+    "default": {
+        "BACKEND": config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        "LOCATION": config('CACHE_LOCATION', default=''),
+    }
+}
+
+# Tenant/Company read cache (core.cache.ModelCache)
+MODEL_CACHE_TIMEOUT = 300       # seconds in the shared cache
+MODEL_CACHE_LOCAL_SIZE = 256    # rows kept in each process's LRU
+MODEL_CACHE_LOCAL_TTL = 5       # seconds a process may serve its local copy
+
+# List responses cached per tenant generation (core.cache.ResponseCache)
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=60, cast=int)
+
+# Change feeds (core.changes)
+CHANGE_FEED_SETTLE_SECONDS = config('CHANGE_FEED_SETTLE_SECONDS', default=2, cast=float)
+CHANGE_FEED_RETENTION_DAYS = config('CHANGE_FEED_RETENTION_DAYS', default=30, cast=int)  # tombstones kept
+
+# Threads available to async views for PBKDF2 password hashing
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=4, cast=int)
+
+# core.middleware.RequestTimingMiddleware: per-request SQL/serializer/permission
+# timings as a Server-Timing header and one JSON line on the core.requests logger,
+# at INFO, or WARNING for requests slower than REQUEST_SLOW_MS (0: never)
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=True, cast=bool)
+REQUEST_SLOW_MS = config('REQUEST_SLOW_MS', default=1000, cast=float)
+
+# core.metrics: Prometheus text at /api/ops/metrics/. METRICS_TOKEN lets a
+# scraper authenticate with a static bearer token; with METRICS_DIR, every
+# worker process flushes its counts there and any worker serves the sum.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=float)
+
+# core.middleware.RequestProfilerMiddleware: captures of requests sent with a
+# superadmin's access token in X-Profile, pruned by age, then by total size
+PROFILE_DIR = config('PROFILE_DIR', default=str(Path(tempfile.gettempdir()) / 'backend_demo_profiles'))
+PROFILE_MAX_BYTES = config('PROFILE_MAX_BYTES', default=50 * 1024 * 1024, cast=int)
+PROFILE_RETENTION = config('PROFILE_RETENTION', default=24 * 3600, cast=int)   # seconds
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "core.requests": {
+            "handlers": ["console"],
+            "level": config('REQUEST_LOG_LEVEL', default='WARNING'),
+            "propagate": False,
+        },
+    },
+}
+
+# Cache holding the throttle counters (accounts.throttles.CounterRateThrottle)
+THROTTLE_CACHE_ALIAS = 'default'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -107,14 +178,14 @@ AUTH_USER_MODEL = 'accounts.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',   # deny-by-default
     ],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'accounts.throttles.AnonCounterRateThrottle',
+        'accounts.throttles.UserCounterRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '20/hour',            # public endpoints
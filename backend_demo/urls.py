@@ -7,4 +7,5 @@ urlpatterns = [
     path('api/', include('tenants.urls')),
     path('api/', include('invitations.urls')),
     path('api/', include('products.urls')),
+    path('api/', include('core.urls')),
 ]
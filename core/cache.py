@@ -0,0 +1,172 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+_registry = {}
+
+
+def cache_stats():
+    """Hit/miss counters of every ModelCache in this process, keyed by name."""
+    return {name: model_cache.stats() for name, model_cache in _registry.items()}
+
+
+class ModelCache:
+    """
+    Read-through cache for rows that rarely change (tenants, companies).
+
+    Lookups go to a small per-process LRU first, then to Django's shared
+    cache, then to the database. Entries are keyed by primary key and an
+    optional scope (e.g. the owning tenant), so a lookup can never return a
+    row from another tenant. Writes invalidate through ``invalidate()``,
+    wired to post_save/post_delete; other processes may serve their local
+    copy for at most ``MODEL_CACHE_LOCAL_TTL`` seconds after a change.
+    """
+
+    def __init__(self, model, name, scope_field=None):
+        self.model = model
+        self.name = name
+        self.scope_field = scope_field
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        _registry[name] = self
+
+    @property
+    def shared(self):
+        return caches[getattr(settings, 'MODEL_CACHE_ALIAS', 'default')]
+
+    def key(self, pk, scope=None):
+        return f"modelcache:{self.name}:{scope or '-'}:{pk}"
+
+    def get(self, pk, scope=None):
+        """Return a private copy of the row, or None if it does not exist."""
+        if pk is None:
+            return None
+        key = self.key(pk, scope)
+
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._local.move_to_end(key)
+                self.local_hits += 1
+                return copy.copy(entry[1])
+
+        instance = self.shared.get(key)
+        if instance is not None:
+            self.shared_hits += 1
+        else:
+            self.misses += 1
+            filters = {'pk': pk}
+            if self.scope_field:
+                filters[self.scope_field] = scope
+            instance = self.model._default_manager.filter(**filters).first()
+            if instance is None:
+                return None
+            self.shared.set(key, instance, getattr(settings, 'MODEL_CACHE_TIMEOUT', 300))
+
+        self._remember(key, instance)
+        return copy.copy(instance)
+
+    def invalidate(self, instance):
+        scope = getattr(instance, self.scope_field) if self.scope_field else None
+        key = self.key(instance.pk, scope)
+        with self._lock:
+            self._local.pop(key, None)
+        self.shared.delete(key)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def stats(self):
+        lookups = self.local_hits + self.shared_hits + self.misses
+        return {
+            'local_hits': self.local_hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'hit_ratio': (lookups - self.misses) / lookups if lookups else 0.0,
+        }
+
+    def _remember(self, key, instance):
+        expires = time.monotonic() + getattr(settings, 'MODEL_CACHE_LOCAL_TTL', 5)
+        with self._lock:
+            self._local[key] = (expires, instance)
+            self._local.move_to_end(key)
+            while len(self._local) > getattr(settings, 'MODEL_CACHE_LOCAL_SIZE', 256):
+                self._local.popitem(last=False)
+
+
+class ResponseCache:
+    """
+    Serialized list responses, versioned per tenant.
+
+    Every tenant has a generation number in the shared cache, and every
+    entry key embeds the generation current when it was stored. A write
+    to the tenant's products, companies or users calls ``bump()``, which
+    makes all of its entries unreachable in one ``incr``: nothing is
+    scanned or deleted, stale entries just expire after
+    ``RESPONSE_CACHE_TIMEOUT`` seconds. A generation that was evicted
+    restarts from the clock in nanoseconds, above any number handed out
+    before.
+
+    Generations and entries live in the shared cache, so with a per-process
+    backend (the default LocMemCache) other processes keep serving their
+    copy for up to ``RESPONSE_CACHE_TIMEOUT`` seconds after a write.
+    """
+
+    def __init__(self, prefix='responses'):
+        self.prefix = prefix
+
+    @property
+    def shared(self):
+        return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+    def generation_key(self, tenant_id):
+        return f"{self.prefix}:generation:{tenant_id}"
+
+    def generation(self, tenant_id):
+        key = self.generation_key(tenant_id)
+        value = self.shared.get(key)
+        if value is None:
+            self.shared.add(key, time.time_ns(), None)
+            value = self.shared.get(key)
+        return value
+
+    def bump(self, tenant_id):
+        """Invalidate every cached response of ``tenant_id``."""
+        if tenant_id is None:
+            return
+        self._bump(tenant_id)
+        if transaction.get_connection().in_atomic_block:
+            # A concurrent read may still see the uncommitted state and
+            # cache it under the new generation; move on again at commit.
+            transaction.on_commit(lambda: self._bump(tenant_id))
+
+    def _bump(self, tenant_id):
+        key = self.generation_key(tenant_id)
+        try:
+            self.shared.incr(key)
+        except ValueError:
+            self.shared.add(key, time.time_ns(), None)
+
+    def key(self, tenant_id, endpoint, scope, variant):
+        """Entry key; ``scope`` and ``variant`` are hashed (user scope, query string, format)."""
+        digest = hashlib.md5(repr((scope, variant)).encode(), usedforsecurity=False).hexdigest()
+        return f"{self.prefix}:{tenant_id}:{self.generation(tenant_id)}:{endpoint}:{digest}"
+
+    def get(self, key):
+        return self.shared.get(key)
+
+    def set(self, key, value):
+        self.shared.set(key, value, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 60))
+
+
+response_cache = ResponseCache()
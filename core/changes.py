@@ -0,0 +1,130 @@
+"""
+Change feeds: what a caller can see that changed since their last sync.
+
+``GET <list>/changes/`` returns the visible rows created or updated after
+the cursor (keyset over ``(updated_at, id)``) and the ids of visible rows
+deleted after it (``core.models.Tombstone``, keyset over
+``(deleted_at, id)``), plus a ``next`` cursor to store for the following
+sync. Without a cursor it starts a full sync.
+
+Rows are only served up to a horizon ``CHANGE_FEED_SETTLE_SECONDS`` in the
+past. ``updated_at`` is stamped before the writing transaction commits, so
+a slow transaction can make a row visible with a timestamp the cursor has
+already passed; the horizon gives such writes time to land, at the cost of
+changes showing up that much later.
+"""
+import base64
+import binascii
+import json
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from core.models import Tombstone
+
+
+class CursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "This cursor is older than the deletion history; sync again without a cursor."
+    default_code = 'cursor_expired'
+
+
+def after(position, field):
+    """Rows past ``position`` (``(timestamp, id)``; ``id`` None means past the whole instant)."""
+    moment, pk = position
+    if pk is None:
+        return Q(**{f'{field}__gt': moment})
+    return Q(**{f'{field}__gt': moment}) | Q(**{field: moment, 'id__gt': pk})
+
+
+class ChangeFeedMixin:
+    """
+    Adds a ``changes`` list action to a viewset whose model has
+    ``updated_at``. Visibility is the view's own ``get_queryset()``, and
+    deletions go through the same tenant scope and ``row_policy``.
+    """
+    changes_page_size = 200
+    changes_max_page_size = 1000
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor.'
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        now = timezone.now()
+        horizon = now - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+        rows_after, deleted_after = self.decode_changes_cursor(request, horizon)
+        if deleted_after[0] < now - timedelta(days=settings.CHANGE_FEED_RETENTION_DAYS):
+            raise CursorExpired()
+        limit = self.get_changes_page_size(request)
+
+        queryset = self.get_queryset().filter(updated_at__lte=horizon)
+        if rows_after is not None:
+            queryset = queryset.filter(after(rows_after, 'updated_at'))
+        rows = list(queryset.order_by('updated_at', 'id')[:limit + 1])
+        tombstones = list(
+            self.get_tombstones()
+            .filter(after(deleted_after, 'deleted_at'), deleted_at__lte=horizon)
+            .order_by('deleted_at', 'id')
+            .values_list('deleted_at', 'id', 'object_id')[:limit + 1]
+        )
+
+        rows_more, deleted_more = len(rows) > limit, len(tombstones) > limit
+        rows, tombstones = rows[:limit], tombstones[:limit]
+        # A finished stream resumes after the horizon; an unfinished one after its last item.
+        next_rows = (rows[-1].updated_at, rows[-1].pk) if rows_more else (horizon, None)
+        next_deleted = tombstones[-1][:2] if deleted_more else (horizon, None)
+        return Response({
+            'results': self.get_serializer(rows, many=True).data,
+            'deleted': [object_id for _, _, object_id in tombstones],
+            'has_more': rows_more or deleted_more,
+            'next': self.encode_changes_cursor(request, next_rows, next_deleted),
+        })
+
+    def get_tombstones(self):
+        queryset = Tombstone.objects.filter(model=self.queryset.model._meta.label_lower)
+        user = self.request.user
+        if not user.is_superuser:
+            queryset = queryset.filter(tenant_id=user.tenant_id) if user.tenant_id else queryset.none()
+        policy = getattr(self, 'row_policy', None)
+        return policy.filter(queryset, user) if policy is not None else queryset
+
+    def get_changes_page_size(self, request):
+        try:
+            size = int(request.query_params['page_size'])
+        except (KeyError, ValueError):
+            return self.changes_page_size
+        if size <= 0:
+            return self.changes_page_size
+        return min(size, self.changes_max_page_size)
+
+    def decode_changes_cursor(self, request, horizon):
+        """``(rows position or None, deletions position)``; a new sync skips past deletions."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, (horizon, None)
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            positions = [
+                (parse_datetime(moment), None if pk is None else uuid.UUID(str(pk)))
+                for moment, pk in json.loads(base64.urlsafe_b64decode(padded))
+            ]
+            rows_after, deleted_after = positions
+        except (AttributeError, TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if any(moment is None or timezone.is_naive(moment) for moment, _ in positions):
+            raise NotFound(self.invalid_cursor_message)
+        return rows_after, deleted_after
+
+    def encode_changes_cursor(self, request, *positions):
+        raw = json.dumps([[moment.isoformat(), pk and str(pk)] for moment, pk in positions])
+        encoded = base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+        return replace_query_param(request.build_absolute_uri(), self.cursor_query_param, encoded)
@@ -0,0 +1,161 @@
+"""
+Streaming imports of NDJSON or CSV uploads.
+
+The upload is read line by line, from the request body or a multipart
+``file``, and never through ``request.data``. Both are spooled to disk
+past ``FILE_UPLOAD_MAX_MEMORY_SIZE`` before the response starts: whether
+the request body can still be read while a WSGI response streams is up
+to the server. Rows are handed to the view in fixed-size batches, and each
+batch is written and committed before the next is read. Memory is bounded
+by the batch size, not the file. Progress streams back as one NDJSON line
+per batch, under ASGI too (``stream_chunks()``); an import that fails
+ends with an ``error`` line.
+"""
+import csv
+import json
+import logging
+import shutil
+import tempfile
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.exports import FORMATS, stream_chunks
+
+logger = logging.getLogger(__name__)
+
+NOT_AN_OBJECT = "Each line must be a JSON object."
+IMPORT_FAILED = "The import failed; batches reported above were saved."
+
+
+class ImportAborted(Exception):
+    """Stops an import; rows already committed stay."""
+
+
+def spooled(stream):
+    """A rewound copy of ``stream`` in memory, or on disk past ``FILE_UPLOAD_MAX_MEMORY_SIZE``."""
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    shutil.copyfileobj(stream, spool)
+    spool.seek(0)
+    return spool
+
+
+def decoded_lines(lines):
+    """``(line number, text)`` for each line of a UTF-8 byte stream; a BOM is dropped."""
+    for number, line in enumerate(lines, 1):
+        try:
+            text = line.decode('utf-8-sig' if number == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            raise ImportAborted(f"Line {number} is not valid UTF-8.")
+        yield number, text
+
+
+def ndjson_rows(lines):
+    """``(line, data, error)`` per non-blank line; ``data`` is None when ``error`` is set."""
+    for number, text in decoded_lines(lines):
+        if not text.strip():
+            continue
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            yield number, data, None
+        else:
+            yield number, None, {'non_field_errors': [NOT_AN_OBJECT]}
+
+
+def csv_rows(lines, required):
+    """
+    Like ``ndjson_rows`` for CSV with a header row; empty cells are
+    dropped so optional fields fall back to their defaults. Raises
+    ValidationError before any row is read if a ``required`` column is
+    missing.
+    """
+    numbered = decoded_lines(lines)
+    line = 0
+
+    def text():
+        nonlocal line
+        for line, value in numbered:
+            yield value
+
+    reader = csv.DictReader(text())
+    try:
+        fieldnames = reader.fieldnames or ()
+    except ImportAborted as exc:
+        raise ValidationError({'detail': str(exc)})
+    missing = [name for name in required if name not in fieldnames]
+    if missing:
+        raise ValidationError({'detail': f"Missing CSV columns: {', '.join(missing)}."})
+
+    def rows():
+        for row in reader:
+            yield line, {name: value for name, value in row.items() if name and value}, None
+    return rows()
+
+
+class ImportMixin:
+    """
+    Adds ``import_response()`` to a view. The upload's format comes from
+    ``?fmt=`` (``ndjson`` or ``csv``), defaulting to CSV for ``text/csv``
+    bodies and NDJSON otherwise. Views implement ``import_batch()``.
+    """
+    import_batch_size = 1000
+    import_required_fields = ()
+
+    def import_response(self, request):
+        if request.content_type.startswith('multipart/'):
+            upload = request.FILES.get('file')
+            content_type = getattr(upload, 'content_type', None) or ''
+        else:
+            upload = spooled(request.stream) if request.stream is not None else None
+            content_type = request.content_type
+        if upload is None:
+            raise ValidationError({'detail': "Send the rows as the request body or as a 'file' upload."})
+        fmt = request.query_params.get('fmt') or ('csv' if content_type.startswith('text/csv') else 'ndjson')
+        if fmt not in FORMATS:
+            raise ValidationError({'fmt': [f"Choose one of: {', '.join(FORMATS)}."]})
+        rows = csv_rows(upload, self.import_required_fields) if fmt == 'csv' else ndjson_rows(upload)
+
+        def progress():
+            with upload:
+                yield from self.import_progress(rows)
+        return StreamingHttpResponse(stream_chunks(request, progress()), content_type='application/x-ndjson')
+
+    def import_progress(self, rows):
+        encode = JSONEncoder(separators=(',', ':')).encode
+        totals = {'rows': 0, 'created': 0, 'failed': 0}
+        batch_number = 0
+        try:
+            while batch := list(islice(rows, self.import_batch_size)):
+                batch_number += 1
+                parsed = [(line, data) for line, data, error in batch if error is None]
+                errors = [{'line': line, 'errors': error} for line, data, error in batch if error is not None]
+                created, invalid = self.import_batch(parsed) if parsed else (0, [])
+                errors += invalid
+                errors.sort(key=lambda error: error['line'])
+                totals['rows'] += len(batch)
+                totals['created'] += created
+                totals['failed'] += len(errors)
+                yield encode({'batch': batch_number, **totals, 'errors': errors}) + '\n'
+        except ImportAborted as exc:
+            yield encode({'done': False, 'detail': str(exc), **totals}) + '\n'
+            return
+        except Exception:
+            # The status line went out with the first batch; say so in the body.
+            logger.exception("Import failed after %d rows.", totals['rows'])
+            yield encode({'done': False, 'error': IMPORT_FAILED, **totals}) + '\n'
+            return
+        yield encode({'done': True, **totals}) + '\n'
+
+    def import_batch(self, rows):
+        """
+        Validate and save ``rows``, a list of ``(line, data)``. Returns the
+        number saved and ``[{'line': ..., 'errors': {...}}]`` for rows that
+        were rejected; raise ImportAborted to stop the import.
+        """
+        raise NotImplementedError
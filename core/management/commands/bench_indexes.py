@@ -0,0 +1,153 @@
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import User
+from invitations.models import Invitation
+from products.models import Product
+from tenants.models import Tenant, Company
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway multi-tenant dataset, then print query plans and "
+        "timings for the tenant-scoped access paths with and without the "
+        "composite indexes. Everything runs in one transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenants', type=int, default=5)
+        parser.add_argument('--companies', type=int, default=5, help='Companies per tenant.')
+        parser.add_argument('--staff', type=int, default=4, help='Staff per company.')
+        parser.add_argument('--customers', type=int, default=50, help='Customers per tenant.')
+        parser.add_argument('--products', type=int, default=100, help='Products per staff member.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query.')
+
+    def handle(self, *args, **options):
+        if not connection.features.can_rollback_ddl:
+            self.stderr.write("This benchmark needs a database with transactional DDL.")
+            return
+
+        with transaction.atomic():
+            target = self.seed(options)
+            queries = self.access_paths(*target)
+
+            self.stdout.write(self.style.MIGRATE_HEADING("With composite indexes"))
+            with_indexes = self.run(queries, options['repeat'], phase='with')
+
+            # Raw DDL rather than ``with schema_editor()``: SQLite refuses to
+            # enter the schema editor inside an open transaction.
+            editor = connection.schema_editor()
+            with connection.cursor() as cursor:
+                for model in (Product, User, Company, Invitation):
+                    for index in model._meta.indexes:
+                        cursor.execute(str(index.remove_sql(model, editor)))
+
+            self.stdout.write(self.style.MIGRATE_HEADING("Without composite indexes"))
+            without_indexes = self.run(queries, options['repeat'], phase='without')
+
+            self.stdout.write(self.style.MIGRATE_HEADING("Summary (median ms)"))
+            for label in queries:
+                self.stdout.write(
+                    f"  {label:<32} {without_indexes[label]:>9.3f} -> {with_indexes[label]:>9.3f}"
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        password = make_password(None)
+        now = timezone.now()
+        tenants = Tenant.objects.bulk_create(
+            Tenant(name=f"Bench tenant {i}") for i in range(options['tenants'])
+        )
+        companies, staff, customers, products, invitations = [], [], [], [], []
+        for tenant in tenants:
+            for c in range(options['companies']):
+                companies.append(Company(tenant=tenant, name=f"{tenant.name} / company {c}"))
+            for c in range(options['customers']):
+                customers.append(User(
+                    email=f"customer{c}.{tenant.id.hex}@bench.local", password=password,
+                    role='CUSTOMER', tenant=tenant,
+                ))
+            for i in range(20):
+                invitations.append(Invitation(
+                    email=f"invite{i}.{tenant.id.hex}@bench.local", role='MANAGER', tenant=tenant,
+                    expires_at=now + timedelta(hours=48 - i * 4),
+                    used_at=now if i % 3 == 0 else None,
+                ))
+        Company.objects.bulk_create(companies)
+        for company in companies:
+            for s in range(options['staff']):
+                staff.append(User(
+                    email=f"staff{s}.{company.id.hex}@bench.local", password=password,
+                    role='STAFF', tenant_id=company.tenant_id, company=company,
+                ))
+        User.objects.bulk_create(customers + staff, batch_size=1000)
+        Invitation.objects.bulk_create(invitations)
+
+        customers_by_tenant = {}
+        for customer in customers:
+            customers_by_tenant.setdefault(customer.tenant_id, []).append(customer)
+        for member in staff:
+            pool = customers_by_tenant[member.tenant_id]
+            for p in range(options['products']):
+                products.append(Product(
+                    tenant_id=member.tenant_id, company_id=member.company_id, created_by=member,
+                    customer=pool[p % len(pool)] if p % 4 == 0 else None,
+                    name=f"Bench product {p}", share_token=uuid.uuid4().hex,
+                ))
+            if len(products) >= 5000:
+                Product.objects.bulk_create(products)
+                products = []
+        Product.objects.bulk_create(products)
+
+        self.stdout.write(
+            f"Seeded {len(tenants)} tenants, {len(companies)} companies, "
+            f"{len(staff)} staff, {len(customers)} customers, "
+            f"{Product.objects.count()} products."
+        )
+        return tenants[0], companies[0], customers[0]
+
+    def access_paths(self, tenant, company, customer):
+        ordering = ('-created_at', '-id')
+        return {
+            'products (admin/manager)': Product.objects.filter(tenant=tenant).order_by(*ordering)[:51],
+            'products (staff)': Product.objects.filter(
+                tenant=tenant, company=company).order_by(*ordering)[:51],
+            'products (customer)': Product.objects.filter(
+                tenant=tenant, customer=customer).order_by(*ordering)[:51],
+            'staff list': User.objects.filter(tenant=tenant, role='STAFF').order_by(*ordering)[:51],
+            'customer list': User.objects.filter(tenant=tenant, role='CUSTOMER').order_by(*ordering)[:51],
+            'companies': Company.objects.filter(tenant=tenant).order_by('-created_at'),
+            'pending invitations': Invitation.objects.filter(
+                tenant=tenant, used_at__isnull=True, expires_at__gt=timezone.now()),
+        }
+
+    def explain(self, queryset, phase):
+        # A phase-specific comment forces a fresh prepare: SQLite never
+        # re-validates a cached EXPLAIN statement after DROP INDEX.
+        sql, params = queryset.query.sql_with_params()
+        prefix = connection.ops.explain_query_prefix()
+        with connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql} /* {phase} */", params)
+            return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+
+    def run(self, queries, repeat, phase):
+        timings = {}
+        for label, queryset in queries.items():
+            self.stdout.write(f"-- {label}")
+            for line in self.explain(queryset, phase):
+                self.stdout.write(f"     {line}")
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all())
+                samples.append((time.perf_counter() - start) * 1000)
+            timings[label] = statistics.median(samples)
+            self.stdout.write(f"     median {timings[label]:.3f} ms over {repeat} runs")
+        return timings
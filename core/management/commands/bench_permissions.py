@@ -0,0 +1,82 @@
+import statistics
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import NotAuthenticated, PermissionDenied
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.rbac import ROLES, SUPERADMIN, policy, routed_views
+
+
+class Command(BaseCommand):
+    help = (
+        "Time DRF's permission check (APIView.check_permissions) for every "
+        "routed view, action and role against the compiled RBAC policy. "
+        "No database access."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5000, help='Checks per view, action and role.')
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        if repeat < 1:
+            raise CommandError("--repeat must be positive.")
+        factory = APIRequestFactory()
+        users = {
+            role: SimpleNamespace(
+                is_authenticated=True, is_superuser=role == SUPERADMIN,
+                role=None if role == SUPERADMIN else role,
+            )
+            for role in ROLES
+        }
+
+        allowed_us, denied_us = [], []
+        self.stdout.write(f"{'view / action':<44} {'allowed':>9} {'denied':>9}  (µs per check)")
+        for name, entry in sorted(routed_views().items()):
+            viewset = hasattr(entry['cls'], 'get_extra_actions')
+            for action in entry['actions']:
+                timings = {True: [], False: []}
+                for role, user in users.items():
+                    request = Request(factory.generic('GET' if viewset else action.upper(), entry['path']))
+                    request.user = user
+                    view = entry['cls']()
+                    view.request, view.args, view.kwargs, view.format_kwarg = request, (), {}, None
+                    if viewset:
+                        view.action = action
+                    timings[policy.allows(role, name, action)].append(self.time(view, request, repeat))
+                allowed_us += timings[True]
+                denied_us += timings[False]
+                self.stdout.write(
+                    f"{name + ' ' + action:<44} {self.mean(timings[True]):>9} {self.mean(timings[False]):>9}"
+                )
+
+        table_ns = self.time_lookup(repeat)
+        self.stdout.write(self.style.MIGRATE_HEADING("Summary"))
+        self.stdout.write(f"  allowed checks: {self.mean(allowed_us)} µs mean over {len(allowed_us)} cases")
+        self.stdout.write(f"  denied checks:  {self.mean(denied_us)} µs mean over {len(denied_us)} cases "
+                          f"(includes raising PermissionDenied)")
+        self.stdout.write(f"  table lookup:   {table_ns:.0f} ns")
+
+    def time(self, view, request, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            try:
+                view.check_permissions(request)
+            except (NotAuthenticated, PermissionDenied):
+                pass
+        return (time.perf_counter() - start) / repeat * 1e6
+
+    def time_lookup(self, repeat):
+        keys = list(policy.table)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for role, name, action in keys:
+                policy.allows(role, name, action)
+        return (time.perf_counter() - start) / (repeat * len(keys)) * 1e9
+
+    @staticmethod
+    def mean(values):
+        return f"{statistics.fmean(values):.2f}" if values else '-'
@@ -0,0 +1,110 @@
+import itertools
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+
+from core.ids import uuid7
+from products.models import Product
+
+GENERATORS = {'uuid4': uuid.uuid4, 'uuid7': uuid7}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare uuid4 and uuid7 primary keys: insert the seeded products' "
+        "tenant, timestamp and name into two scratch tables that differ only "
+        "in how ids are generated, then print insert throughput and the size "
+        "of each table and index. Run seed_tenants first; the scratch tables "
+        "are dropped afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200_000, help='Rows per table (products are reused).')
+        parser.add_argument('--batch', type=int, default=1000, help='Rows per INSERT batch.')
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['batch'] < 1:
+            raise CommandError("--rows and --batch must be positive.")
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError("Index sizes can only be read on SQLite and PostgreSQL.")
+        source = list(Product.objects.values_list('tenant_id', 'created_at', 'name')[:options['rows']])
+        if not source:
+            raise CommandError("No products to copy; run seed_tenants first.")
+
+        results = {}
+        for label, generate in GENERATORS.items():
+            table = f"bench_{label}_product"
+            with connection.cursor() as cursor:
+                self.create(cursor, table)
+                try:
+                    # One transaction per table, so commit fsyncs don't drown out the B-tree work.
+                    with transaction.atomic():
+                        elapsed = self.fill(cursor, table, generate, source, options['rows'], options['batch'])
+                    results[label] = (options['rows'] / elapsed, self.sizes(cursor, table))
+                finally:
+                    cursor.execute(f"DROP TABLE {connection.ops.quote_name(table)}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{options['rows']} rows, {options['batch']} per batch, {connection.vendor}"
+        ))
+        for label, (rate, sizes) in results.items():
+            self.stdout.write(f"-- {label}: {rate:,.0f} rows/s")
+            for name, size in sizes.items():
+                self.stdout.write(f"     {name:<40} {size / 1024:>10,.0f} KiB")
+
+    def create(self, cursor, table):
+        quote = connection.ops.quote_name
+        uuid_type = connection.data_types['UUIDField']
+        # Left behind by an interrupted run.
+        cursor.execute(f"DROP TABLE IF EXISTS {quote(table)}")
+        cursor.execute(
+            f"CREATE TABLE {quote(table)} ("
+            f"id {uuid_type} NOT NULL PRIMARY KEY, "
+            f"tenant_id {uuid_type} NOT NULL, "
+            f"created_at {connection.data_types['DateTimeField']} NOT NULL, "
+            f"name varchar(255) NOT NULL)"
+        )
+        # Same shape as the products' tenant-scoped listing index.
+        cursor.execute(
+            f"CREATE INDEX {quote(table + '_tenant')} ON {quote(table)} (tenant_id, created_at, id)"
+        )
+
+    def fill(self, cursor, table, generate, source, rows, batch):
+        field = models.UUIDField()
+        created = models.DateTimeField()
+        sql = f"INSERT INTO {connection.ops.quote_name(table)} (id, tenant_id, created_at, name) VALUES (%s, %s, %s, %s)"
+        rows_left = itertools.islice(itertools.cycle(source), rows)
+        elapsed = 0.0
+        while chunk := list(itertools.islice(rows_left, batch)):
+            # Ids are made as the ORM makes them, one per row right before the INSERT.
+            start = time.perf_counter()
+            cursor.executemany(sql, [
+                (
+                    field.get_db_prep_value(generate(), connection),
+                    field.get_db_prep_value(tenant_id, connection),
+                    created.get_db_prep_value(created_at, connection),
+                    name,
+                )
+                for tenant_id, created_at, name in chunk
+            ])
+            elapsed += time.perf_counter() - start
+        return elapsed
+
+    def sizes(self, cursor, table):
+        """Bytes used by ``table`` and each of its indexes."""
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT name, SUM(pgsize) FROM dbstat WHERE name = %s OR name IN "
+                "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s) "
+                "GROUP BY name ORDER BY name",
+                [table, table],
+            )
+        else:
+            cursor.execute(
+                "SELECT relname, pg_relation_size(oid) FROM pg_class WHERE relname = %s OR oid IN "
+                "(SELECT indexrelid FROM pg_index WHERE indrelid = %s::regclass) ORDER BY relname",
+                [table, table],
+            )
+        return dict(cursor.fetchall())
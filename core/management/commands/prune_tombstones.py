@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete change-feed tombstones older than CHANGE_FEED_RETENTION_DAYS. "
+        "Change feeds answer 410 to cursors from before that point, so "
+        "clients that old sync again from scratch. Run daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.CHANGE_FEED_RETENTION_DAYS,
+            help='Keep this many days (default: CHANGE_FEED_RETENTION_DAYS). '
+                 'Lower it only together with the setting.',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError("--days must be positive.")
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(f"Deleted {deleted} tombstones from before {cutoff:%Y-%m-%d %H:%M}.")
@@ -0,0 +1,275 @@
+"""
+Process-wide operational metrics in Prometheus text format.
+
+Every thread records into its own dictionary (found through a
+``threading.local``), so ``inc()`` and ``observe()`` never take a lock;
+the registry only locks the first time a thread records and while a
+scrape merges the per-thread shards. With ``METRICS_DIR`` set, each
+process also writes its totals to ``<METRICS_DIR>/metrics-<pid>.json``
+every ``METRICS_FLUSH_INTERVAL`` seconds and a scrape of any worker sums
+all files, so one endpoint reports the whole deployment. Files of
+exited workers are kept (their counts still happened); empty the
+directory when the service is redeployed.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Prometheus' default latency buckets, in seconds.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float('inf'))
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, registry, name, help, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        registry.families[name] = self
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        values = self.registry.shard()
+        key = (self.name, labels)
+        values[key] = values.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    """Stored per label set as ``[count per bucket..., sum, count]``."""
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(buckets)
+        if self.buckets[-1] != float('inf'):
+            self.buckets += (float('inf'),)
+
+    def observe(self, value, *labels):
+        values = self.registry.shard()
+        key = (self.name, labels)
+        entry = values.get(key)
+        if entry is None:
+            entry = values[key] = [0] * (len(self.buckets) + 2)
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+
+class CallbackCounter(Metric):
+    """Counter read at scrape time from ``callback()``: ``{labels: value}``."""
+    kind = 'counter'
+
+    def __init__(self, registry, name, help, labelnames, callback):
+        super().__init__(registry, name, help, labelnames)
+        self.callback = callback
+
+
+def _merge(into, values):
+    for key, value in values.items():
+        if isinstance(value, list):
+            current = into.get(key)
+            into[key] = [a + b for a, b in zip(current, value)] if current else list(value)
+        else:
+            into[key] = into.get(key, 0) + value
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+
+    def __init__(self):
+        self.families = {}
+        self._local = threading.local()
+        self._shards = []      # (thread, values) for every thread that recorded
+        self._retired = {}     # totals of threads that have exited
+        self._lock = threading.Lock()
+        self._flusher = None
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._forget_parent)
+
+    def counter(self, name, help, labelnames=()):
+        return Counter(self, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return Histogram(self, name, help, labelnames, buckets)
+
+    def callback_counter(self, name, help, labelnames, callback):
+        return CallbackCounter(self, name, help, labelnames, callback)
+
+    # ------------------------------------------------------------ recording
+
+    def shard(self):
+        """This thread's ``{(metric, labels): value}`` dictionary."""
+        try:
+            return self._local.values
+        except AttributeError:
+            return self._new_shard()
+
+    def _new_shard(self):
+        values = self._local.values = {}
+        with self._lock:
+            self._shards.append((threading.current_thread(), values))
+        if settings.METRICS_DIR and self._flusher is None:
+            self._start_flusher()
+        return values
+
+    def _forget_parent(self):
+        # A forked worker starts from zero; its parent reports its own counts.
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    # ------------------------------------------------------------ collection
+
+    def collect(self):
+        """This process's totals: ``{(metric, labels): value}``."""
+        totals = {}
+        with self._lock:
+            live = []
+            for thread, values in self._shards:
+                # dict.copy() is atomic under the GIL; histogram lists are copied by _merge.
+                if thread.is_alive():
+                    live.append((thread, values))
+                    _merge(totals, values.copy())
+                else:
+                    _merge(self._retired, values.copy())
+            self._shards = live
+            _merge(totals, self._retired)
+        for family in self.families.values():
+            if isinstance(family, CallbackCounter):
+                for labels, value in family.callback().items():
+                    totals[(family.name, tuple(labels))] = value
+        return totals
+
+    def collect_all(self):
+        """Totals of every process sharing ``METRICS_DIR`` (or just this one)."""
+        if not settings.METRICS_DIR:
+            return self.collect()
+        self.flush()
+        totals = {}
+        for path in Path(settings.METRICS_DIR).glob('metrics-*.json'):
+            try:
+                samples = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # being replaced or removed right now
+            _merge(totals, {(name, tuple(labels)): value for name, labels, value in samples})
+        return totals
+
+    def flush(self):
+        """Write this process's totals to its file in ``METRICS_DIR``."""
+        directory = Path(settings.METRICS_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        pid = os.getpid()
+        samples = [[name, list(labels), value] for (name, labels), value in self.collect().items()]
+        temporary = directory / f".metrics-{pid}-{threading.get_ident()}.json.tmp"
+        temporary.write_text(json.dumps(samples))
+        os.replace(temporary, directory / f"metrics-{pid}.json")
+
+    def _start_flusher(self):
+        def run():
+            while True:
+                time.sleep(settings.METRICS_FLUSH_INTERVAL)
+                try:
+                    self.flush()
+                except OSError:
+                    logger.warning("Could not write metrics to %s.", settings.METRICS_DIR, exc_info=True)
+
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=run, name='metrics-flusher', daemon=True)
+                self._flusher.start()
+
+    # ------------------------------------------------------------ exposition
+
+    def exposition(self):
+        """All families in the Prometheus text format (version 0.0.4)."""
+        by_family = {}
+        for (name, labels), value in self.collect_all().items():
+            by_family.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name, family in self.families.items():
+            lines.append(f"# HELP {name} {family.help}")
+            lines.append(f"# TYPE {name} {family.kind}")
+            for labels, value in sorted(by_family.get(name, ()), key=lambda sample: sample[0]):
+                if family.kind != 'histogram':
+                    lines.append(f"{name}{_labels(family.labelnames, labels)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(family.buckets, value):
+                    cumulative += count
+                    bucket_labels = _labels(family.labelnames, labels, [('le', _number(bound))])
+                    lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{name}_sum{_labels(family.labelnames, labels)} {_number(float(value[-2]))}")
+                lines.append(f"{name}_count{_labels(family.labelnames, labels)} {value[-1]}")
+        return '\n'.join(lines) + '\n'
+
+
+def _model_cache_lookups():
+    from core.cache import cache_stats
+
+    results = {}
+    for cache, stats in cache_stats().items():
+        for result, field in (('local_hit', 'local_hits'), ('shared_hit', 'shared_hits'), ('miss', 'misses')):
+            results[(cache, result)] = stats[field]
+    return results
+
+
+registry = Registry()
+
+request_latency = registry.histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by view and status code.',
+    ('view', 'status'),
+)
+throttle_rejections = registry.counter(
+    'throttle_rejections_total', 'Requests rejected by a rate throttle, by throttle scope.', ('scope',),
+)
+jwt_failures = registry.counter(
+    'jwt_authentication_failures_total', 'Rejected bearer tokens, by failure code.', ('reason',),
+)
+product_claims = registry.counter(
+    'product_claims_total', 'Products claimed by a customer, by tenant.', ('tenant',),
+)
+invitation_accepts = registry.counter(
+    'invitation_accepts_total', 'Invitations accepted, by tenant.', ('tenant',),
+)
+response_cache_lookups = registry.counter(
+    'response_cache_lookups_total', 'Cached list responses served (hit) or built (miss), by view.',
+    ('view', 'result'),
+)
+model_cache_lookups = registry.callback_counter(
+    'model_cache_lookups_total',
+    'Tenant/company cache lookups by result (local_hit, shared_hit, miss); '
+    'hit ratio = 1 - miss / total.',
+    ('cache', 'result'), _model_cache_lookups,
+)
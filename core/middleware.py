@@ -0,0 +1,196 @@
+import cProfile
+import json
+import logging
+import threading
+import time
+from types import SimpleNamespace
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
+
+from accounts.authentication import StatelessJWTAuthentication
+from core import metrics, timing
+from core.permissions import IsSuperadmin
+from core.profiling import ProfileStore
+
+logger = logging.getLogger('core.requests')
+
+
+def view_name(request):
+    """``ProductViewSet.list``-style name of the view that handled ``request``."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    func = match.func
+    cls = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    if cls is None:
+        return match.view_name
+    method = request.method.lower()
+    actions = getattr(func, 'actions', None) or {}
+    return f"{cls.__name__}.{actions.get(method, method)}"
+
+
+class RequestTimingMiddleware:
+    """
+    Measures every request: SQL queries and time, serializer time,
+    permission-check time and the total, keyed by view name. Each response
+    gets a ``Server-Timing`` header (unless ``SERVER_TIMING_HEADER`` is off),
+    each request one JSON line on the ``core.requests`` logger (``WARNING``
+    past ``REQUEST_SLOW_MS``, else ``INFO``), and the numbers feed
+    ``core.timing.request_stats``.
+
+    Works in both sync and async stacks. Phases overlap: queries run while
+    validating count toward both ``db`` and ``ser``. Streaming responses are
+    timed until their headers are ready.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        measured, token = timing.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.stop(token)
+        return self.finish(request, response, measured)
+
+    async def __acall__(self, request):
+        measured, token = timing.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timing.stop(token)
+        return self.finish(request, response, measured)
+
+    def finish(self, request, response, measured):
+        total = measured.elapsed()
+        view = view_name(request)
+        timing.request_stats.record(view, response.status_code, measured, total)
+        metrics.request_latency.observe(total, view, str(response.status_code))
+
+        if settings.SERVER_TIMING_HEADER:
+            queries = measured.queries
+            response['Server-Timing'] = ', '.join((
+                f'db;dur={measured.db * 1000:.3f};desc="{queries} quer{"y" if queries == 1 else "ies"}"',
+                f'ser;dur={measured.serializer * 1000:.3f}',
+                f'perm;dur={measured.permission * 1000:.3f}',
+                f'total;dur={total * 1000:.3f};desc="{view}"',
+            ))
+        slow = settings.REQUEST_SLOW_MS and total * 1000 >= settings.REQUEST_SLOW_MS
+        level = logging.WARNING if slow else logging.INFO
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'view': view,
+                'status': response.status_code,
+                'duration_ms': round(total * 1000, 3),
+                'queries': measured.queries,
+                'db_ms': round(measured.db * 1000, 3),
+                'serializer_ms': round(measured.serializer * 1000, 3),
+                'permission_ms': round(measured.permission * 1000, 3),
+            }))
+        return response
+
+
+def is_superadmin_token(raw):
+    """Whether ``raw`` (optionally ``Bearer``-prefixed) is a superadmin's valid access token."""
+    authentication = StatelessJWTAuthentication()
+    try:
+        token = authentication.get_validated_token(raw.removeprefix('Bearer ').strip().encode())
+        user = authentication.get_user(token)
+    except (AuthenticationFailed, TokenError):
+        return False
+    return bool(IsSuperadmin().has_permission(SimpleNamespace(user=user), None))
+
+
+class RequestProfilerMiddleware:
+    """
+    Profiles one request with cProfile when its ``X-Profile`` header holds a
+    superadmin's access token. The request itself runs as whoever its
+    ``Authorization`` header names, so a superadmin can profile a tenant's
+    slow endpoint through a tenant account. The capture is stored with
+    ``core.profiling.ProfileStore`` and its id returned in ``X-Profile-Id``,
+    for ``GET /api/ops/profiles/<id>/``.
+
+    Requests without the header only pay for the header lookup. One capture
+    runs at a time per process (``X-Profile-Id: busy`` otherwise); under
+    ASGI only the event-loop thread is profiled, so ORM work shows up as
+    time awaiting ``sync_to_async``.
+    """
+    sync_capable = True
+    async_capable = True
+    header = 'HTTP_X_PROFILE'
+    capturing = threading.Lock()
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if self.header not in request.META or not is_superadmin_token(request.META[self.header]):
+            return self.get_response(request)
+        if not self.capturing.acquire(blocking=False):
+            return self.busy(self.get_response(request))
+        try:
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            return self.save(request, response, profiler, started)
+        finally:
+            self.capturing.release()
+
+    async def __acall__(self, request):
+        if self.header not in request.META:
+            return await self.get_response(request)
+        # Tokens without RBAC claims fall back to a user lookup.
+        if not await sync_to_async(is_superadmin_token)(request.META[self.header]):
+            return await self.get_response(request)
+        if not self.capturing.acquire(blocking=False):
+            return self.busy(await self.get_response(request))
+        try:
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.disable()
+            return await sync_to_async(self.save)(request, response, profiler, started)
+        finally:
+            self.capturing.release()
+
+    def busy(self, response):
+        response['X-Profile-Id'] = 'busy'
+        return response
+
+    def save(self, request, response, profiler, started):
+        profile_id = ProfileStore.from_settings().save(profiler, {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': view_name(request),
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+            'created_at': timezone.now().isoformat(),
+        })
+        response['X-Profile-Id'] = str(profile_id)
+        return response
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.1 on 2026-10-18 08:37
+
+import core.ids
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("tenants", "0004_company_company_tenant_updated_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=core.ids.uuid7,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("model", models.CharField(max_length=100)),
+                ("object_id", models.UUIDField()),
+                ("company_id", models.UUIDField(blank=True, null=True)),
+                ("customer_id", models.UUIDField(blank=True, null=True)),
+                ("deleted_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="tenants.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["tenant", "model", "deleted_at", "id"],
+                        name="tombstone_feed_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,3 +1,22 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from core import metrics
+from core.cache import response_cache
+
+
+def visibility_scope(view, request):
+    """What decides which rows ``request`` sees: the tenant and ``row_policy.scope()`` (or the role)."""
+    user = request.user
+    policy = getattr(view, 'row_policy', None)
+    scope = policy.scope(user) if policy is not None else (getattr(user, 'role', None),)
+    return (getattr(user, 'tenant_id', None), *scope)
+
+
 class TenantScopedMixin:
     """
     Mixin to scope querysets to the requesting user's tenant.
@@ -9,5 +28,175 @@ class TenantScopedMixin:
         if user.is_superuser:
             return queryset
         if user.tenant_id:
-            return queryset.filter(tenant=user.tenant)
+            return queryset.filter(tenant_id=user.tenant_id)
         return queryset.none()
+
+
+class RowPolicyMixin:
+    """
+    Narrows the queryset to the rows ``row_policy`` (a
+    ``core.policies.RowPolicy``) grants the requesting user's role, on top
+    of ``TenantScopedMixin``'s tenant scope.
+    """
+    row_policy = None
+
+    def get_queryset(self):
+        return self.row_policy.filter(super().get_queryset(), self.request.user)
+
+
+class DynamicFieldsQuerysetMixin:
+    """
+    Shapes safe-method querysets for serializers using
+    ``core.serializers.DynamicFieldsMixin``: expanded relations are joined
+    with ``select_related`` (no N+1), and a sparse ``?fields=`` defers the
+    columns that are not rendered. The primary key, ``created_at`` (the
+    pagination key) and foreign key ids, which scoping and permission checks
+    read, are always loaded.
+    """
+    always_loaded_fields = ('created_at',)
+
+    def get_queryset(self):
+        return self.shape_queryset(super().get_queryset())
+
+    def shape_queryset(self, queryset):
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        serializer_class = self.get_serializer_class()
+        if not hasattr(serializer_class, 'requested'):
+            return queryset
+
+        wanted, expand = serializer_class.requested(self.request)
+        if expand:
+            queryset = queryset.select_related(*sorted(expand))
+        if wanted is not None:
+            opts = queryset.model._meta
+            load = {opts.pk.name, *self.always_loaded_fields}
+            for field in opts.concrete_fields:
+                if field.is_relation or field.name in wanted:
+                    load.add(field.name)
+            queryset = queryset.only(*sorted(load))
+        return queryset
+
+
+class ConditionalGetMixin:
+    """
+    ETag validation for reads: a client that sends back the ``ETag`` it
+    got gets ``304 Not Modified`` while nothing changed, and the payload
+    is not serialized.
+
+    A detail ETag covers the row's id and ``updated_at`` (and those of
+    ``?expand=``-ed relations) and comes with ``Last-Modified``. A list
+    ETag covers the same for every row of the fetched page, its links and
+    the tenant's ``response_cache`` generation, which any write to the
+    tenant moves on; nothing is counted. Both also cover what the
+    requester may see (``visibility_scope``), the query string and the
+    response format, which shape the body. Lists send no
+    ``Last-Modified``: a deletion changes the page but not the newest
+    timestamp.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+        expanded = self.expanded_relations(request)
+        stamps = [
+            (row.pk, row.updated_at, *(getattr(getattr(row, name), 'updated_at', None) for name in expanded))
+            for row in rows
+        ]
+        links = () if page is None else (self.paginator.get_next_link(), self.paginator.get_previous_link())
+        tenant_id = getattr(request.user, 'tenant_id', None)
+        generation = response_cache.generation(tenant_id) if tenant_id else None
+        etag = self.etag(request, 'list', generation, stamps, *links)
+        not_modified = self.not_modified(request, etag)
+        if not_modified:
+            return not_modified
+        data = self.get_serializer(rows, many=True).data
+        response = Response(data) if page is None else self.get_paginated_response(data)
+        return self.with_validators(response, etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        stamps = [instance.updated_at]
+        for name in self.expanded_relations(request):
+            related = getattr(instance, name)
+            if related is not None:
+                stamps.append(related.updated_at)
+        etag = self.etag(request, 'detail', instance.pk, *stamps)
+        last_modified = int(max(stamps).timestamp())
+        not_modified = self.not_modified(request, etag, last_modified)
+        if not_modified:
+            return not_modified
+        response = Response(self.get_serializer(instance).data)
+        response['Last-Modified'] = http_date(last_modified)
+        return self.with_validators(response, etag)
+
+    def expanded_relations(self, request):
+        """``?expand=`` relations whose models carry ``updated_at``."""
+        serializer_class = self.get_serializer_class()
+        if not hasattr(serializer_class, 'requested'):
+            return []
+        opts = serializer_class.Meta.model._meta
+        return sorted(
+            name for name in serializer_class.requested(request)[1]
+            if any(field.name == 'updated_at' for field in opts.get_field(name).related_model._meta.concrete_fields)
+        )
+
+    def etag(self, request, kind, *parts):
+        key = repr((
+            type(self).__name__, kind, visibility_scope(self, request), request.get_full_path(),
+            request.accepted_renderer.format, *parts,
+        ))
+        return quote_etag(hashlib.md5(key.encode(), usedforsecurity=False).hexdigest())
+
+    def not_modified(self, request, etag, last_modified=None):
+        """A ``304`` (or ``412``) response if the request's validators match, else None."""
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            response['ETag'] = etag
+        return response
+
+    def with_validators(self, response, etag):
+        if response.status_code == 200:
+            response['ETag'] = etag
+        return response
+
+
+class CachedListMixin:
+    """
+    Serves ``list`` from ``core.cache.response_cache`` for tenant users: a
+    hit skips the ORM and the serializer (only rendering is left). Entries
+    are keyed by tenant and its generation, the endpoint, what the user
+    may see (``visibility_scope``), the query string, host and response
+    format. Authentication, permissions and throttles still run first.
+    Put it before ``ConditionalGetMixin`` so a hit answers
+    ``If-None-Match`` from the stored ``ETag``.
+    """
+
+    def list(self, request, *args, **kwargs):
+        tenant_id = getattr(request.user, 'tenant_id', None)
+        if tenant_id is None:
+            return super().list(request, *args, **kwargs)
+        variant = (request.get_host(), sorted(request.query_params.lists()), request.accepted_renderer.format)
+        endpoint = type(self).__name__
+        key = response_cache.key(tenant_id, endpoint, visibility_scope(self, request), variant)
+
+        cached = response_cache.get(key)
+        if cached is not None:
+            metrics.response_cache_lookups.inc(endpoint, 'hit')
+            etag, data = cached
+            if etag:
+                not_modified = get_conditional_response(request, etag=etag)
+                if not_modified is not None:
+                    not_modified['ETag'] = etag
+                    return not_modified
+            response = Response(data)
+            if etag:
+                response['ETag'] = etag
+            return response
+
+        metrics.response_cache_lookups.inc(endpoint, 'miss')
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200 and isinstance(response, Response):
+            response_cache.set(key, (response.get('ETag'), response.data))
+        return response
@@ -1,3 +1,58 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+from core.ids import uuid7
+
+
+def prevalidated_relations(instance, related):
+    """
+    Names of ``instance``'s foreign keys whose target is already in memory,
+    either loaded on the instance or supplied by the caller in ``related``.
+
+    ``full_clean()`` normally issues one existence query per foreign key;
+    for these the in-memory object is proof enough and the database FK
+    constraint remains the final guard.
+    """
+    return [
+        field.name for field in instance._meta.concrete_fields
+        if isinstance(field, models.ForeignKey)
+        and (field.name in related or field.is_cached(instance))
+    ]
+
+
+def related_for_validation(instance, name):
+    """
+    ``instance``'s related object ``name`` for ``clean()``, preferring one
+    the caller passed to ``save(related=...)``.
+    """
+    related = getattr(instance, '_validation_related', {})
+    if name in related:
+        return related[name]
+    return getattr(instance, name)
+
+
+class Tombstone(models.Model):
+    """
+    A deleted row, kept so change feeds (``core.changes``) can report the
+    deletion. ``company_id`` and ``customer_id`` copy the columns row
+    policies filter on, so a deletion is reported only to those who could
+    see the row. Pruned after ``CHANGE_FEED_RETENTION_DAYS``.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    tenant = models.ForeignKey('tenants.Tenant', on_delete=models.CASCADE, related_name='+')
+    model = models.CharField(max_length=100)   # app_label.model_name
+    object_id = models.UUIDField()
+    company_id = models.UUIDField(null=True, blank=True)
+    customer_id = models.UUIDField(null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'model', 'deleted_at', 'id'], name='tombstone_feed_idx'),
+        ]
+
+    @classmethod
+    def record(cls, instance, tenant_id, **columns):
+        return cls.objects.create(
+            tenant_id=tenant_id, model=instance._meta.label_lower, object_id=instance.pk, **columns,
+        )
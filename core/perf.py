@@ -0,0 +1,169 @@
+"""
+Helpers for the per-route query-budget tests in each app's ``tests.py``.
+
+``QueryBudgetTestCase`` seeds a few tenants of realistic size once per
+class (with ``core.seeding``) and asserts, per request, a ceiling on SQL
+queries and wall time. Lists return dozens of rows, so any per-row query
+blows the budget.
+"""
+import logging
+import os
+import time
+
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from accounts.tokens import TenantRefreshToken
+from core.cache import _registry as model_caches
+from core.seeding import TenantSeeder
+from products.models import Product
+from tenants.models import Company
+
+PASSWORD = 'Budget-pass-123!'
+ROLES = ('ADMIN', 'MANAGER', 'STAFF', 'CUSTOMER')
+
+# Wall-time ceilings are multiplied by this, for slow CI machines.
+TIME_FACTOR = float(os.environ.get('PERF_TIME_FACTOR', '1'))
+
+
+def quiet_request_logs(testcase):
+    """Silence per-request logging (expected 4xx, timing lines) for one test."""
+    for name in ('django.request', 'core.requests'):
+        logger = logging.getLogger(name)
+        testcase.addCleanup(setattr, logger, 'disabled', logger.disabled)
+        logger.disabled = True
+
+
+class SeededTenant:
+    """One seeded tenant and the users the budget tests act as."""
+
+    def __init__(self, tenant):
+        self.tenant = tenant
+        self.companies = list(Company.objects.filter(tenant=tenant).order_by('name'))
+        users = User.objects.filter(tenant=tenant).order_by('email')
+        staff = users.filter(role='STAFF', company=self.companies[0]).first()
+        # The customer owning the most products of the staff member's company.
+        top_customer = (
+            Product.objects.filter(company=staff.company_id, customer__isnull=False)
+            .values('customer').annotate(owned=Count('id')).order_by('-owned', 'customer')
+            .values_list('customer', flat=True).first()
+        )
+        self.users = {         # role -> the user each role's requests run as
+            'ADMIN': users.get(role='ADMIN'),
+            'MANAGER': users.get(role='MANAGER'),
+            'STAFF': staff,
+            'CUSTOMER': users.get(pk=top_customer),
+        }
+        self.customers = list(users.filter(role='CUSTOMER'))
+        self.products = list(Product.objects.filter(tenant=tenant).order_by('created_at', 'id'))
+
+    @property
+    def owned_products(self):
+        """Products every role may act on: in the staff company, claimed by the customer."""
+        return [
+            product for product in self.products
+            if product.company_id == self.users['STAFF'].company_id
+            and product.customer_id == self.users['CUSTOMER'].id
+        ]
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class QueryBudgetTestCase(TestCase):
+    """
+    Base class for route budget tests. ``self.seeded`` is the tenant every
+    request runs in; the others only make the tables realistically shared.
+    """
+    tenant_count = 3
+    max_ms = 250
+
+    @classmethod
+    def setUpTestData(cls):
+        # Per tenant: 2 companies x 30 staff x 4 products, 80 customers.
+        seeder = TenantSeeder(
+            companies=2, staff=30, products=4, customers=80, invitations=12, claimed=0.5,
+            password=PASSWORD, chunk_size=500, domain='budget.test',
+        )
+        tenants = [seeder.seed_tenant(index) for index in range(cls.tenant_count)]
+        cls.seeded = SeededTenant(tenants[0])
+        cls.superadmin = User.objects.create_superuser(email='root@budget.test', password=PASSWORD)
+
+    def setUp(self):
+        self.reset_caches()
+        quiet_request_logs(self)
+
+    def reset_caches(self):
+        """Budgets are for the cold path: no cached rows, no throttle history."""
+        for cache in caches.all():
+            cache.clear()
+        for model_cache in model_caches.values():
+            model_cache.clear_local()
+
+    def client_for(self, role):
+        """API client authenticated as ``role`` ('SUPERADMIN', a ROLES entry or None)."""
+        client = APIClient()
+        if role is None:
+            return client
+        user = self.superadmin if role == 'SUPERADMIN' else self.seeded.users[role]
+        access = TenantRefreshToken.for_user(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        return client
+
+    def assertBudget(self, role, method, path, queries, status=200, data=None, max_ms=None, client=None,
+                     headers=None):
+        """
+        Request ``path`` as ``role`` and check status, query count and wall
+        time. Pass ``client`` to use another client (e.g. a session login),
+        ``headers`` for extra request headers (``HTTP_IF_NONE_MATCH=...``).
+        """
+        headers = headers or {}
+        client = client or self.client_for(role)
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            if isinstance(client, APIClient):
+                response = getattr(client, method.lower())(path, data, format='json', **headers)
+            else:
+                response = getattr(client, method.lower())(path, data, **headers)
+            elapsed = (time.perf_counter() - start) * 1000
+        label = f"{method} {path} as {role or 'anonymous'}"
+        self.assertEqual(
+            response.status_code, status,
+            f"{label}: expected {status}, got {response.status_code}: {response.content[:300]!r}",
+        )
+        executed = [query['sql'] for query in captured.captured_queries]
+        self.assertLessEqual(
+            len(executed), queries,
+            f"{label}: {len(executed)} queries over a budget of {queries}:\n" + "\n".join(executed),
+        )
+        ceiling = (max_ms or self.max_ms) * TIME_FACTOR
+        self.assertLessEqual(elapsed, ceiling, f"{label}: {elapsed:.0f} ms over a ceiling of {ceiling:.0f} ms")
+        return response
+
+    def assertBudgets(self, method, path, budgets, data=None, max_ms=None):
+        """
+        ``budgets`` maps role -> (status, queries). ``path`` and ``data`` may be
+        callables of the role, for requests that must not reuse a row.
+        """
+        for role, (status, queries) in budgets.items():
+            with self.subTest(role=role):
+                self.assertBudget(
+                    role, method, path(role) if callable(path) else path, queries, status=status,
+                    data=data(role) if callable(data) else data, max_ms=max_ms,
+                )
+
+    def assertPlan(self, role, path, index):
+        """
+        The last query ``path`` runs as ``role`` (the page) reads ``index``
+        and needs no sort step.
+        """
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.client_for(role).get(path).status_code, 200)
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + captured.captured_queries[-1]['sql'])
+            plan = '\n'.join(row[-1] for row in cursor.fetchall())
+        self.assertIn(f'USING INDEX {index}', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
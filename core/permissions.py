@@ -1,65 +1,55 @@
 from rest_framework import permissions
 
+from accounts.authentication import MetricsTokenAuthentication
+from core.rbac import SUPERADMIN, action_of, policy, role_of
 
-class IsSuperadmin(permissions.BasePermission):
-    """Allows access only to platform superadmin (no role, is_superuser=True)."""
+
+class HasRolePermission(permissions.BasePermission):
+    """
+    Looks the request up in the compiled RBAC table (``core.rbac``) by the
+    user's role, the view's ``rbac_view`` and the action. Views without an
+    entry deny everyone.
+    """
     def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and request.user.is_superuser
-            and not request.user.role
-        )
+        return policy.allows(role_of(request.user), view.rbac_view, action_of(request, view))
 
 
-class IsTenantAdmin(permissions.BasePermission):
-    """Allows access to tenant-level admins."""
+class RoleIn(permissions.BasePermission):
+    """Allows users whose RBAC role is one of ``roles``, whatever the view."""
+    roles = frozenset()
+
     def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and request.user.role == 'ADMIN'
-        )
+        return role_of(request.user) in self.roles
+
 
+class IsSuperadmin(RoleIn):
+    """Allows access only to platform superadmin (no role, is_superuser=True)."""
+    roles = frozenset({SUPERADMIN})
+
+
+class IsTenantAdmin(RoleIn):
+    """Allows access to tenant-level admins."""
+    roles = frozenset({'ADMIN'})
 
-class IsManager(permissions.BasePermission):
+
+class IsManager(RoleIn):
     """Allows access to managers."""
-    def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and request.user.role == 'MANAGER'
-        )
+    roles = frozenset({'MANAGER'})
 
 
-class IsAdminOrManager(permissions.BasePermission):
+class IsAdminOrManager(RoleIn):
     """Allows access to admins or managers."""
-    def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and request.user.role in ('ADMIN', 'MANAGER')
-        )
+    roles = frozenset({'ADMIN', 'MANAGER'})
 
 
-class IsStaff(permissions.BasePermission):
+class IsStaff(RoleIn):
     """Allows access to staff."""
-    def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and request.user.role == 'STAFF'
-        )
+    roles = frozenset({'STAFF'})
 
 
-class IsCustomer(permissions.BasePermission):
+class IsCustomer(RoleIn):
     """Allows access to customers."""
-    def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and request.user.role == 'CUSTOMER'
-        )
+    roles = frozenset({'CUSTOMER'})
 
 
 class IsReadOnly(permissions.BasePermission):
@@ -68,17 +58,7 @@ class IsReadOnly(permissions.BasePermission):
         return request.method in permissions.SAFE_METHODS
 
 
-class IsStaffInSameCompany(permissions.BasePermission):
-    """Object-level: allows staff access only if object belongs to their company."""
-    def has_object_permission(self, request, view, obj):
-        if request.user.role != 'STAFF':
-            return False
-        return obj.company == request.user.company
-
-
-class IsCustomerOwner(permissions.BasePermission):
-    """Object-level: allows customer access only if they own the object."""
-    def has_object_permission(self, request, view, obj):
-        if request.user.role != 'CUSTOMER':
-            return False
-        return obj.customer == request.user
+class IsMetricsScraper(permissions.BasePermission):
+    """Allows requests authenticated with the static ``METRICS_TOKEN``."""
+    def has_permission(self, request, view):
+        return request.auth == MetricsTokenAuthentication.METRICS_SCRAPER
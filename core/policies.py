@@ -0,0 +1,44 @@
+"""
+Row-level visibility per role, applied in SQL.
+
+A ``RowPolicy`` maps each role to the rows it may reach, declared as
+lookups on the model whose values are read from the requesting user; a
+view filters its queryset with it (``core.mixins.RowPolicyMixin``). List,
+detail, update and delete then resolve visibility in the same indexed
+query that loads the rows, so an out-of-scope id is a plain 404 and no
+object is fetched just to be refused.
+"""
+from django.db.models import Q
+
+ALL = {}  # no restriction beyond the tenant scope
+
+
+class RowPolicy:
+    """
+    ``RowPolicy(STAFF={'company_id': 'company_id'}, ...)``: the rows a
+    staff member sees are those whose ``company_id`` equals the user's
+    ``company_id``. ``ALL`` grants every row of the tenant; roles that are
+    not listed, and users without a role, see nothing.
+    """
+
+    def __init__(self, **rules):
+        self.rules = rules
+
+    def q(self, user):
+        """The role's ``Q`` for ``user``, or None if it may see no rows."""
+        lookups = self.rules.get(getattr(user, 'role', None))
+        if lookups is None:
+            return None
+        return Q(**{lookup: getattr(user, attribute) for lookup, attribute in lookups.items()})
+
+    def scope(self, user):
+        """What the role's rows depend on: the role and the user attributes it reads."""
+        role = getattr(user, 'role', None)
+        return (role, *(getattr(user, attribute) for attribute in self.rules.get(role, {}).values()))
+
+    def filter(self, queryset, user):
+        condition = self.q(user)
+        if condition is None:
+            return queryset.none()
+        return queryset.filter(condition) if condition else queryset
+
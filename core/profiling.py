@@ -0,0 +1,81 @@
+"""
+On-demand cProfile captures of single requests (``RequestProfilerMiddleware``).
+
+Each capture is stored in ``PROFILE_DIR`` as ``<id>.prof`` (a ``pstats``
+dump, readable by snakeviz or ``python -m pstats``) next to ``<id>.json``
+describing the request. Captures older than ``PROFILE_RETENTION`` seconds
+are deleted, then the oldest ones until the directory holds at most
+``PROFILE_MAX_BYTES``.
+"""
+import io
+import json
+import pstats
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+
+SORT_KEYS = ('cumulative', 'tottime', 'calls')
+
+
+class ProfileStore:
+
+    def __init__(self, directory, max_bytes, retention):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.retention = retention
+
+    @classmethod
+    def from_settings(cls):
+        return cls(settings.PROFILE_DIR, settings.PROFILE_MAX_BYTES, settings.PROFILE_RETENTION)
+
+    def save(self, profiler, meta):
+        """Store a finished ``cProfile.Profile``; returns its id."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile_id = uuid.uuid4()
+        profiler.dump_stats(self.directory / f"{profile_id.hex}.prof")
+        (self.directory / f"{profile_id.hex}.json").write_text(json.dumps(meta))
+        self.prune()
+        return profile_id
+
+    def meta(self, profile_id):
+        """The capture's request description, or None if it is gone."""
+        path = self.directory / f"{profile_id.hex}.json"
+        try:
+            if path.stat().st_mtime < time.time() - self.retention:
+                return None
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def dump(self, profile_id):
+        return (self.directory / f"{profile_id.hex}.prof").read_bytes()
+
+    def report(self, profile_id, sort='cumulative', limit=40):
+        """``pstats`` table of the capture, heaviest ``limit`` functions first."""
+        stream = io.StringIO()
+        stats = pstats.Stats(str(self.directory / f"{profile_id.hex}.prof"), stream=stream)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def prune(self):
+        captures = {}   # id -> (oldest mtime, size of both files)
+        for suffix in ('.prof', '.json'):
+            for path in self.directory.glob(f'*{suffix}'):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue  # pruned concurrently
+                mtime, size = captures.get(path.stem, (stat.st_mtime, 0))
+                captures[path.stem] = (min(mtime, stat.st_mtime), size + stat.st_size)
+
+        expired = time.time() - self.retention
+        total = sum(size for _, size in captures.values())
+        for mtime, size, stem in sorted((mtime, size, stem) for stem, (mtime, size) in captures.items()):
+            if mtime >= expired and total <= self.max_bytes:
+                break
+            # The description first, so meta() stops finding the capture before its dump goes.
+            for suffix in ('.json', '.prof'):
+                (self.directory / f"{stem}{suffix}").unlink(missing_ok=True)
+            total -= size
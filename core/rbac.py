@@ -0,0 +1,141 @@
+"""
+Who may call what, as one table.
+
+``POLICY`` lists, for every protected view (named by its ``rbac_view``
+attribute), the roles allowed per action: the viewset action (``list``,
+``partial_update``, ``bulk``, ...) or, for plain API views, the lowercase
+HTTP method. ``'*'`` covers the actions a view does not list. At import
+it is compiled into a flat ``{(role, view, action): allowed}`` dictionary,
+so ``core.permissions.HasRolePermission`` costs one role lookup and one or
+two dictionary probes per request. Anything not granted is denied,
+including views missing from the table.
+
+Which rows a permitted request reaches is a separate concern
+(``core.policies``).
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+SUPERADMIN = 'SUPERADMIN'   # is_superuser without a tenant role
+ROLES = (SUPERADMIN, 'ADMIN', 'MANAGER', 'STAFF', 'CUSTOMER')
+ANY = '*'
+
+TENANT_ROLES = ('ADMIN', 'MANAGER', 'STAFF', 'CUSTOMER')
+ADMIN_OR_MANAGER = ('ADMIN', 'MANAGER')
+
+POLICY = {
+    # tenants
+    'tenants.me': {ANY: ADMIN_OR_MANAGER, 'put': ('ADMIN',), 'patch': ('ADMIN',)},
+    'tenants.companies': {ANY: ADMIN_OR_MANAGER},
+    # accounts
+    'accounts.staff': {ANY: ADMIN_OR_MANAGER},
+    'accounts.customers': {ANY: ('ADMIN',)},
+    'accounts.customer_products': {ANY: ('ADMIN',)},
+    'accounts.users_export': {ANY: ('ADMIN',)},
+    # invitations
+    'invitations.bootstrap_admin': {ANY: (SUPERADMIN,)},
+    'invitations.manager': {ANY: ('ADMIN',)},
+    # products: reads, updates and deletes are narrowed to rows by the row
+    # policy. Admins and managers may edit and delete, and customers delete
+    # the products they claimed (the '*' default), as before the table.
+    'products.products': {
+        ANY: (SUPERADMIN, *TENANT_ROLES),
+        'create': ('STAFF',),
+        'bulk': ('STAFF',),
+        'import_file': ('STAFF',),
+        'export': ('ADMIN', 'MANAGER'),
+        'update': ('ADMIN', 'MANAGER', 'STAFF'),
+        'partial_update': ('ADMIN', 'MANAGER', 'STAFF'),
+    },
+    # operations
+    'ops.request_timings': {ANY: (SUPERADMIN,)},
+    'ops.metrics': {ANY: (SUPERADMIN,)},
+    'ops.profiles': {ANY: (SUPERADMIN,)},
+    'ops.rbac': {ANY: (SUPERADMIN,)},
+}
+
+
+def role_of(user):
+    """The RBAC role of a request user: a tenant role, SUPERADMIN, or None."""
+    if user is None or not user.is_authenticated:
+        return None
+    role = user.role
+    if not role and user.is_superuser:
+        return SUPERADMIN
+    return role
+
+
+def action_of(request, view):
+    return getattr(view, 'action', None) or request.method.lower()
+
+
+class CompiledPolicy:
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.table = {}
+        for view, actions in policy.items():
+            if ANY not in actions:
+                raise ImproperlyConfigured(f"RBAC policy for {view!r} has no {ANY!r} entry.")
+            for action, allowed in actions.items():
+                unknown = set(allowed) - set(ROLES)
+                if unknown:
+                    raise ImproperlyConfigured(f"RBAC policy for {view!r} names unknown roles {sorted(unknown)}.")
+                for role in ROLES:
+                    self.table[(role, view, action)] = role in allowed
+
+    def allows(self, role, view, action):
+        allowed = self.table.get((role, view, action))
+        if allowed is None:
+            allowed = self.table.get((role, view, ANY), False)
+        return allowed
+
+    def roles(self, view, action):
+        """Roles allowed to run ``action`` on ``view``."""
+        return [role for role in ROLES if self.allows(role, view, action)]
+
+
+policy = CompiledPolicy(POLICY)
+
+
+# ---------------------------------------------------------------- introspection
+
+def routed_views(patterns=None, prefix='/'):
+    """
+    ``{rbac_view: {'path': ..., 'cls': ..., 'actions': [...]}}`` for every
+    routed view class that names an ``rbac_view``, with the actions its
+    routes can dispatch.
+    """
+    from django.urls import URLPattern, get_resolver
+
+    found = {}
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        route = prefix + str(pattern.pattern).lstrip('^').rstrip('$')
+        if not isinstance(pattern, URLPattern):
+            for name, entry in routed_views(pattern.url_patterns, route).items():
+                found.setdefault(name, entry)
+            continue
+        callback = pattern.callback
+        cls = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+        name = getattr(cls, 'rbac_view', None)
+        if name is None:
+            continue
+        mapping = getattr(callback, 'actions', None)
+        if mapping:
+            actions = [action for method, action in mapping.items() if method in cls.http_method_names]
+        else:
+            actions = [m for m in cls.http_method_names if m not in ('head', 'options') and hasattr(cls, m)]
+        entry = found.setdefault(name, {'path': route, 'cls': cls, 'actions': []})
+        entry['actions'] = list(dict.fromkeys([*entry['actions'], *actions]))
+    return found
+
+
+def matrix():
+    """Roles allowed per routed view and action, as served by ``/api/ops/rbac/``."""
+    return {
+        name: {
+            'path': entry['path'],
+            'view': entry['cls'].__name__,
+            'actions': {action: policy.roles(name, action) for action in entry['actions']},
+        }
+        for name, entry in sorted(routed_views().items())
+    }
@@ -0,0 +1,179 @@
+"""
+Deterministic bulk generator for multi-tenant data, used by the
+``seed_tenants`` command and the query-budget tests.
+"""
+import base64
+import random
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import reset_queries, transaction
+from django.utils import timezone
+
+from accounts.models import User
+from core.ids import uuid7
+from invitations.models import Invitation
+from products import search
+from products.models import Product
+from tenants.models import Tenant, Company
+
+ADJECTIVES = (
+    'compact', 'durable', 'wireless', 'organic', 'premium', 'portable', 'smart',
+    'vintage', 'modular', 'heavy-duty', 'eco', 'classic', 'ergonomic', 'solar',
+)
+NOUNS = (
+    'lamp', 'kettle', 'backpack', 'speaker', 'chair', 'router', 'blender',
+    'jacket', 'monitor', 'drill', 'tent', 'watch', 'keyboard', 'bottle',
+)
+WORDS = ADJECTIVES + NOUNS + (
+    'with', 'and', 'for', 'steel', 'cotton', 'battery', 'warranty', 'travel',
+    'office', 'kitchen', 'outdoor', 'charging', 'recycled', 'adjustable',
+)
+
+# Seeded ids are UUIDv7 with made-up timestamps: tenant ``i`` counts one
+# millisecond per id from SEED_EPOCH_MS + i * TENANT_SPAN_MS (2024-01-01
+# plus ~11.6 days per tenant), so they stay time-ordered and reproducible.
+SEED_EPOCH_MS = 1_704_067_200_000
+TENANT_SPAN_MS = 10 ** 9
+
+
+class TenantSeeder:
+    """
+    Writes tenants with their companies, staff, customers, products and
+    invitations straight through ``bulk_create`` in chunks, bypassing
+    ``save()``/``full_clean()`` (the database constraints still check every
+    row) and sharing one password hash. Products are added to the search
+    index chunk by chunk.
+
+    Ids, tokens, names and claims come from a random generator seeded with
+    ``(seed, tenant index)``: the same arguments always produce the same
+    rows (only timestamps follow the clock), and tenants can be added later
+    with a higher ``start`` index. Emails are unique per seed too: the
+    default ``domain`` is ``seed<seed>.test``. Memory is bounded by one tenant's user ids
+    plus one chunk, however many rows are written.
+    """
+
+    def __init__(self, seed=0, companies=5, staff=10, products=100, customers=200,
+                 invitations=20, claimed=0.3, password=None, chunk_size=1000, domain=None):
+        self.seed = seed
+        self.companies = companies
+        self.staff = staff                # per company
+        self.products = products          # per staff member
+        self.customers = customers        # per tenant
+        self.invitations = invitations    # per tenant
+        self.claimed = claimed            # share of products with a customer
+        self.chunk_size = chunk_size
+        self.domain = domain or f'seed{seed}.test'
+        self.password_hash = make_password(password)
+        self.counts = Counter()
+
+    def rng(self, index):
+        rng = random.Random(f"{self.seed}:{index}")
+        rng.clock = SEED_EPOCH_MS + index * TENANT_SPAN_MS
+        return rng
+
+    @staticmethod
+    def uuid(rng):
+        rng.clock += 1
+        return uuid7(ms=rng.clock, rand=rng.getrandbits(74))
+
+    @staticmethod
+    def token(rng):
+        # Same shape as secrets.token_urlsafe(48).
+        return base64.urlsafe_b64encode(rng.randbytes(48)).decode().rstrip('=')
+
+    def tenant_id(self, index):
+        """Primary key tenant ``index`` gets; the tenant's first draw."""
+        return self.uuid(self.rng(index))
+
+    def seed_tenants(self, count, start=0, progress=None):
+        """Seed tenants ``start .. start + count - 1``; ``progress(index, counts)`` after each."""
+        for index in range(start, start + count):
+            self.seed_tenant(index)
+            if progress:
+                progress(index, self.counts)
+        return self.counts
+
+    def seed_tenant(self, index):
+        rng = self.rng(index)
+        with transaction.atomic():
+            tenant = Tenant(id=self.uuid(rng), name=f"Seed tenant {index}")
+            self.write(Tenant, [tenant])
+
+            companies = [
+                Company(id=self.uuid(rng), tenant=tenant, name=f"Seed company {index}.{c}")
+                for c in range(self.companies)
+            ]
+            self.write(Company, companies)
+
+            staff = {
+                company.id: [self.uuid(rng) for _ in range(self.staff)] for company in companies
+            }
+            customers = [self.uuid(rng) for _ in range(self.customers)]
+            self.write(User, self.users(rng, index, tenant, staff, customers))
+            self.write(Product, self.product_rows(rng, index, tenant, staff, customers))
+            self.write(Invitation, self.invitation_rows(rng, index, tenant))
+        return tenant
+
+    def users(self, rng, index, tenant, staff, customers):
+        def user(pk, email, role, company_id=None):
+            return User(
+                id=pk, email=email, password=self.password_hash, role=role,
+                tenant=tenant, company_id=company_id,
+            )
+
+        yield user(self.uuid(rng), f"admin.{index}@{self.domain}", 'ADMIN')
+        yield user(self.uuid(rng), f"manager.{index}@{self.domain}", 'MANAGER')
+        for c, (company_id, members) in enumerate(staff.items()):
+            for s, pk in enumerate(members):
+                yield user(pk, f"staff.{index}.{c}.{s}@{self.domain}", 'STAFF', company_id)
+        for c, pk in enumerate(customers):
+            yield user(pk, f"customer.{index}.{c}@{self.domain}", 'CUSTOMER')
+
+    def product_rows(self, rng, index, tenant, staff, customers):
+        number = 0
+        for company_id, members in staff.items():
+            for creator_id in members:
+                for _ in range(self.products):
+                    customer_id = None
+                    if customers and rng.random() < self.claimed:
+                        # Skewed: a few customers own most claimed products.
+                        customer_id = customers[int(len(customers) * rng.random() ** 3)]
+                    yield Product(
+                        id=self.uuid(rng), tenant=tenant, company_id=company_id,
+                        created_by_id=creator_id, customer_id=customer_id,
+                        name=f"{rng.choice(ADJECTIVES).title()} {rng.choice(NOUNS)} {index}.{number}",
+                        description=' '.join(rng.choices(WORDS, k=rng.randint(8, 40))),
+                        share_token=self.token(rng),
+                    )
+                    number += 1
+
+    def invitation_rows(self, rng, index, tenant):
+        now = timezone.now()
+        for i in range(self.invitations):
+            state = i % 3  # pending, used, expired
+            yield Invitation(
+                id=self.uuid(rng), email=f"invitee.{index}.{i}@{self.domain}", role='MANAGER',
+                tenant=tenant, token=self.token(rng),
+                expires_at=now + timedelta(hours=-1 if state == 2 else 48),
+                used_at=now if state == 1 else None,
+            )
+
+    def write(self, model, rows):
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                self.flush(model, chunk)
+                chunk = []
+        if chunk:
+            self.flush(model, chunk)
+
+    def flush(self, model, chunk):
+        model.objects.bulk_create(chunk, batch_size=self.chunk_size)
+        if model is Product:
+            search.backend().index(chunk, created=True)
+        self.counts[model.__name__] += len(chunk)
+        # With DEBUG on, Django keeps the SQL of every query; drop it.
+        reset_queries()
@@ -0,0 +1,50 @@
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+
+
+def query_param_set(request, name):
+    """Comma-separated query parameter as a set, or None when absent/empty."""
+    value = request.query_params.get(name) if request is not None else None
+    if not value:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+class DynamicFieldsMixin:
+    """
+    ModelSerializer mixin for sparse fieldsets and inline expansion on reads.
+
+    ``?fields=id,name`` keeps only the listed fields; ``?expand=company``
+    replaces the primary key of a relation listed in
+    ``Meta.expandable_fields`` (name -> dotted serializer path) with the
+    nested object. Unknown names are ignored. Writes always use the full
+    field set. Pair with ``core.mixins.DynamicFieldsQuerysetMixin`` so the
+    queryset loads exactly what is rendered.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self._context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+
+        wanted, expand = self.requested(request)
+        if wanted is not None:
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+        for name in expand:
+            if name in self.fields:
+                nested = import_string(self.Meta.expandable_fields[name])
+                self.fields[name] = nested(read_only=True)
+
+    @classmethod
+    def requested(cls, request):
+        """``(fields, expand)`` asked for by ``request``; ``fields`` is None for all."""
+        wanted = query_param_set(request, cls.fields_query_param)
+        expand = query_param_set(request, cls.expand_query_param) or set()
+        expand &= set(getattr(cls.Meta, 'expandable_fields', {}))
+        if wanted is not None:
+            expand &= wanted
+        return wanted, expand
@@ -1,3 +1,524 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.http import StreamingHttpResponse
+from django.test import AsyncRequestFactory, Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core import rbac
+from core.exports import stream_chunks
+from core.ids import uuid7, uuid7_time
+from core.mixins import DynamicFieldsQuerysetMixin
+from core.perf import PASSWORD, ROLES, QueryBudgetTestCase
+from accounts.models import User
+from accounts.tokens import TenantRefreshToken
+from core.metrics import Registry, registry
+from core.profiling import ProfileStore
+from core.timing import request_stats
+from tenants.models import Tenant
+
+
+class AdminSiteBudgetTests(QueryBudgetTestCase):
+    """Query and wall-time budgets for the Django admin under /admin/."""
+
+    def session_client(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def test_index(self):
+        self.assertBudget('SUPERADMIN', 'GET', '/admin/', 3, client=self.session_client(self.superadmin))
+        for role in ROLES:
+            with self.subTest(role=role):
+                # API roles are not admin-site staff: straight to the login page.
+                client = self.session_client(self.seeded.users[role])
+                self.assertBudget(role, 'GET', '/admin/', 2, status=302, client=client)
+
+    def test_changelists(self):
+        # Session, user, count, page and list_filter choices; relations are joined.
+        budgets = {
+            'accounts/user': 6, 'tenants/tenant': 5, 'tenants/company': 6,
+            'products/product': 7, 'invitations/invitation': 6,
+        }
+        client = self.session_client(self.superadmin)
+        for model, queries in budgets.items():
+            with self.subTest(model=model):
+                self.assertBudget('SUPERADMIN', 'GET', f"/admin/{model}/", queries, client=client, max_ms=500)
+
+
+class BudgetHarnessTests(QueryBudgetTestCase):
+    """The budgets must actually catch a per-row query."""
+
+    def test_per_row_query_fails_the_budget(self):
+        path = '/api/products/?expand=company,customer'
+        self.assertBudget('ADMIN', 'GET', path, 2)
+
+        # Without select_related every row fetches its company and customer.
+        self.reset_caches()
+        with mock.patch.object(DynamicFieldsQuerysetMixin, 'shape_queryset', lambda self, queryset: queryset):
+            with self.assertRaisesRegex(AssertionError, r'queries over a budget of 2'):
+                self.assertBudget('ADMIN', 'GET', path, 2)
+
+
+class KeysetPaginationTests(QueryBudgetTestCase):
+    """Cursor walks over /api/products/ and malformed cursors."""
+
+    def walk(self, client, url, link):
+        pages = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data[link]
+        return pages
+
+    def test_next_and_previous_walk_every_row_once(self):
+        client = self.client_for('STAFF')
+        staff = self.seeded.users['STAFF']
+        expected = [
+            str(product.id) for product in sorted(
+                (product for product in self.seeded.products if product.company_id == staff.company_id),
+                key=lambda product: (product.created_at, product.id), reverse=True,
+            )
+        ]
+        forward = self.walk(client, '/api/products/?page_size=25', 'next')
+        self.assertEqual([len(page) for page in forward], [25] * (len(expected) // 25) + [len(expected) % 25])
+        self.assertEqual(sum(forward, []), expected)
+
+        # From the last page back to the first, page by page.
+        last = client.get('/api/products/?page_size=25')
+        while last.data['next']:
+            last = client.get(last.data['next'])
+        backward = self.walk(client, last.data['previous'], 'previous')
+        self.assertEqual(sum(reversed(backward), []), expected[:-len(forward[-1])])
+        self.assertIsNone(client.get('/api/products/?page_size=25').data['previous'])
+
+    def test_malformed_cursors_are_not_found(self):
+        def cursor(*position):
+            return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip('=')
+
+        for value in (cursor('2024-01-01T00:00:00Z', 'nope', 0), cursor('2024-01-01T00:00:00', str(uuid.uuid4()), 0),
+                      cursor('yesterday', str(uuid.uuid4()), 0), cursor('2024-01-01T00:00:00Z', None, 0),
+                      cursor([1, 2]), '%%%'):
+            with self.subTest(cursor=value):
+                self.assertBudget('ADMIN', 'GET', f'/api/products/?cursor={value}', 1, status=404)
+
+
+class RequestTimingTests(QueryBudgetTestCase):
+    """Server-Timing headers, rolling stats and the superadmin endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        request_stats.clear()
+
+    def test_server_timing_header(self):
+        response = self.assertBudget('ADMIN', 'GET', '/api/products/?expand=company', 1)
+        header = response['Server-Timing']
+        self.assertIn('db;dur=', header)
+        self.assertIn('desc="1 query"', header)
+        self.assertIn('ser;dur=', header)
+        self.assertIn('perm;dur=', header)
+        self.assertIn('desc="ProductViewSet.list"', header)
+
+    def test_only_slow_requests_are_logged(self):
+        logging.getLogger('core.requests').disabled = False   # quiet_request_logs() restores it
+        client = self.client_for('ADMIN')
+        with self.assertNoLogs('core.requests', 'WARNING'):
+            client.get('/api/products/')
+        with override_settings(REQUEST_SLOW_MS=0.001), self.assertLogs('core.requests', 'WARNING') as logs:
+            client.get('/api/products/')
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual((line['view'], line['status']), ('ProductViewSet.list', 200))
+
+    def test_async_view_queries_are_counted(self):
+        unclaimed = next(product for product in self.seeded.products if product.customer_id is None)
+        response = self.assertBudget(None, 'POST', '/api/public/products/claim/async/', 7, data={
+            'share_token': unclaimed.share_token, 'email': self.seeded.customers[5].email, 'password': PASSWORD,
+        })
+        self.assertIn('desc="AsyncProductClaimView.post"', response['Server-Timing'])
+        stats = request_stats.snapshot()['AsyncProductClaimView.post']
+        self.assertEqual(stats['count'], 1)
+        self.assertGreaterEqual(stats['mean_queries'], 3)
+
+    def test_rolling_stats(self):
+        for role in ROLES:
+            self.client_for(role).get('/api/products/')
+        self.client_for('CUSTOMER').post('/api/products/', {'name': 'Denied'}, format='json')
+
+        views = request_stats.snapshot()
+        self.assertEqual(views['ProductViewSet.list']['count'], 4)
+        self.assertEqual(views['ProductViewSet.list']['statuses'], {'2xx': 4})
+        self.assertEqual(views['ProductViewSet.create']['statuses'], {'4xx': 1})
+        self.assertEqual(sum(views['ProductViewSet.list']['buckets'].values()), 4)
+
+    def test_request_timings_endpoint(self):
+        self.assertBudgets('GET', '/api/ops/request-timings/?window=300', {
+            'SUPERADMIN': (200, 0), 'ADMIN': (403, 0), 'MANAGER': (403, 0), 'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+        })
+        response = self.client_for('SUPERADMIN').get('/api/ops/request-timings/')
+        self.assertEqual(response.data['window'], request_stats.window)
+        self.assertEqual(response.data['views']['RequestTimingsView.get']['statuses'], {'2xx': 1, '4xx': 4})
+
+
+class ResponseCacheTests(QueryBudgetTestCase):
+    """Tenant-versioned list caching (``core.cache.response_cache``)."""
+    paths = {
+        '/api/products/': 'ADMIN', '/api/companies/': 'MANAGER',
+        '/api/staff/': 'MANAGER', '/api/admin/customers/': 'ADMIN',
+    }
+
+    def test_hits_skip_the_database(self):
+        for path, role in self.paths.items():
+            with self.subTest(path=path):
+                first = self.client_for(role).get(f"{path}?page_size=5")
+                again = self.assertBudget(role, 'GET', f"{path}?page_size=5", 0)
+                self.assertEqual(again.json(), first.json())
+                self.assertBudget(role, 'GET', f"{path}?page_size=6", 2)  # other parameters, other entry
+
+    def misses(self):
+        return {
+            labels[0]: value for (name, labels), value in registry.collect().items()
+            if name == 'response_cache_lookups_total' and labels[1] == 'miss'
+        }
+
+    def test_writes_move_the_tenant_to_a_new_generation(self):
+        for path, role in self.paths.items():
+            self.client_for(role).get(path)
+        before = self.misses()
+        product = self.seeded.owned_products[0]
+        self.client_for('STAFF').patch(f"/api/products/{product.id}/", {'name': 'Renamed'}, format='json')
+        for path, role in self.paths.items():
+            self.client_for(role).get(path)
+        after = self.misses()
+        for view in ('ProductViewSet', 'CompanyViewSet', 'StaffListCreateView', 'AdminCustomerListView'):
+            self.assertEqual(after[view] - before[view], 1, view)
+        listed = self.client_for('STAFF').get('/api/products/?page_size=200').json()['results']
+        self.assertIn('Renamed', [item['name'] for item in listed])
+
+        # Bulk writes send no signals and bump the generation themselves.
+        self.client_for('STAFF').post('/api/products/bulk/', [{'name': 'Bulk new'}], format='json')
+        listed = self.client_for('STAFF').get('/api/products/?page_size=200').json()['results']
+        self.assertIn('Bulk new', [item['name'] for item in listed])
+
+    def test_scopes_do_not_share_entries(self):
+        customer = self.client_for('CUSTOMER').get('/api/products/').json()['results']
+        staff = self.client_for('STAFF').get('/api/products/').json()['results']
+        self.assertNotEqual(customer, staff)
+        self.assertTrue(all(item['customer'] == str(self.seeded.users['CUSTOMER'].id) for item in customer))
+
+
+class RbacTests(QueryBudgetTestCase):
+    """The compiled role/action table and /api/ops/rbac/."""
+
+    def test_rbac_endpoint(self):
+        self.assertBudgets('GET', '/api/ops/rbac/', {
+            'SUPERADMIN': (200, 0), 'ADMIN': (403, 0), 'MANAGER': (403, 0), 'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+        })
+        views = self.client_for('SUPERADMIN').get('/api/ops/rbac/').data['views']
+        self.assertEqual(views['products.products']['actions']['create'], ['STAFF'])
+        self.assertEqual(views['tenants.me']['actions'], {'get': ['ADMIN', 'MANAGER'], 'put': ['ADMIN'], 'patch': ['ADMIN']})
+        self.assertNotIn('destroy', views['tenants.companies']['actions'])  # PATCH-only viewset
+
+    def test_every_routed_view_has_a_policy(self):
+        for name, entry in rbac.routed_views().items():
+            with self.subTest(view=entry['cls'].__name__):
+                self.assertIn(name, rbac.POLICY)
+
+    def test_unlisted_views_and_roles_are_denied(self):
+        self.assertFalse(rbac.policy.allows('ADMIN', 'no.such.view', 'get'))
+        self.assertFalse(rbac.policy.allows(None, 'products.products', 'list'))
+        with self.assertRaises(ImproperlyConfigured):
+            rbac.CompiledPolicy({'products.products': {rbac.ANY: ('OWNER',)}})
+        with self.assertRaises(ImproperlyConfigured):
+            rbac.CompiledPolicy({'products.products': {'list': ('ADMIN',)}})
+
+
+def sample(text, series):
+    """Value of ``series`` (name and labels) in a Prometheus exposition, 0 if absent."""
+    match = re.search(rf"^{re.escape(series)} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+class MetricsEndpointTests(QueryBudgetTestCase):
+    """/api/ops/metrics/ and what the request path records into it."""
+
+    def scrape(self):
+        return self.client_for('SUPERADMIN').get('/api/ops/metrics/').content.decode()
+
+    def test_budget(self):
+        self.assertBudgets('GET', '/api/ops/metrics/', {
+            'SUPERADMIN': (200, 0), 'ADMIN': (403, 0), 'MANAGER': (403, 0), 'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+        })
+        self.assertBudget(None, 'GET', '/api/ops/metrics/', 0, status=401)
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_scraper_token(self):
+        scraper = APIClient(HTTP_AUTHORIZATION='Bearer scrape-token')
+        response = self.assertBudget(None, 'GET', '/api/ops/metrics/', 0, client=scraper)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        self.assertIn('# TYPE http_request_duration_seconds histogram', response.content.decode())
+
+        wrong = APIClient(HTTP_AUTHORIZATION='Bearer other-token')
+        self.assertBudget(None, 'GET', '/api/ops/metrics/', 0, status=401, client=wrong)
+
+    def test_request_path_metrics(self):
+        latency = 'http_request_duration_seconds_count{view="ProductViewSet.list",status="200"}'
+        throttled = 'throttle_rejections_total{scope="login"}'
+        jwt = 'jwt_authentication_failures_total{reason="token_not_valid"}'
+        claims = f'product_claims_total{{tenant="{self.seeded.tenant.id}"}}'
+        before = self.scrape()
+
+        self.client_for('ADMIN').get('/api/products/')
+        self.client_for('ADMIN').get('/api/products/')
+        for _ in range(6):  # login allows 5 a minute
+            self.client.post('/api/auth/login/', {'email': 'nobody@budget.test', 'password': 'x'})
+        APIClient(HTTP_AUTHORIZATION='Bearer not-a-jwt').get('/api/products/')
+        unclaimed = next(product for product in self.seeded.products if product.customer_id is None)
+        self.client.post('/api/public/products/claim/', {
+            'share_token': unclaimed.share_token, 'email': 'metrics@budget.test', 'password': PASSWORD,
+        })
+
+        after = self.scrape()
+        self.assertEqual(sample(after, latency) - sample(before, latency), 2)
+        self.assertEqual(sample(after, throttled) - sample(before, throttled), 1)
+        self.assertEqual(sample(after, jwt) - sample(before, jwt), 1)
+        self.assertEqual(sample(after, claims) - sample(before, claims), 1)
+        self.assertIn('model_cache_lookups_total{cache="tenant",result="miss"}', after)
+
+
+class RegistryTests(SimpleTestCase):
+    """Per-thread shards and the shared-directory mode."""
+
+    def setUp(self):
+        self.registry = Registry()
+        self.requests = self.registry.counter('requests_total', 'Requests.', ('view',))
+        self.latency = self.registry.histogram('latency_seconds', 'Latency.', ('view',), buckets=(0.1, 1))
+
+    def test_threads_record_into_their_own_shards(self):
+        def work():
+            for _ in range(1000):
+                self.requests.inc('list')
+                self.latency.observe(0.05, 'list')
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.requests.inc('list')
+
+        # Exited threads' counts are kept.
+        self.assertEqual(self.registry.collect()[('requests_total', ('list',))], 4001)
+        text = self.registry.exposition()
+        self.assertEqual(sample(text, 'latency_seconds_bucket{view="list",le="0.1"}'), 4000)
+        self.assertEqual(sample(text, 'latency_seconds_bucket{view="list",le="+Inf"}'), 4000)
+        self.assertEqual(sample(text, 'latency_seconds_count{view="list"}'), 4000)
+        self.assertAlmostEqual(sample(text, 'latency_seconds_sum{view="list"}'), 200)
+
+    def test_shared_directory_sums_processes(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # Another worker's last flush.
+        Path(directory.name, 'metrics-1.json').write_text(json.dumps([
+            ['requests_total', ['list'], 5],
+            ['latency_seconds', ['list'], [1, 1, 0, 1.5, 2]],
+        ]))
+        self.requests.inc('list', amount=2)
+        self.latency.observe(2, 'list')
+
+        with override_settings(METRICS_DIR=directory.name):
+            text = self.registry.exposition()
+
+        self.assertEqual(sample(text, 'requests_total{view="list"}'), 7)
+        self.assertEqual(sample(text, 'latency_seconds_bucket{view="list",le="1"}'), 2)
+        self.assertEqual(sample(text, 'latency_seconds_count{view="list"}'), 3)
+        self.assertEqual(sample(text, 'latency_seconds_sum{view="list"}'), 3.5)
+        self.assertEqual(len(list(Path(directory.name).glob('metrics-*.json'))), 2)
+
+
+class RequestProfilerTests(QueryBudgetTestCase):
+    """X-Profile captures and /api/ops/profiles/<id>/."""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(PROFILE_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.directory = Path(directory.name)
+
+    def profile_header(self, role):
+        user = self.superadmin if role == 'SUPERADMIN' else self.seeded.users[role]
+        return f"Bearer {TenantRefreshToken.for_user(user).access_token}"
+
+    def test_without_header_nothing_is_profiled(self):
+        with mock.patch('cProfile.Profile') as profile:
+            response = self.client_for('ADMIN').get('/api/products/')
+        self.assertNotIn('X-Profile-Id', response)
+        profile.assert_not_called()
+
+    def test_only_superadmin_tokens_enable_profiling(self):
+        for role in ROLES:
+            with self.subTest(role=role):
+                response = self.client_for('ADMIN').get('/api/products/', HTTP_X_PROFILE=self.profile_header(role))
+                self.assertNotIn('X-Profile-Id', response)
+        response = self.client_for('ADMIN').get('/api/products/', HTTP_X_PROFILE='Bearer not-a-jwt')
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    def test_superadmin_profiles_a_tenant_request(self):
+        response = self.client_for('ADMIN').get(
+            '/api/products/?page_size=5', HTTP_X_PROFILE=self.profile_header('SUPERADMIN'),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 5)
+        path = f"/api/ops/profiles/{response['X-Profile-Id']}/"
+
+        report = self.assertBudget('SUPERADMIN', 'GET', path + '?sort=tottime&limit=10', 0).content.decode()
+        self.assertTrue(report.startswith('GET /api/products/?page_size=5 -> 200 in '))
+        self.assertIn('ProductViewSet.list', report)
+        self.assertIn('function calls', report)
+
+        dump = self.client_for('SUPERADMIN').get(path + '?download=1')
+        self.assertEqual(dump['Content-Type'], 'application/octet-stream')
+        (self.directory / 'copy.out').write_bytes(dump.content)
+        self.assertGreater(pstats.Stats(str(self.directory / 'copy.out')).total_calls, 0)
+
+        self.assertBudgets('GET', path, {
+            'ADMIN': (403, 0), 'MANAGER': (403, 0), 'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+        })
+        self.assertBudget('SUPERADMIN', 'GET', f"/api/ops/profiles/{uuid.uuid4()}/", 0, status=404)
+
+    def test_capture_pruned_after_its_description_is_read(self):
+        response = self.client_for('ADMIN').get('/api/products/', HTTP_X_PROFILE=self.profile_header('SUPERADMIN'))
+        profile_id = uuid.UUID(response['X-Profile-Id'])
+        path = f"/api/ops/profiles/{profile_id}/"
+        (self.directory / f"{profile_id.hex}.prof").unlink()
+        for query in ('', '?download=1'):
+            with self.subTest(query=query):
+                self.assertBudget('SUPERADMIN', 'GET', path + query, 0, status=404)
+
+    def test_async_view_is_profiled(self):
+        unclaimed = next(product for product in self.seeded.products if product.customer_id is None)
+        response = self.client.post('/api/public/products/claim/async/', {
+            'share_token': unclaimed.share_token, 'email': 'profiled@budget.test', 'password': PASSWORD,
+        }, content_type='application/json', HTTP_X_PROFILE=self.profile_header('SUPERADMIN'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue((self.directory / f"{uuid.UUID(response['X-Profile-Id']).hex}.prof").exists())
+
+
+class ProfileStoreTests(SimpleTestCase):
+    """Retention and size limits of the capture directory."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def capture(self, store, age=0):
+        profiler = mock.Mock(dump_stats=lambda path: Path(path).write_bytes(b'x' * 1000))
+        profile_id = store.save(profiler, {'path': '/'})
+        then = time.time() - age
+        for suffix in ('.prof', '.json'):
+            os.utime(self.directory / f"{profile_id.hex}{suffix}", (then, then))
+        return profile_id
+
+    def test_oldest_captures_go_first_over_the_size_limit(self):
+        store = ProfileStore(self.directory, max_bytes=2500, retention=3600)
+        ids = [self.capture(store, age=100 - i) for i in range(3)]
+        store.prune()
+        self.assertIsNone(store.meta(ids[0]))
+        self.assertEqual(store.meta(ids[2]), {'path': '/'})
+        self.assertEqual(len(list(self.directory.glob('*.prof'))), 2)
+
+    def test_expired_captures_are_removed(self):
+        store = ProfileStore(self.directory, max_bytes=10 ** 6, retention=60)
+        old, recent = self.capture(store, age=120), self.capture(store)
+        self.assertIsNone(store.meta(old))
+        store.prune()
+        self.assertEqual([path.stem for path in self.directory.glob('*.prof')], [recent.hex])
+        self.assertEqual([path.stem for path in self.directory.glob('*.json')], [recent.hex])
+
+    def test_orphaned_files_are_pruned(self):
+        store = ProfileStore(self.directory, max_bytes=10 ** 6, retention=3600)
+        first, second = self.capture(store, age=120), self.capture(store, age=90)
+        (self.directory / f"{first.hex}.prof").unlink()
+        (self.directory / f"{second.hex}.json").unlink()
+        store.retention = 60
+        store.prune()
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+
+class UUID7Tests(SimpleTestCase):
+
+    def test_ids_are_time_ordered(self):
+        before = time.time()
+        ids = [uuid7() for _ in range(10000)]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual({(value.version, value.variant) for value in ids}, {(7, uuid.RFC_4122)})
+        self.assertAlmostEqual(uuid7_time(ids[0]), before, delta=1)
+        # The database stores hex strings; they sort the same way.
+        self.assertEqual([value.hex for value in ids], sorted(value.hex for value in ids))
+
+    def test_explicit_time_and_randomness_are_reproducible(self):
+        value = uuid7(ms=1_704_067_200_000, rand=12345)
+        self.assertEqual(value, uuid7(ms=1_704_067_200_000, rand=12345))
+        self.assertEqual(value.version, 7)
+        self.assertEqual(uuid7_time(value), 1_704_067_200)
+        self.assertLess(value, uuid7(ms=1_704_067_200_001, rand=0))
+
+
+class SeedTenantsTests(TestCase):
+    """``seed_tenants``: runs with different seeds coexist, a repeated one is refused."""
+
+    def seed(self, seed, start=0):
+        call_command('seed_tenants', tenants=1, companies=1, staff=2, products=2, customers=3, invitations=2,
+                     seed=seed, start=start, stdout=io.StringIO())
+
+    def test_seeds_do_not_collide(self):
+        self.seed(0)
+        self.seed(1)
+        self.assertEqual(Tenant.objects.count(), 2)
+        self.assertEqual(User.objects.filter(email__endswith='@seed1.test').count(), 2 + 2 + 3)
+        with self.assertRaisesMessage(CommandError, "pass --start 1 or another --seed"):
+            self.seed(1)
+        self.seed(1, start=1)
+        self.assertEqual(Tenant.objects.count(), 3)
+
+
+class StreamChunksTests(SimpleTestCase):
+    """Streamed bodies stay streamed under ASGI instead of being read whole first."""
+
+    def test_wsgi_keeps_the_iterator(self):
+        chunks = iter([b'a', b'b'])
+        self.assertIs(stream_chunks(RequestFactory().get('/'), chunks), chunks)
+
+    async def test_asgi_pulls_one_chunk_at_a_time(self):
+        pulled = []
+
+        def chunks():
+            for chunk in (b'a', b'b', b'c'):
+                pulled.append(chunk)
+                yield chunk
+
+        response = StreamingHttpResponse(stream_chunks(AsyncRequestFactory().get('/'), chunks()))
+        self.assertTrue(response.is_async)
+        body = aiter(response)
+        self.assertEqual(await anext(body), b'a')
+        self.assertEqual(pulled, [b'a'])
+        self.assertEqual([chunk async for chunk in body], [b'b', b'c'])
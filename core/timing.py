@@ -0,0 +1,231 @@
+"""
+Per-request timing: SQL, serializer and permission time, collected for
+``core.middleware.RequestTimingMiddleware``.
+
+The current request's ``RequestTiming`` lives in a context variable, so it
+follows the request into ``sync_to_async`` threads. ``install()`` (called
+from ``CoreConfig.ready``) adds a query wrapper to every database connection
+and times DRF's serializer and permission entry points; outside a request
+each hook costs one context-variable lookup.
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+_current = ContextVar('request_timing', default=None)
+
+# Upper bounds, in ms, of the latency histogram buckets; the last is open.
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+
+
+class RequestTiming:
+    """Counters for one request. Times are in seconds."""
+    __slots__ = ('started', 'queries', 'db', 'serializer', 'permission', 'section')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.serializer = 0.0
+        self.permission = 0.0
+        self.section = None  # phase being timed; nested calls are not counted twice
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def start():
+    """Begin timing the current request; returns the token for ``stop``."""
+    timing = RequestTiming()
+    return timing, _current.set(timing)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+# ---------------------------------------------------------------- hooks
+
+def record_query(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    began = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.db += time.perf_counter() - began
+        timing.queries += 1
+
+
+def _add_query_wrapper(connection, **kwargs):
+    # connection_created fires again on every reconnect of the same wrapper.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def timed(phase, func):
+    """Wrap ``func`` so time spent in it counts toward ``phase`` of the request."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        timing = _current.get()
+        if timing is None or timing.section is not None:
+            return func(*args, **kwargs)
+        timing.section = phase
+        began = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timing.section = None
+            setattr(timing, phase, getattr(timing, phase) + time.perf_counter() - began)
+    wrapper.timed_phase = phase
+    return wrapper
+
+
+def install():
+    """Hook query, serializer and permission timing in. Idempotent."""
+    from rest_framework import serializers
+    from rest_framework.views import APIView
+
+    connection_created.connect(_add_query_wrapper, dispatch_uid='core.timing.record_query')
+    for connection in connections.all(initialized_only=True):
+        _add_query_wrapper(connection)
+
+    # Validation and rendering; save() is ORM work and shows up as db time.
+    hooks = [
+        (serializers.BaseSerializer, 'is_valid', 'serializer'),
+        (serializers.ListSerializer, 'is_valid', 'serializer'),
+        (serializers.Serializer, 'data', 'serializer'),
+        (serializers.ListSerializer, 'data', 'serializer'),
+        (APIView, 'check_permissions', 'permission'),
+        (APIView, 'check_object_permissions', 'permission'),
+    ]
+    for cls, name, phase in hooks:
+        attribute = vars(cls)[name]
+        if isinstance(attribute, property):
+            if not hasattr(attribute.fget, 'timed_phase'):
+                setattr(cls, name, property(timed(phase, attribute.fget)))
+        elif not hasattr(attribute, 'timed_phase'):
+            setattr(cls, name, timed(phase, attribute))
+
+
+# ---------------------------------------------------------------- rolling stats
+
+class ViewStats:
+    """Histogram and sums for one view within one time slot."""
+    __slots__ = ('count', 'statuses', 'buckets', 'total', 'max', 'db', 'queries', 'serializer', 'permission')
+
+    def __init__(self):
+        self.count = 0
+        self.statuses = Counter()
+        self.buckets = [0] * len(BUCKETS_MS)
+        self.total = self.max = self.db = self.serializer = self.permission = 0.0
+        self.queries = 0
+
+    def add(self, status, timing, total):
+        total_ms = total * 1000
+        self.count += 1
+        self.statuses[f"{status // 100}xx"] += 1
+        self.buckets[bisect_left(BUCKETS_MS, total_ms)] += 1
+        self.total += total_ms
+        self.max = max(self.max, total_ms)
+        self.db += timing.db * 1000
+        self.queries += timing.queries
+        self.serializer += timing.serializer * 1000
+        self.permission += timing.permission * 1000
+
+    def merge(self, other):
+        self.count += other.count
+        self.statuses.update(other.statuses)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.max = max(self.max, other.max)
+        for name in ('total', 'db', 'queries', 'serializer', 'permission'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile (the max for the open one)."""
+        rank, seen = q * self.count, 0
+        for bound, count in zip(BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return round(min(bound, self.max), 3)
+        return round(self.max, 3)
+
+    def as_dict(self):
+        def mean(value):
+            return round(value / self.count, 3)
+
+        return {
+            'count': self.count,
+            'statuses': dict(self.statuses),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max, 3),
+            'mean_ms': mean(self.total),
+            'mean_db_ms': mean(self.db),
+            'mean_queries': mean(self.queries),
+            'mean_serializer_ms': mean(self.serializer),
+            'mean_permission_ms': mean(self.permission),
+            'buckets': {
+                ('+Inf' if bound == float('inf') else str(bound)): count
+                for bound, count in zip(BUCKETS_MS, self.buckets)
+            },
+        }
+
+
+class RollingStats:
+    """
+    Per-view latency histograms over the last ``window`` seconds, kept as a
+    ring of ``slot``-second buckets so old requests age out without a sweep.
+    Recording takes a lock for a dictionary update.
+    """
+
+    def __init__(self, window=900, slot=60):
+        self.window = window
+        self.slot = slot
+        self.slots = deque()  # (slot number, {view: ViewStats}), oldest first
+        self.lock = threading.Lock()
+
+    def record(self, view, status, timing, total):
+        number = int(time.monotonic() // self.slot)
+        with self.lock:
+            if not self.slots or self.slots[-1][0] != number:
+                self.slots.append((number, {}))
+                while self.slots[0][0] <= number - self.window // self.slot:
+                    self.slots.popleft()
+            views = self.slots[-1][1]
+            stats = views.get(view)
+            if stats is None:
+                stats = views[view] = ViewStats()
+            stats.add(status, timing, total)
+
+    def snapshot(self, window=None):
+        """``{view: summary}`` for requests finished in the last ``window`` seconds."""
+        window = min(window or self.window, self.window)
+        oldest = int(time.monotonic() // self.slot) - max(window // self.slot, 1)
+        merged = {}
+        with self.lock:
+            for number, views in self.slots:
+                if number <= oldest:
+                    continue
+                for view, stats in views.items():
+                    merged.setdefault(view, ViewStats()).merge(stats)
+        return {view: stats.as_dict() for view, stats in sorted(merged.items())}
+
+    def clear(self):
+        with self.lock:
+            self.slots.clear()
+
+
+request_stats = RollingStats()
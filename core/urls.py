@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .views import MetricsView, ProfileView, RbacView, RequestTimingsView
+
+urlpatterns = [
+    path('ops/request-timings/', RequestTimingsView.as_view(), name='request-timings'),
+    path('ops/metrics/', MetricsView.as_view(), name='metrics'),
+    path('ops/profiles/<uuid:profile_id>/', ProfileView.as_view(), name='profile'),
+    path('ops/rbac/', RbacView.as_view(), name='rbac'),
+]
@@ -1,3 +1,132 @@
-from django.shortcuts import render
+import json
+import math
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.authentication import MetricsTokenAuthentication, StatelessJWTAuthentication
+from core.metrics import registry
+from core import rbac
+from core.permissions import HasRolePermission, IsMetricsScraper
+from core.profiling import SORT_KEYS, ProfileStore
+from core.timing import request_stats
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncJSONView(View):
+    """
+    Base for ASGI-native public endpoints that bypass DRF (whose views are
+    synchronous). Applies DRF throttle classes, parses the JSON body into
+    ``request.json`` and leaves handlers free to ``await`` the async ORM.
+    Handlers must be ``async def``.
+    """
+    throttle_classes = []
+
+    async def dispatch(self, request, *args, **kwargs):
+        for throttle_class in self.throttle_classes:
+            throttle = throttle_class()
+            # Throttles touch the cache and the lazy request.user, both sync.
+            if not await sync_to_async(throttle.allow_request)(request, self):
+                wait = math.ceil(throttle.wait() or 0)
+                response = JsonResponse(
+                    {"detail": f"Request was throttled. Expected available in {wait} seconds."},
+                    status=429,
+                )
+                response['Retry-After'] = str(wait)
+                return response
+
+        if request.method == 'POST':
+            try:
+                request.json = json.loads(request.body or b'{}')
+            except ValueError:
+                return JsonResponse({"detail": "JSON parse error."}, status=400)
+
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class RequestTimingsView(APIView):
+    """
+    Superadmin only — this process's rolling per-view latency histograms
+    (``RequestTimingMiddleware``). ``?window=`` limits them to the last N seconds.
+    """
+    permission_classes = [HasRolePermission]
+    rbac_view = 'ops.request_timings'
+    throttle_classes = []  # meant to be polled by dashboards
+
+    def get(self, request):
+        try:
+            window = int(request.query_params.get('window', request_stats.window))
+        except ValueError:
+            window = request_stats.window
+        window = min(max(window, request_stats.slot), request_stats.window)
+        return Response({'window': window, 'views': request_stats.snapshot(window)})
+
+
+class MetricsView(APIView):
+    """
+    Prometheus text exposition of ``core.metrics`` for the superadmin or a
+    scraper presenting ``METRICS_TOKEN``. With ``METRICS_DIR`` set, covers
+    every worker process.
+    """
+    authentication_classes = [MetricsTokenAuthentication, StatelessJWTAuthentication]
+    permission_classes = [HasRolePermission | IsMetricsScraper]
+    rbac_view = 'ops.metrics'
+    throttle_classes = []
+
+    def get(self, request):
+        return HttpResponse(registry.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ProfileView(APIView):
+    """
+    Superadmin only — a capture made by ``RequestProfilerMiddleware``.
+    Returns a ``pstats`` table (``?sort=cumulative|tottime|calls``,
+    ``?limit=``), or the raw dump with ``?download=1``.
+    """
+    permission_classes = [HasRolePermission]
+    rbac_view = 'ops.profiles'
+    throttle_classes = []
+
+    def get(self, request, profile_id):
+        store = ProfileStore.from_settings()
+        meta = store.meta(profile_id)
+        if meta is None:
+            raise Http404
+
+        sort = request.query_params.get('sort')
+        sort = sort if sort in SORT_KEYS else 'cumulative'
+        try:
+            limit = min(max(int(request.query_params.get('limit', 40)), 1), 1000)
+        except ValueError:
+            limit = 40
+        try:
+            if request.query_params.get('download'):
+                response = HttpResponse(store.dump(profile_id), content_type='application/octet-stream')
+                response['Content-Disposition'] = f'attachment; filename="{profile_id.hex}.prof"'
+                return response
+            report = store.report(profile_id, sort, limit)
+        except OSError:
+            raise Http404  # pruned since meta() found it
+        heading = (
+            f"{meta['method']} {meta['path']} -> {meta['status']} in {meta['duration_ms']} ms "
+            f"({meta['view']}, {meta['created_at']})\n"
+        )
+        return HttpResponse(heading + report, content_type='text/plain; charset=utf-8')
+
+
+class RbacView(APIView):
+    """
+    Superadmin only — the compiled RBAC policy (``core.rbac``): the roles
+    allowed on every routed view, per action.
+    """
+    permission_classes = [HasRolePermission]
+    rbac_view = 'ops.rbac'
+    throttle_classes = []
+
+    def get(self, request):
+        return Response({'roles': rbac.ROLES, 'views': rbac.matrix()})
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-18 07:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("invitations", "0001_initial"),
+        ("tenants", "0002_company_company_tenant_created_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="invitation",
+            index=models.Index(
+                fields=["tenant", "used_at", "expires_at"],
+                name="invitation_tenant_pending_idx",
+            ),
+        ),
+    ]
@@ -1,9 +1,10 @@
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-import uuid
 import secrets
 
+from core.ids import uuid7
+
 INVITATION_ROLE_CHOICES = (
     ('ADMIN', 'Admin'),
     ('MANAGER', 'Manager'),
@@ -15,7 +16,7 @@ def generate_invitation_token():
 
 
 class Invitation(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     email = models.EmailField()
     role = models.CharField(max_length=20, choices=INVITATION_ROLE_CHOICES)
     tenant = models.ForeignKey(
@@ -29,6 +30,11 @@ class Invitation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'used_at', 'expires_at'], name='invitation_tenant_pending_idx'),
+        ]
+
     def is_valid(self):
         if self.used_at:
             raise ValidationError('Invitation already used.')
@@ -29,8 +29,8 @@ class InvitationSerializer(serializers.ModelSerializer):
     def validate(self, data):
         # Auto-attach tenant from the requesting admin (for manager invites)
         request = self.context.get('request')
-        if request and 'tenant' not in data and hasattr(request.user, 'tenant') and request.user.tenant:
-            data['tenant'] = request.user.tenant
+        if request and 'tenant' not in data and getattr(request.user, 'tenant_id', None):
+            data['tenant_id'] = request.user.tenant_id
         return data
 
     def create(self, validated_data):
@@ -47,21 +47,34 @@ class InvitationAcceptSerializer(serializers.Serializer):
     def validate(self, data):
         try:
             invitation = Invitation.objects.get(token=data['token'])
-            invitation.is_valid()
-            data['invitation'] = invitation
-            
-            if invitation.tenant is None:  # Bootstrap admin invite
-                if not data.get('tenant_name'):
-                    raise serializers.ValidationError(
-                        {"tenant_name": "Required for bootstrap invitation."}
-                    )
-            else:  # Manager invite
-                if data.get('tenant_name'):
-                    raise serializers.ValidationError(
-                        {"tenant_name": "Not allowed for manager invitation."}
-                    )
         except Invitation.DoesNotExist:
             raise serializers.ValidationError({"token": "Invalid token."})
+        return self.validate_invitation(invitation, data)
+
+    @staticmethod
+    def validate_invitation(invitation, data):
+        """Checks that need the invitation row; shared with the async accept view."""
+        try:
+            invitation.is_valid()
         except DjangoValidationError as e:
             raise serializers.ValidationError({"token": e.message})
+        data['invitation'] = invitation
+
+        if invitation.tenant_id is None:  # Bootstrap admin invite
+            if not data.get('tenant_name'):
+                raise serializers.ValidationError(
+                    {"tenant_name": "Required for bootstrap invitation."}
+                )
+        else:  # Manager invite
+            if data.get('tenant_name'):
+                raise serializers.ValidationError(
+                    {"tenant_name": "Not allowed for manager invitation."}
+                )
+        return data
+
+
+class AsyncInvitationAcceptSerializer(InvitationAcceptSerializer):
+    """Field checks only; AsyncInvitationAcceptView loads the invitation with the async ORM."""
+
+    def validate(self, data):
         return data
@@ -1,3 +1,71 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+
+from core.perf import PASSWORD, QueryBudgetTestCase
+from tenants.models import Tenant
+from .models import Invitation
+
+
+class InvitationRouteBudgetTests(QueryBudgetTestCase):
+    """Query and wall-time budgets for /api/invitations/."""
+
+    def test_bootstrap_admin_invitation(self):
+        self.assertBudgets('POST', '/api/invitations/bootstrap-admin/', {
+            'SUPERADMIN': (201, 1), 'ADMIN': (403, 0), 'MANAGER': (403, 0),
+            'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+        }, data={'email': 'bootstrap@budget.test'})
+
+    def test_manager_invitation(self):
+        self.assertBudgets('POST', '/api/invitations/', {
+            'ADMIN': (201, 1), 'MANAGER': (403, 0), 'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+        }, data={'email': 'invited.manager@budget.test'})
+
+    def test_accept(self):
+        for index, path in enumerate(('/api/invitations/accept/', '/api/invitations/accept/async/')):
+            with self.subTest(path=path):
+                invitation = Invitation.objects.create(
+                    email=f"accept{index}@budget.test", role='MANAGER', tenant=self.seeded.tenant,
+                    expires_at=timezone.now() + timedelta(days=1),
+                )
+                self.assertBudget(None, 'POST', path, 6, data={
+                    'token': invitation.token, 'password': PASSWORD,
+                })
+                # Second use of the same token is rejected.
+                self.assertBudget(None, 'POST', path, 1, status=400, data={
+                    'token': invitation.token, 'password': PASSWORD,
+                })
+
+    def test_accept_creates_the_invited_account(self):
+        for index, path in enumerate(('/api/invitations/accept/', '/api/invitations/accept/async/')):
+            with self.subTest(path=path):
+                bootstrap = Invitation.objects.create(
+                    email=f"founder{index}@budget.test", role='ADMIN', expires_at=timezone.now() + timedelta(days=1),
+                )
+                self.assertEqual(self.accept(path, bootstrap).json(),
+                                 {'tenant_name': ['Required for bootstrap invitation.']})
+                access = AccessToken(self.accept(path, bootstrap, tenant_name=f'Founded {index}').json()['access'])
+                self.assertEqual(access['role'], 'ADMIN')
+                self.assertEqual(Tenant.objects.get(pk=access['tenant_id']).name, f'Founded {index}')
+
+                manager = Invitation.objects.create(
+                    email=f"manager{index}@budget.test", role='MANAGER', tenant=self.seeded.tenant,
+                    expires_at=timezone.now() + timedelta(days=1),
+                )
+                self.assertEqual(self.accept(path, manager, tenant_name='Elsewhere').status_code, 400)
+                access = AccessToken(self.accept(path, manager).json()['access'])
+                self.assertEqual((access['role'], access['tenant_id']), ('MANAGER', str(self.seeded.tenant.id)))
+
+                expired = Invitation.objects.create(
+                    email=f"late{index}@budget.test", role='MANAGER', tenant=self.seeded.tenant,
+                    expires_at=timezone.now() - timedelta(minutes=1),
+                )
+                self.assertEqual(self.accept(path, expired).status_code, 400)
+                self.assertFalse(User.objects.filter(email=expired.email).exists())
+
+    def accept(self, path, invitation, **extra):
+        return self.client.post(path, {'token': invitation.token, 'password': PASSWORD, **extra},
+                                content_type='application/json')
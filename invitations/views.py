@@ -1,21 +1,28 @@
+from django.http import JsonResponse
 from django.utils import timezone
+from rest_framework import serializers
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
-from rest_framework.throttling import UserRateThrottle
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from core.permissions import IsSuperadmin, IsTenantAdmin
+from core import metrics
+from core.permissions import HasRolePermission
+from core.views import AsyncJSONView
 from tenants.models import Tenant
+from accounts.hashing import amake_password
 from accounts.models import User
-from .serializers import InvitationSerializer, InvitationAcceptSerializer
+from accounts.throttles import AnonCounterRateThrottle, UserCounterRateThrottle
+from accounts.tokens import TenantRefreshToken
+from .models import Invitation
+from .serializers import InvitationSerializer, InvitationAcceptSerializer, AsyncInvitationAcceptSerializer
 
 
 class BootstrapAdminInvitationView(APIView):
     """Superadmin only — creates a tenant-admin invitation with no tenant attached."""
-    permission_classes = [IsSuperadmin]
-    throttle_classes = [UserRateThrottle]
+    permission_classes = [HasRolePermission]
+    rbac_view = 'invitations.bootstrap_admin'
+    throttle_classes = [UserCounterRateThrottle]
 
     def post(self, request):
         serializer = InvitationSerializer(data=request.data, context={'request': request})
@@ -30,8 +37,9 @@ class BootstrapAdminInvitationView(APIView):
 
 class ManagerInvitationView(APIView):
     """Admin only — creates a manager invitation scoped to the admin's tenant."""
-    permission_classes = [IsTenantAdmin]
-    throttle_classes = [UserRateThrottle]
+    permission_classes = [HasRolePermission]
+    rbac_view = 'invitations.manager'
+    throttle_classes = [UserCounterRateThrottle]
 
     def post(self, request):
         serializer = InvitationSerializer(data=request.data, context={'request': request})
@@ -76,10 +84,53 @@ class InvitationAcceptView(APIView):
 
         invitation.used_at = timezone.now()
         invitation.save()
+        metrics.invitation_accepts.inc(str(user.tenant_id))
 
-        refresh = RefreshToken.for_user(user)
+        refresh = TenantRefreshToken.for_user(user)
         return Response({
             "detail": "Accepted",
             "access": str(refresh.access_token),
             "refresh": str(refresh),
         }, status=status.HTTP_200_OK)
+
+
+class AsyncInvitationAcceptView(AsyncJSONView):
+    """ASGI-native InvitationAcceptView; password hashing runs on the bounded hashing pool."""
+    throttle_classes = [AnonCounterRateThrottle]
+
+    async def post(self, request):
+        serializer = AsyncInvitationAcceptSerializer(data=request.json)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+
+        invitation = await Invitation.objects.filter(token=data['token']).afirst()
+        if invitation is None:
+            return JsonResponse({"token": ["Invalid token."]}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            data = serializer.validate_invitation(invitation, data)
+        except serializers.ValidationError as exc:
+            return JsonResponse(serializers.as_serializer_error(exc), status=status.HTTP_400_BAD_REQUEST)
+
+        user = User(email=User.objects.normalize_email(invitation.email))
+        if invitation.tenant_id is None:
+            # Bootstrap: create Tenant + Admin user
+            user.tenant = await Tenant.objects.acreate(name=data['tenant_name'])
+            user.role = 'ADMIN'
+        else:
+            # Manager invite: user joins existing tenant
+            user.tenant_id = invitation.tenant_id
+            user.role = 'MANAGER'
+        user.password = await amake_password(data['password'])
+        await user.asave()
+
+        invitation.used_at = timezone.now()
+        await invitation.asave()
+        metrics.invitation_accepts.inc(str(user.tenant_id))
+
+        refresh = TenantRefreshToken.for_user(user)
+        return JsonResponse({
+            "detail": "Accepted",
+            "access": str(refresh.access_token),
+            "refresh": str(refresh),
+        }, status=status.HTTP_200_OK)
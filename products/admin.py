@@ -1,10 +1,17 @@
 from django.contrib import admin
+from . import search
 from .models import Product
 
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ('name', 'tenant', 'company', 'created_by', 'customer', 'created_at')
-    search_fields = ('name',)
+    list_select_related = ('tenant', 'company', 'created_by', 'customer')
+    search_fields = ('name', 'description')  # through products.search, see get_search_results
     list_filter = ('tenant', 'company')
     readonly_fields = ('id', 'share_token', 'created_at', 'updated_at')
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search.backend().matching(queryset, search_term), False
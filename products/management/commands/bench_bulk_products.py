@@ -0,0 +1,61 @@
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from products.models import Product
+from products.views import ProductViewSet
+from tenants.models import Tenant, Company
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare creating products through the bulk endpoint with one POST per "
+        "product. Runs against a throwaway tenant inside a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help='Products per path.')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        factory = APIRequestFactory()
+        payload = [{'name': f"Bench product {i}", 'description': 'x' * 64} for i in range(count)]
+
+        with transaction.atomic():
+            tenant = Tenant.objects.create(name='Bulk bench tenant')
+            company = Company.objects.create(tenant=tenant, name='Bulk bench company')
+            staff = User.objects.create(
+                email='bulk-bench-staff@bench.local', password=make_password(None),
+                role='STAFF', tenant=tenant, company=company,
+            )
+
+            create = ProductViewSet.as_view({'post': 'create'}, throttle_classes=[])
+            start = time.perf_counter()
+            for item in payload:
+                request = factory.post('/api/products/', item, format='json')
+                force_authenticate(request, user=staff)
+                response = create(request)
+                assert response.status_code == 201, response.data
+            single = time.perf_counter() - start
+
+            bulk = ProductViewSet.as_view({'post': 'bulk'}, throttle_classes=[])
+            batch = ProductViewSet.bulk_max_items
+            start = time.perf_counter()
+            for offset in range(0, count, batch):
+                request = factory.post('/api/products/bulk/', payload[offset:offset + batch], format='json')
+                force_authenticate(request, user=staff)
+                response = bulk(request)
+                assert response.status_code == 201, response.data
+            bulked = time.perf_counter() - start
+
+            assert Product.objects.filter(tenant=tenant).count() == 2 * count
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{count} products")
+        self.stdout.write(f"  single POSTs : {single:8.2f} s  ({count / single:9.0f} products/s)")
+        self.stdout.write(f"  bulk endpoint: {bulked:8.2f} s  ({count / bulked:9.0f} products/s)")
+        self.stdout.write(f"  speed-up     : {single / bulked:8.1f}x")
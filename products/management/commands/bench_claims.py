@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import statistics
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, transaction
+from django.test import AsyncClient, Client
+
+from accounts.models import User
+from core.models import Tombstone
+from products.models import Product
+from tenants.models import Tenant, Company
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test a burst of concurrent product claims through the sync (WSGI) "
+        "and async (ASGI) claim endpoints, and how long a cheap request waits "
+        "behind the burst. Writes to the configured database: it creates a "
+        "throwaway tenant and deletes it, with its tombstones, afterwards. "
+        "Claims that fail (e.g. SQLite lock errors) are counted, not retried."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--claims', type=int, default=32, help='Concurrent claims per path.')
+        parser.add_argument('--threads', type=int, default=4, help='WSGI worker threads.')
+        parser.add_argument(
+            '--busy-timeout', type=float, default=30,
+            help='SQLite lock wait in seconds, so concurrent writers queue instead of failing.',
+        )
+
+    def handle(self, *args, **options):
+        claims = options['claims']
+        if connection.vendor == 'sqlite':
+            # Shared by the per-thread connections opened during the run.
+            connection.settings_dict.setdefault('OPTIONS', {})['timeout'] = options['busy_timeout']
+            connection.close()
+        tenant = Tenant.objects.create(name='Claim bench tenant')
+        company = Company.objects.create(tenant=tenant, name='Claim bench company')
+        staff = User.objects.create(
+            email=f'claim-bench-{uuid.uuid4().hex}@bench.local', password=make_password(None),
+            role='STAFF', tenant=tenant, company=company,
+        )
+        products = Product.objects.bulk_create(
+            Product(tenant=tenant, company=company, created_by=staff, name=f"Claim bench {i}")
+            for i in range(2 * claims)
+        )
+        # Failed claims are reported in the table, not logged one by one.
+        loggers = [logging.getLogger(name) for name in ('django.request', 'core.requests')]
+        for logger in loggers:
+            logger.disabled = True
+        try:
+            wsgi = self.run_wsgi(products[:claims], options['threads'])
+            asgi = asyncio.run(self.run_asgi(products[claims:]))
+        finally:
+            for logger in loggers:
+                logger.disabled = False
+            with transaction.atomic():
+                Product.objects.filter(tenant=tenant).delete()
+                User.objects.filter(tenant=tenant).delete()
+                company.delete()
+                Tombstone.objects.filter(tenant=tenant).delete()
+                tenant.delete()
+
+        self.stdout.write(f"{claims} concurrent claims")
+        self.stdout.write(
+            f"  {'path':<36}{'total s':>9}{'p50 ms':>9}{'p95 ms':>9}{'cheap wait ms':>15}  failed"
+        )
+        for label, (total, results, cheap) in (
+            (f"WSGI ({options['threads']} threads)", wsgi),
+            ("ASGI (1 event loop)", asgi),
+        ):
+            latencies = sorted(latency for latency, _ in results)
+            p95 = latencies[int(len(latencies) * 0.95) - 1]
+            failed = Counter(status for _, status in results if status != 200)
+            failures = ', '.join(f"{count} x HTTP {status}" for status, count in sorted(failed.items())) or '-'
+            self.stdout.write(
+                f"  {label:<36}{total:>9.2f}{statistics.median(latencies):>9.0f}{p95:>9.0f}{cheap:>15.1f}"
+                f"  {failures}"
+            )
+
+    @staticmethod
+    def payload(product, index):
+        return {
+            'share_token': product.share_token,
+            'email': f'claim-bench-{index}-{uuid.uuid4().hex[:8]}@bench.local',
+            'password': 'Bench-pass-123!',
+        }
+
+    def run_wsgi(self, products, threads):
+        def claim(index, product):
+            client = Client(raise_request_exception=False, REMOTE_ADDR=f'10.1.{index // 250}.{index % 250}')
+            start = time.perf_counter()
+            # On SQLite a deferred transaction that races another writer for
+            # the write lock fails with a 500 instead of waiting; it counts.
+            response = client.post(
+                '/api/public/products/claim/', self.payload(product, index), content_type='application/json',
+            )
+            connections.close_all()
+            return (time.perf_counter() - start) * 1000, response.status_code
+
+        def cheap():
+            return time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            start = time.perf_counter()
+            futures = [pool.submit(claim, i, p) for i, p in enumerate(products)]
+            # A trivial request queued behind the burst waits for a free thread.
+            queued = time.perf_counter()
+            served = pool.submit(cheap).result()
+            results = [future.result() for future in futures]
+            total = time.perf_counter() - start
+        return total, results, (served - queued) * 1000
+
+    async def run_asgi(self, products):
+        client = AsyncClient(raise_request_exception=False)
+
+        async def claim(index, product):
+            start = time.perf_counter()
+            response = await client.post(
+                '/api/public/products/claim/async/', self.payload(product, index),
+                content_type='application/json', REMOTE_ADDR=f'10.2.{index // 250}.{index % 250}',
+            )
+            return (time.perf_counter() - start) * 1000, response.status_code
+
+        async def cheap():
+            # A trivial coroutine scheduled mid-burst: measures event-loop lag.
+            await asyncio.sleep(0.05)
+            queued = time.perf_counter()
+            await asyncio.sleep(0)
+            return (time.perf_counter() - queued) * 1000
+
+        start = time.perf_counter()
+        *results, cheap_wait = await asyncio.gather(
+            *(claim(i, p) for i, p in enumerate(products)), cheap(),
+        )
+        return time.perf_counter() - start, results, cheap_wait
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-18 07:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0001_initial"),
+        ("tenants", "0002_company_company_tenant_created_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["tenant", "company", "created_at", "id"],
+                name="product_tenant_company_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["tenant", "customer", "created_at", "id"],
+                name="product_tenant_customer_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["tenant", "created_at", "id"], name="product_tenant_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,88 @@
+from django.db import migrations
+
+# Product.clean()'s rules as triggers, so rows written by bulk_create,
+# bulk_update and QuerySet.update are checked too: the creator is a STAFF
+# member of the product's tenant and company, and a customer is a CUSTOMER
+# of the product's tenant.
+CREATOR_VIOLATION = (
+    "NOT EXISTS (SELECT 1 FROM accounts_user WHERE id = NEW.created_by_id AND role = 'STAFF' "
+    "AND tenant_id = NEW.tenant_id AND company_id = NEW.company_id)"
+)
+CREATOR_MESSAGE = "Product tenant and company must match its STAFF creator."
+CUSTOMER_VIOLATION = (
+    "NEW.customer_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM accounts_user "
+    "WHERE id = NEW.customer_id AND role = 'CUSTOMER' AND tenant_id = NEW.tenant_id)"
+)
+CUSTOMER_MESSAGE = "Product customer must be a CUSTOMER of the product tenant."
+
+
+def sqlite_trigger(name, event, violation, message):
+    return (
+        f"CREATE TRIGGER {name} BEFORE {event} ON products_product "
+        f"FOR EACH ROW WHEN {violation} BEGIN SELECT RAISE(ABORT, '{message}'); END"
+    )
+
+
+TRIGGERS = {
+    "sqlite": [
+        sqlite_trigger("product_creator_insert", "INSERT", CREATOR_VIOLATION, CREATOR_MESSAGE),
+        sqlite_trigger(
+            "product_creator_update", "UPDATE OF tenant_id, company_id, created_by_id",
+            CREATOR_VIOLATION, CREATOR_MESSAGE,
+        ),
+        sqlite_trigger("product_customer_insert", "INSERT", CUSTOMER_VIOLATION, CUSTOMER_MESSAGE),
+        sqlite_trigger(
+            "product_customer_update", "UPDATE OF tenant_id, customer_id",
+            CUSTOMER_VIOLATION, CUSTOMER_MESSAGE,
+        ),
+    ],
+    "postgresql": [
+        f"""CREATE FUNCTION product_consistency_check() RETURNS trigger AS $$
+        BEGIN
+            IF {CREATOR_VIOLATION} THEN
+                RAISE EXCEPTION '{CREATOR_MESSAGE}' USING ERRCODE = 'integrity_constraint_violation';
+            END IF;
+            IF {CUSTOMER_VIOLATION} THEN
+                RAISE EXCEPTION '{CUSTOMER_MESSAGE}' USING ERRCODE = 'integrity_constraint_violation';
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql""",
+        "CREATE TRIGGER product_consistency BEFORE INSERT OR UPDATE OF tenant_id, company_id, created_by_id, "
+        "customer_id ON products_product FOR EACH ROW EXECUTE FUNCTION product_consistency_check()",
+    ],
+}
+DROP_TRIGGERS = {
+    "sqlite": [
+        f"DROP TRIGGER IF EXISTS {name}" for name in (
+            "product_creator_insert", "product_creator_update",
+            "product_customer_insert", "product_customer_update",
+        )
+    ],
+    "postgresql": [
+        "DROP TRIGGER IF EXISTS product_consistency ON products_product",
+        "DROP FUNCTION IF EXISTS product_consistency_check()",
+    ],
+}
+
+
+def create_triggers(apps, schema_editor):
+    for sql in TRIGGERS.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql, params=None)
+
+
+def drop_triggers(apps, schema_editor):
+    for sql in DROP_TRIGGERS.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0002_product_product_tenant_company_idx_and_more"),
+        ("accounts", "0004_user_integrity_rules"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
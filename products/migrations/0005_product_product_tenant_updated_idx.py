@@ -0,0 +1,22 @@
+# Generated by Django 5.0.1 on 2026-10-18 08:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0004_uuid7_ids"),
+        ("tenants", "0004_company_company_tenant_updated_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["tenant", "updated_at", "id"], name="product_tenant_updated_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# Full-text index over product name and description for products.search:
+# an FTS5 table filled here and kept current by products.search's hooks.
+# ``scope`` holds one token per id a search is narrowed by (p<product>,
+# t<tenant>, c<company>, u<customer>, as 32-digit hex), so tenant and row
+# policy filtering happen inside the index. Databases without FTS5 get no
+# index and products.search falls back to LIKE.
+CREATE = [
+    "CREATE VIRTUAL TABLE product_search USING fts5("
+    "name, description, scope, product_id UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    "INSERT INTO product_search (name, description, scope, product_id) "
+    "SELECT name, description, 'p' || id || ' t' || tenant_id || ' c' || company_id "
+    "|| coalesce(' u' || customer_id, ''), id FROM products_product",
+]
+DROP = ["DROP TABLE IF EXISTS product_search"]
+
+
+def has_fts5(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_index(apps, schema_editor):
+    if has_fts5(schema_editor.connection):
+        for sql in CREATE:
+            schema_editor.execute(sql, params=None)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in DROP:
+            schema_editor.execute(sql, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_product_tenant_updated_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
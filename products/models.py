@@ -1,15 +1,17 @@
 from django.db import models
 from django.core.exceptions import ValidationError
-import uuid
 import secrets
 
+from core.ids import uuid7
+from core.models import prevalidated_relations, related_for_validation
+
 
 def generate_share_token():
     return secrets.token_urlsafe(48)
 
 
 class Product(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     tenant = models.ForeignKey('tenants.Tenant', on_delete=models.PROTECT)
     company = models.ForeignKey('tenants.Company', on_delete=models.PROTECT)
     created_by = models.ForeignKey(
@@ -27,21 +29,50 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'company', 'created_at', 'id'], name='product_tenant_company_idx'),
+            models.Index(fields=['tenant', 'customer', 'created_at', 'id'], name='product_tenant_customer_idx'),
+            models.Index(fields=['tenant', 'created_at', 'id'], name='product_tenant_created_idx'),
+            models.Index(fields=['tenant', 'updated_at', 'id'], name='product_tenant_updated_idx'),
+        ]
+
     def clean(self):
         super().clean()
-        if self.created_by_id and self.created_by.role != 'STAFF':
+        creator = related_for_validation(self, 'created_by')
+        customer = related_for_validation(self, 'customer')
+        if self.created_by_id and creator.role != 'STAFF':
             raise ValidationError('Products can only be created by Staff.')
-        if self.created_by_id and self.tenant_id != self.created_by.tenant_id:
+        if self.created_by_id and self.tenant_id != creator.tenant_id:
             raise ValidationError("Product tenant must match creator's tenant.")
-        if self.created_by_id and self.company_id != self.created_by.company_id:
+        if self.created_by_id and self.company_id != creator.company_id:
             raise ValidationError("Product company must match creator's company.")
-        if self.customer_id and self.customer.role != 'CUSTOMER':
+        if self.customer_id and customer.role != 'CUSTOMER':
             raise ValidationError('Customer must have CUSTOMER role.')
-        if self.customer_id and self.tenant_id != self.customer.tenant_id:
+        if self.customer_id and self.tenant_id != customer.tenant_id:
             raise ValidationError('Customer tenant must match product tenant.')
 
-    def save(self, *args, **kwargs):
-        self.full_clean()
+    def save(self, *args, related=None, validate_unique=True, validate=True, **kwargs):
+        """
+        ``related`` maps relation names to objects the caller already holds
+        (anything exposing ``role``/``tenant_id``/``company_id``, e.g. the
+        token user) so validation does not re-fetch them. Trusted internal
+        callers pass ``validate_unique=False`` to skip the uniqueness probes;
+        the database unique constraints still apply. ``validate=False`` skips
+        ``full_clean()`` entirely: the database triggers (migration 0003)
+        reject rows breaking the creator/customer rules of ``clean()``.
+        """
+        if validate:
+            self._validation_related = related or {}
+            try:
+                exclude = prevalidated_relations(self, self._validation_related)
+                if 'created_by' in exclude:
+                    # clean() pins tenant and company to the creator's, which
+                    # already proves both rows exist.
+                    exclude += ['tenant', 'company']
+                self.full_clean(exclude=exclude, validate_unique=validate_unique, validate_constraints=False)
+            finally:
+                del self._validation_related
         super().save(*args, **kwargs)
 
     def __str__(self):
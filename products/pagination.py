@@ -0,0 +1,6 @@
+from core.pagination import KeysetPagination
+
+
+class ProductPagination(KeysetPagination):
+    page_size = 50
+    max_page_size = 200
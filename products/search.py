@@ -0,0 +1,238 @@
+"""
+Product search over name and description.
+
+``backend()`` picks the configured ``PRODUCT_SEARCH_BACKEND`` or, by
+default, ``FTS5Backend`` where migration 0006 built the SQLite FTS5 index
+and ``LikeBackend`` elsewhere. Backends answer two questions:
+``ranked()``, the best ``limit`` matches among what a user may see, and
+``matching()``, every match as a queryset filter for the admin.
+
+The index follows writes through ``index()``/``reindex()``/``remove()``:
+``Product`` save and delete signals, plus the bulk writes that send none
+(the bulk serializer, claims, seeding). Writes that go around those, e.g.
+raw SQL or a restore, need ``manage.py rebuild_search_index``.
+
+Queries are split into words and every word must match, as a prefix
+(``chai lam`` finds "Chair lamp"). With FTS5 the tenant and the row
+policy are applied inside the index through the scope tokens written
+with each entry, so a search reads only the postings of the caller's own
+rows whatever the size of the table.
+"""
+import re
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .models import Product
+
+MAX_TERMS = 8
+INDEXED_FIELDS = {'name', 'description', 'tenant', 'tenant_id', 'company', 'company_id', 'customer', 'customer_id'}
+# Model columns a row policy may filter on -> their token prefix in the index.
+SCOPE_PREFIXES = {'tenant_id': 't', 'company_id': 'c', 'customer_id': 'u'}
+
+
+def terms(text):
+    """The words of a search, lowercased; punctuation and operators are dropped."""
+    return re.findall(r'\w+', text.lower())[:MAX_TERMS]
+
+
+def scope_tokens(product):
+    """The index tokens a product is found by: its own id and each id it is scoped by."""
+    tokens = [f'p{product.pk.hex}']
+    for column, prefix in SCOPE_PREFIXES.items():
+        value = getattr(product, column)
+        if value is not None:
+            tokens.append(f'{prefix}{uuid.UUID(str(value)).hex}')
+    return ' '.join(tokens)
+
+
+def scope_of(user, row_policy):
+    """
+    ``{column: value}`` a search by ``user`` is limited to: the tenant plus
+    the role's row policy lookups. None if the role sees no rows.
+    """
+    lookups = row_policy.rules.get(getattr(user, 'role', None))
+    if lookups is None or not user.tenant_id:
+        return None
+    scope = {'tenant_id': user.tenant_id}
+    for lookup, attribute in lookups.items():
+        if lookup not in SCOPE_PREFIXES:
+            raise ImproperlyConfigured(f"Product search cannot scope by {lookup!r}.")
+        scope[lookup] = getattr(user, attribute)
+    return scope
+
+
+class SearchBackend:
+    """Index hooks are no-ops for backends that search the table itself."""
+
+    def ranked(self, queryset, text, scope, limit):
+        """
+        The best ``limit`` products of ``queryset`` for ``text`` within
+        ``scope`` (see ``scope_of()``), which the backend applies itself.
+        """
+        raise NotImplementedError
+
+    def matching(self, queryset, text):
+        raise NotImplementedError
+
+    def index(self, products, created=False):
+        """(Re)index saved ``products``; ``created`` skips dropping old entries."""
+
+    def reindex(self, queryset):
+        """Reindex the products of ``queryset``, e.g. after ``QuerySet.update()``."""
+
+    def remove(self, ids):
+        """Drop deleted products from the index."""
+
+
+class LikeBackend(SearchBackend):
+    """``icontains`` per word; names that match rank first. Scans the rows in scope."""
+
+    def condition(self, words):
+        condition = Q()
+        for word in words:
+            condition &= Q(name__icontains=word) | Q(description__icontains=word)
+        return condition
+
+    def ranked(self, queryset, text, scope, limit):
+        words = terms(text)
+        if not words or scope is None:
+            return []
+        name_hits = Q()
+        for word in words:
+            name_hits &= Q(name__icontains=word)
+        return list(
+            queryset.filter(self.condition(words), **scope)
+            .annotate(search_rank=Case(When(name_hits, then=Value(1)), default=Value(0),
+                                       output_field=IntegerField()))
+            .order_by('-search_rank', '-created_at', '-id')[:limit]
+        )
+
+    def matching(self, queryset, text):
+        return queryset.filter(self.condition(terms(text)))
+
+
+class FTS5Backend(SearchBackend):
+    """BM25-ranked prefix search on the ``product_search`` FTS5 table, names weighted 10x."""
+    table = 'product_search'
+    weights = '10.0, 1.0, 0.0, 0.0'   # name, description, scope, product_id
+    delete_batch_size = 200
+    # products_product columns as index values; UUIDs are stored as 32-digit hex.
+    columns = (
+        "name, description, 'p' || id || ' t' || tenant_id || ' c' || company_id "
+        "|| coalesce(' u' || customer_id, ''), id"
+    )
+
+    def expression(self, words, scope=None):
+        text = ' AND '.join(f'"{word}"*' for word in words)
+        expression = f'{{name description}} : ({text})'
+        if scope:
+            # A company or customer implies its tenant, and bm25 reads the whole
+            # posting list of every token, so the tenant-sized one is left out.
+            if len(scope) > 1:
+                scope = {column: value for column, value in scope.items() if column != 'tenant_id'}
+            tokens = ' AND '.join(f'{SCOPE_PREFIXES[column]}{value.hex}' for column, value in scope.items())
+            expression += f' AND scope : ({tokens})'
+        return expression
+
+    def ranked(self, queryset, text, scope, limit):
+        words = terms(text)
+        if not words or scope is None:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT product_id FROM {self.table} WHERE {self.table} MATCH %s "
+                f"ORDER BY bm25({self.table}, {self.weights}) LIMIT %s",
+                [self.expression(words, scope), limit],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        # Fetched by primary key and checked against the scope again, in case
+        # the index is behind the table.
+        found = queryset.in_bulk(ids)
+        return [
+            product for product in map(found.get, map(Product._meta.pk.to_python, ids))
+            if product is not None and all(getattr(product, column) == value for column, value in scope.items())
+        ]
+
+    def matching(self, queryset, text):
+        words = terms(text)
+        if not words:
+            return queryset.none()
+        return queryset.filter(pk__in=RawSQL(
+            f"SELECT product_id FROM {self.table} WHERE {self.table} MATCH %s", [self.expression(words)],
+        ))
+
+    def index(self, products, created=False):
+        if not products:
+            return
+        with connection.cursor() as cursor:
+            if not created:
+                self.delete(cursor, [product.pk for product in products])
+            cursor.executemany(
+                f"INSERT INTO {self.table} (name, description, scope, product_id) VALUES (%s, %s, %s, %s)",
+                [(p.name, p.description, scope_tokens(p), p.pk.hex) for p in products],
+            )
+
+    def reindex(self, queryset):
+        # In SQL, without loading the rows: one DELETE and one INSERT ... SELECT.
+        ids, params = queryset.values('id').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE {self.table} MATCH coalesce("
+                f"(SELECT 'scope : (' || group_concat('p' || id, ' OR ') || ')' FROM ({ids})), 'scope : none')",
+                params,
+            )
+            cursor.execute(
+                f"INSERT INTO {self.table} (name, description, scope, product_id) "
+                f"SELECT {self.columns} FROM products_product WHERE id IN ({ids})",
+                params,
+            )
+
+    def remove(self, ids):
+        with connection.cursor() as cursor:
+            self.delete(cursor, ids)
+
+    def delete(self, cursor, ids):
+        # Through the inverted index: product_id is not indexed.
+        ids = list(ids)
+        for start in range(0, len(ids), self.delete_batch_size):
+            tokens = ' OR '.join(f'p{uuid.UUID(str(pk)).hex}' for pk in ids[start:start + self.delete_batch_size])
+            cursor.execute(f"DELETE FROM {self.table} WHERE {self.table} MATCH %s", [f'scope : ({tokens})'])
+
+    @classmethod
+    def installed(cls):
+        return cls.table in connection.introspection.table_names()
+
+    def rebuild(self):
+        """Re-index every product from the table and optimize the index; returns the row count."""
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (name, description, scope, product_id) "
+                f"SELECT {self.columns} FROM products_product"
+            )
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+            cursor.execute(f"SELECT count(*) FROM {self.table}")
+            return cursor.fetchone()[0]
+
+
+@lru_cache(maxsize=None)
+def backend():
+    path = getattr(settings, 'PRODUCT_SEARCH_BACKEND', '')
+    if path:
+        return import_string(path)()
+    return FTS5Backend() if connection.vendor == 'sqlite' and FTS5Backend.installed() else LikeBackend()
+
+
+@receiver(setting_changed)
+def reset_backend(setting, **kwargs):
+    if setting == 'PRODUCT_SEARCH_BACKEND':
+        backend.cache_clear()
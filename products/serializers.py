@@ -1,10 +1,69 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import serializers
+
+from core.cache import response_cache
+from core.serializers import DynamicFieldsMixin
+from . import search
 from .models import Product
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductListSerializer(serializers.ListSerializer):
+    """
+    Bulk create/update for staff. Items are validated in memory by the child
+    serializer and written with bulk_create/bulk_update in one transaction;
+    the database constraints check the rows instead of a per-row
+    ``full_clean()``.
+    """
+    batch_size = 500
+    conflict = "The batch conflicts with the current data; nothing was saved."
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        # Tenant, company and creator all come from the requesting staff
+        # member, so Product.clean()'s creator rules hold for every row.
+        products = [
+            Product(
+                tenant_id=user.tenant_id,
+                company_id=user.company_id,
+                created_by_id=user.id,
+                **attrs,
+            )
+            for attrs in validated_data
+        ]
+        try:
+            with transaction.atomic():
+                Product.objects.bulk_create(products, batch_size=self.batch_size)
+                # Bulk writes send no signals.
+                search.backend().index(products, created=True)
+                response_cache.bump(user.tenant_id)
+        except IntegrityError:
+            # e.g. the requester moved company after their token was issued.
+            raise serializers.ValidationError({"detail": self.conflict})
+        return products
+
+    def update(self, instances, validated_data):
+        now = timezone.now()
+        fields = {'updated_at'}
+        for instance, attrs in zip(instances, validated_data):
+            for attr, value in attrs.items():
+                setattr(instance, attr, value)
+            instance.updated_at = now
+            fields.update(attrs)
+        try:
+            with transaction.atomic():
+                Product.objects.bulk_update(instances, sorted(fields), batch_size=self.batch_size)
+                search.backend().index(instances)
+                response_cache.bump(instances[0].tenant_id)
+        except IntegrityError:
+            raise serializers.ValidationError({"detail": self.conflict})
+        return instances
+
+
+class ProductSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Product
+        list_serializer_class = ProductListSerializer
         fields = [
             'id', 'tenant', 'company', 'created_by', 'customer',
             'name', 'description', 'share_token',
@@ -14,13 +73,31 @@ class ProductSerializer(serializers.ModelSerializer):
             'id', 'tenant', 'company', 'created_by', 'customer',
             'share_token', 'created_at', 'updated_at',
         ]
+        expandable_fields = {
+            'tenant': 'tenants.serializers.TenantSerializer',
+            'company': 'tenants.serializers.CompanySerializer',
+            'created_by': 'accounts.serializers.UserSummarySerializer',
+            'customer': 'accounts.serializers.UserSummarySerializer',
+        }
 
     def create(self, validated_data):
         request = self.context['request']
-        validated_data['tenant'] = request.user.tenant
-        validated_data['company'] = request.user.company
-        validated_data['created_by'] = request.user
-        return super().create(validated_data)
+        validated_data['tenant_id'] = request.user.tenant_id
+        validated_data['company_id'] = request.user.company_id
+        validated_data['created_by_id'] = request.user.id
+        product = Product(**validated_data)
+        # The requester is the creator, so validation reads role/tenant/company
+        # from it instead of fetching the row; share_token is freshly random.
+        product.save(related={'created_by': request.user}, validate_unique=False)
+        return product
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        # Only name/description are writable: no relation or unique field
+        # changes, so there is nothing for full_clean() to check.
+        instance.save(update_fields=[*validated_data, 'updated_at'], validate=False)
+        return instance
 
 
 class ProductClaimSerializer(serializers.Serializer):
@@ -29,11 +106,19 @@ class ProductClaimSerializer(serializers.Serializer):
     password = serializers.CharField(required=True, write_only=True)
 
     def validate_share_token(self, value):
-        try:
-            product = Product.objects.get(share_token=value)
-            if product.customer is not None:
-                raise serializers.ValidationError("This product has already been claimed.")
-            self.context['product'] = product
-            return value
-        except Product.DoesNotExist:
+        # A cheap early answer for bad tokens; the claim itself is decided
+        # by ProductClaimView's conditional UPDATE.
+        product = Product.objects.filter(share_token=value).values('tenant_id', 'customer_id').first()
+        if product is None:
             raise serializers.ValidationError("Invalid share token.")
+        if product['customer_id'] is not None:
+            raise serializers.ValidationError("This product has already been claimed.")
+        self.context['tenant_id'] = product['tenant_id']
+        return value
+
+
+class AsyncProductClaimSerializer(ProductClaimSerializer):
+    """Field checks only; AsyncProductClaimView resolves the token with the async ORM."""
+
+    def validate_share_token(self, value):
+        return value
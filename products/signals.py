@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import response_cache
+from core.models import Tombstone
+from . import search
+from .models import Product
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_responses(sender, instance, **kwargs):
+    response_cache.bump(instance.tenant_id)
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is None or search.INDEXED_FIELDS & set(update_fields):
+        search.backend().index([instance], created=created)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    search.backend().remove([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def record_deletion(sender, instance, **kwargs):
+    Tombstone.record(
+        instance, instance.tenant_id, company_id=instance.company_id, customer_id=instance.customer_id,
+    )
@@ -1,3 +1,655 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import io
+import json
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, IntegrityError, connection, connections, transaction
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from accounts.tokens import TenantRefreshToken
+from core.perf import PASSWORD, ROLES, QueryBudgetTestCase, quiet_request_logs
+from core.models import Tombstone
+from tenants.models import Tenant, Company
+from . import search
+from .models import Product
+from .views import ProductViewSet
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ConcurrentClaimTests(TransactionTestCase):
+    """Many clients racing to claim one share token: exactly one wins."""
+
+    claimants = 8
+
+    def setUp(self):
+        cache.clear()
+        quiet_request_logs(self)
+        self.tenant = Tenant.objects.create(name='Claim tenant')
+        company = Company.objects.create(tenant=self.tenant, name='Claim company')
+        staff = User.objects.create_user(
+            email='staff@claim.test', password='pw', role='STAFF', tenant=self.tenant, company=company,
+        )
+        self.product = Product.objects.create(
+            tenant=self.tenant, company=company, created_by=staff, name='Contested',
+        )
+
+    def race(self, emails):
+        barrier = threading.Barrier(len(emails))
+        responses = [None] * len(emails)
+
+        def claim(index, email):
+            client = APIClient(REMOTE_ADDR=f'10.0.0.{index + 1}')
+            try:
+                barrier.wait()
+                responses[index] = client.post('/api/public/products/claim/', {
+                    'share_token': self.product.share_token,
+                    'email': email,
+                    'password': 'Str0ng-pass!',
+                }, format='json')
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=claim, args=(i, email)) for i, email in enumerate(emails)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return responses
+
+    def assert_single_winner(self, responses):
+        codes = sorted(response.status_code for response in responses)
+        self.assertEqual(codes, [200] + [400] * (len(responses) - 1))
+        for response in responses:
+            if response.status_code == 400:
+                self.assertEqual(response.data, {'share_token': ['This product has already been claimed.']})
+
+    def test_new_customers_race_for_one_token(self):
+        emails = [f'customer{i}@claim.test' for i in range(self.claimants)]
+        responses = self.race(emails)
+
+        self.assert_single_winner(responses)
+        winner = emails[[response.status_code for response in responses].index(200)]
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.customer.email, winner)
+        # Losing claims roll back the account they were about to create.
+        self.assertEqual(list(User.objects.filter(role='CUSTOMER').values_list('email', flat=True)), [winner])
+
+    def test_same_email_races_for_one_token(self):
+        responses = self.race(['same@claim.test'] * self.claimants)
+
+        self.assert_single_winner(responses)
+        self.assertEqual(User.objects.filter(email='same@claim.test').count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.customer.email, 'same@claim.test')
+
+    def test_claim_is_rejected_across_tenants(self):
+        other = Tenant.objects.create(name='Other tenant')
+        User.objects.create_user(email='elsewhere@claim.test', password='pw', role='CUSTOMER', tenant=other)
+
+        response = APIClient().post('/api/public/products/claim/', {
+            'share_token': self.product.share_token,
+            'email': 'elsewhere@claim.test',
+            'password': 'pw',
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.product.refresh_from_db()
+        self.assertIsNone(self.product.customer_id)
+
+
+class ProductRouteBudgetTests(QueryBudgetTestCase):
+    """Query and wall-time budgets for /api/products/ and the public claim routes."""
+
+    def detail_path(self, role):
+        return f"/api/products/{self.seeded.owned_products[0].id}/"
+
+    # Lists run the page query alone; the ETag is built from the page.
+    def test_list(self):
+        self.assertBudgets('GET', '/api/products/', {
+            'ADMIN': (200, 1), 'MANAGER': (200, 1), 'STAFF': (200, 1), 'CUSTOMER': (200, 1),
+        })
+
+    def test_list_expanded(self):
+        self.assertBudgets('GET', '/api/products/?expand=tenant,company,created_by,customer', {
+            'ADMIN': (200, 1), 'MANAGER': (200, 1), 'STAFF': (200, 1), 'CUSTOMER': (200, 1),
+        })
+
+    def test_sparse_and_expanded_output(self):
+        product = self.seeded.owned_products[0]
+        path = f"/api/products/{product.id}/"
+        response = self.client_for('STAFF').get(f"{path}?fields=id,name,company,bogus&expand=company,bogus")
+        self.assertEqual(set(response.data), {'id', 'name', 'company'})
+        self.assertEqual(response.data['company']['id'], str(product.company_id))
+        self.assertEqual(response.data['company']['name'], product.company.name)
+        # Expanded users carry an email only for roles that may list them.
+        for role, emails in (('ADMIN', {'created_by', 'customer'}), ('MANAGER', {'created_by'}),
+                             ('STAFF', set()), ('CUSTOMER', set())):
+            with self.subTest(role=role):
+                data = self.client_for(role).get(f"{path}?expand=created_by,customer").data
+                for name, user in (('created_by', product.created_by), ('customer', product.customer)):
+                    expected = {'id': str(user.id), 'email': user.email} if name in emails else {'id': str(user.id)}
+                    self.assertEqual(data[name], expected)
+        response = self.client_for('STAFF').get('/api/products/?fields=id&expand=created_by')
+        self.assertEqual(set(response.data['results'][0]), {'id'})
+
+    def test_list_pages_read_the_tenant_indexes(self):
+        for role, index in (('ADMIN', 'product_tenant_created_idx'), ('STAFF', 'product_tenant_company_idx'),
+                            ('CUSTOMER', 'product_tenant_customer_idx')):
+            with self.subTest(role=role):
+                self.assertPlan(role, '/api/products/?page_size=10', index)
+
+    def test_list_next_page(self):
+        for role in ('ADMIN', 'STAFF', 'CUSTOMER'):
+            with self.subTest(role=role):
+                first = self.client_for(role).get('/api/products/?page_size=10')
+                self.assertBudget(role, 'GET', first.data['next'], 1)
+
+    def test_conditional_get(self):
+        for role in ROLES:
+            for path in ('/api/products/?expand=company', self.detail_path(role)):
+                with self.subTest(role=role, path=path):
+                    etag = self.client_for(role).get(path)['ETag']
+                    # Lists answer from the page, details from the row.
+                    response = self.assertBudget(role, 'GET', path, 1, status=304,
+                                                 headers={'HTTP_IF_NONE_MATCH': etag})
+                    self.assertEqual(response['ETag'], etag)
+                    self.assertEqual(response.content, b'')
+
+    def test_changes_invalidate_etags(self):
+        product = self.seeded.owned_products[0]
+        client = self.client_for('STAFF')
+        list_etag = client.get('/api/products/')['ETag']
+        detail = client.get(f"/api/products/{product.id}/")
+        self.assertIn('Last-Modified', detail)
+        self.assertNotEqual(client.get('/api/products/?fields=id')['ETag'], list_etag)
+
+        client.patch(f"/api/products/{product.id}/", {'name': 'Renamed'}, format='json')
+        self.assertEqual(client.get('/api/products/', HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+        self.assertEqual(client.get(
+            f"/api/products/{product.id}/", HTTP_IF_NONE_MATCH=detail['ETag']).status_code, 200)
+
+        list_etag = client.get('/api/products/')['ETag']
+        client.delete(f"/api/products/{self.seeded.owned_products[1].id}/")
+        self.assertEqual(client.get('/api/products/', HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+
+        # Rows off the page move the tenant generation on, and so the ETag.
+        first_page = client.get('/api/products/?page_size=1')
+        last = Product.objects.filter(company_id=product.company_id).order_by('created_at', 'id').first()
+        self.assertNotEqual(first_page.data['results'][0]['id'], str(last.id))
+        client.delete(f"/api/products/{last.id}/")
+        response = client.get('/api/products/?page_size=1', HTTP_IF_NONE_MATCH=first_page['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], first_page.data['results'])
+
+    # Writes also maintain the search index: one INSERT for new rows, a
+    # DELETE + INSERT for changed ones, a DELETE for deleted ones.
+    def test_create(self):
+        self.assertBudgets('POST', '/api/products/', {
+            'ADMIN': (403, 0), 'MANAGER': (403, 0), 'STAFF': (201, 2), 'CUSTOMER': (403, 0),
+        }, data={'name': 'Budget create', 'description': 'New'})
+
+    def test_retrieve(self):
+        self.assertBudgets('GET', self.detail_path, {
+            'ADMIN': (200, 1), 'MANAGER': (200, 1), 'STAFF': (200, 1), 'CUSTOMER': (200, 1),
+        })
+
+    def test_update(self):
+        self.assertBudgets('PATCH', self.detail_path, {
+            'ADMIN': (200, 4), 'MANAGER': (200, 4), 'STAFF': (200, 4), 'CUSTOMER': (403, 0),
+        }, data={'name': 'Budget rename'})
+
+    def test_out_of_scope_ids_are_not_found(self):
+        staff, customer = self.seeded.users['STAFF'], self.seeded.users['CUSTOMER']
+        other_company = next(p for p in self.seeded.products if p.company_id != staff.company_id)
+        not_claimed = next(p for p in self.seeded.products if p.customer_id != customer.id)
+        for role, product in (('STAFF', other_company), ('CUSTOMER', not_claimed)):
+            with self.subTest(role=role):
+                path = f"/api/products/{product.id}/"
+                self.assertBudget(role, 'GET', path, 1, status=404)
+                self.assertBudget(role, 'DELETE', path, 1, status=404)
+        self.assertBudget('STAFF', 'PATCH', f"/api/products/{other_company.id}/", 1, status=404,
+                          data={'name': 'Out of scope'})
+
+    def test_destroy(self):
+        # Customers may delete products they claimed.
+        products = iter(self.seeded.owned_products[1:])
+        self.assertBudgets('DELETE', lambda role: f"/api/products/{next(products).id}/", {
+            'ADMIN': (204, 4), 'MANAGER': (204, 4), 'STAFF': (204, 4), 'CUSTOMER': (204, 4),
+        })
+
+    def test_bulk_create(self):
+        items = [{'name': f"Bulk {i}", 'description': 'Bulk'} for i in range(200)]
+        self.assertBudgets('POST', '/api/products/bulk/', {
+            'ADMIN': (403, 0), 'MANAGER': (403, 0), 'STAFF': (201, 6), 'CUSTOMER': (403, 0),
+        }, data=items, max_ms=500)
+
+    def test_bulk_update(self):
+        company_id = self.seeded.users['STAFF'].company_id
+        items = [
+            {'id': str(product.id), 'name': f"Bulk rename {i}"}
+            for i, product in enumerate(p for p in self.seeded.products if p.company_id == company_id)
+        ]
+        self.assertBudgets('PATCH', '/api/products/bulk/', {
+            'ADMIN': (403, 0), 'MANAGER': (403, 0), 'STAFF': (200, 6), 'CUSTOMER': (403, 0),
+        }, data=items, max_ms=500)
+
+    def test_bulk_is_all_or_nothing(self):
+        client = self.client_for('STAFF')
+        staff = self.seeded.users['STAFF']
+        response = client.post('/api/products/bulk/', [{'name': 'Kept back'}, {'description': 'No name'},
+                                                        {'name': ''}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([sorted(error) for error in response.data], [[], ['name'], ['name']])
+        self.assertFalse(Product.objects.filter(name='Kept back').exists())
+
+        own, other = (
+            next(p for p in self.seeded.products if (p.company_id == staff.company_id) == mine)
+            for mine in (True, False)
+        )
+        response = client.patch('/api/products/bulk/', [
+            {'id': str(own.id), 'name': 'Not applied'}, {'id': 'nope'}, {'id': str(other.id), 'name': 'Theirs'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, [{}, {'id': ['Not found.']}, {'id': ['Not found.']}])
+        self.assertEqual(Product.objects.get(pk=own.pk).name, own.name)
+        self.assertEqual(client.patch('/api/products/bulk/', {'id': str(own.id)}, format='json').status_code, 400)
+
+        # Partial: only the fields sent change, for every item at once.
+        second = next(p for p in self.seeded.products if p.company_id == staff.company_id and p.pk != own.pk)
+        response = client.patch('/api/products/bulk/', [
+            {'id': str(own.id), 'name': 'Renamed'}, {'id': str(second.id), 'description': 'Redescribed'},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(Product.objects.filter(pk__in=[own.pk, second.pk]).order_by('created_at', 'id')
+                 .values_list('name', 'description')),
+            [('Renamed', own.description), (second.name, 'Redescribed')],
+        )
+
+    def test_export_access(self):
+        self.assertBudgets('GET', '/api/products/export/', {'STAFF': (403, 0), 'CUSTOMER': (403, 0)})
+        self.assertBudget('ADMIN', 'GET', '/api/products/export/?fmt=xml', 0, status=400)
+
+    def test_export(self):
+        client = self.client_for('ADMIN')
+        expected = Product.objects.filter(tenant=self.seeded.tenant).count()
+        for fmt, accept in (('ndjson', ''), ('csv', ''), ('csv', 'gzip, br')):
+            with self.subTest(fmt=fmt, gzip=bool(accept)):
+                with CaptureQueriesContext(connection) as captured:
+                    response = client.get(f'/api/products/export/?fmt={fmt}', HTTP_ACCEPT_ENCODING=accept)
+                    self.assertTrue(response.streaming)
+                    body = b''.join(response.streaming_content)
+                # The whole tenant comes from one chunked SELECT.
+                self.assertEqual(len(captured), 1)
+                if accept:
+                    self.assertEqual(response['Content-Encoding'], 'gzip')
+                    body = gzip.decompress(body)
+                text = body.decode()
+                if fmt == 'ndjson':
+                    rows = [json.loads(line) for line in text.splitlines()]
+                else:
+                    rows = list(csv.DictReader(io.StringIO(text)))
+                self.assertEqual(len(rows), expected)
+                self.assertEqual({row['tenant'] for row in rows}, {str(self.seeded.tenant.id)})
+                self.assertLessEqual(rows[0]['created_at'], rows[-1]['created_at'])
+
+    def test_csv_export_defuses_formulas(self):
+        product = self.seeded.owned_products[0]
+        Product.objects.filter(pk=product.pk).update(name='=HYPERLINK("http://x")', description='-2+3')
+        body = b''.join(self.client_for('ADMIN').get('/api/products/export/?fmt=csv').streaming_content)
+        row = next(row for row in csv.DictReader(io.StringIO(body.decode())) if row['id'] == str(product.id))
+        self.assertEqual((row['name'], row['description']), ('\'=HYPERLINK("http://x")', "'-2+3"))
+
+    def import_rows(self, body, content_type, query=''):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client_for('STAFF').post(f'/api/products/import/{query}', body,
+                                                     content_type=content_type)
+            lines = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        return lines, len(captured)
+
+    def test_import_access(self):
+        self.assertBudgets('POST', '/api/products/import/', {
+            'ADMIN': (403, 0), 'MANAGER': (403, 0), 'CUSTOMER': (403, 0),
+        }, data={'name': 'Import'})
+        response = self.client_for('STAFF').post('/api/products/import/', 'title\nx\n', content_type='text/csv')
+        self.assertEqual(response.status_code, 400)
+
+    def test_import_csv(self):
+        staff = self.seeded.users['STAFF']
+        rows = ['name,description'] + [f'Imported {i},"Row, {i}"' for i in range(2500)]
+        rows[1000] = ',no name'
+        rows[2001] = f"{'x' * 300},too long"
+        lines, queries = self.import_rows('\n'.join(rows).encode(), 'text/csv')
+
+        # Three batches of at most 1000 rows, each one transaction of bulk
+        # INSERTs (SQLite caps those at 999 parameters, about 90 rows).
+        self.assertEqual([line.get('batch') for line in lines], [1, 2, 3, None])
+        self.assertEqual(lines[0]['errors'], [{'line': 1001, 'errors': {'name': ['This field is required.']}}])
+        self.assertEqual([error['line'] for error in lines[2]['errors']], [2002])
+        self.assertEqual(lines[-1], {'done': True, 'rows': 2500, 'created': 2498, 'failed': 2})
+        self.assertLess(queries, 2500 / 50)
+        imported = Product.objects.filter(name__startswith='Imported ')
+        self.assertEqual(imported.count(), 2498)
+        self.assertEqual(
+            set(imported.values_list('tenant_id', 'company_id', 'created_by_id')),
+            {(staff.tenant_id, staff.company_id, staff.id)},
+        )
+        self.assertTrue(imported.filter(description='Row, 7').exists())
+
+    def test_import_ndjson(self):
+        body = '\n'.join([
+            json.dumps({'name': 'Imported JSON', 'description': 'One'}),
+            '',
+            '{"name": ',
+            '["not", "an", "object"]',
+            json.dumps({'name': 'Imported JSON 2'}),
+        ]).encode()
+        lines, _ = self.import_rows(body, 'application/x-ndjson')
+        self.assertEqual([error['line'] for error in lines[0]['errors']], [3, 4])
+        self.assertEqual(lines[-1], {'done': True, 'rows': 4, 'created': 2, 'failed': 2})
+
+        upload = SimpleUploadedFile('products.csv', b'\xef\xbb\xbfname\nImported file\n', content_type='text/csv')
+        response = self.client_for('STAFF').post('/api/products/import/', {'file': upload}, format='multipart')
+        self.assertEqual(json.loads(b''.join(response.streaming_content).splitlines()[-1])['created'], 1)
+        self.assertTrue(Product.objects.filter(name='Imported file').exists())
+
+        lines, _ = self.import_rows(b'{"name": "ok"}\n\xff\n', 'application/x-ndjson')
+        self.assertEqual(lines[-1], {'done': False, 'detail': 'Line 2 is not valid UTF-8.',
+                                     'rows': 0, 'created': 0, 'failed': 0})
+
+    def test_import_streams_progress_under_asgi(self):
+        body = '\n'.join(json.dumps({'name': f'Imported ASGI {i}'}) for i in range(3)).encode()
+        request = AsyncRequestFactory().post('/api/products/import/', body, content_type='application/x-ndjson')
+        force_authenticate(request, user=self.seeded.users['STAFF'])
+        with mock.patch.object(ProductViewSet, 'import_batch_size', 2):
+            response = ProductViewSet.as_view({'post': 'import_file'})(request)
+            self.assertTrue(response.is_async)
+
+            async def lines():
+                return [json.loads(chunk) async for chunk in response]
+            lines = async_to_sync(lines)()
+        self.assertEqual([line.get('batch') for line in lines], [1, 2, None])
+        self.assertEqual(lines[-1], {'done': True, 'rows': 3, 'created': 3, 'failed': 0})
+
+    def test_import_failure_ends_with_an_error_line(self):
+        body = '\n'.join(json.dumps({'name': f'Imported {i}'}) for i in range(3)).encode()
+        with mock.patch.object(ProductViewSet, 'import_batch_size', 1), \
+                mock.patch.object(ProductViewSet, 'import_batch', side_effect=[(1, []), DatabaseError('gone')]), \
+                self.assertLogs('core.imports', 'ERROR'):
+            lines, _ = self.import_rows(body, 'application/x-ndjson')
+        self.assertEqual(lines, [
+            {'batch': 1, 'rows': 1, 'created': 1, 'failed': 0, 'errors': []},
+            {'done': False, 'error': 'The import failed; batches reported above were saved.',
+             'rows': 1, 'created': 1, 'failed': 0},
+        ])
+
+    def sync(self, role, cursor_url=None, page_size=100):
+        """Follow the change feed to its end: ``(ids changed, ids deleted, next cursor url)``."""
+        url = cursor_url or f'/api/products/changes/?page_size={page_size}'
+        changed, deleted = set(), set()
+        while True:
+            # One page of rows and one of deletions.
+            data = self.assertBudget(role, 'GET', url, 2).data
+            changed |= {row['id'] for row in data['results']}
+            deleted |= {str(pk) for pk in data['deleted']}
+            url = data['next']
+            if not data['has_more']:
+                return changed, deleted, url
+
+    @override_settings(CHANGE_FEED_SETTLE_SECONDS=0)
+    def test_changes(self):
+        staff, customer = self.seeded.users['STAFF'], self.seeded.users['CUSTOMER']
+        visible = {
+            'ADMIN': Product.objects.filter(tenant=self.seeded.tenant),
+            'STAFF': Product.objects.filter(tenant=self.seeded.tenant, company_id=staff.company_id),
+            'CUSTOMER': Product.objects.filter(customer=customer),
+        }
+        cursors = {}
+        for role, queryset in visible.items():
+            with self.subTest(role=role):
+                changed, deleted, cursors[role] = self.sync(role)
+                self.assertEqual(changed, {str(pk) for pk in queryset.values_list('id', flat=True)})
+                self.assertEqual(deleted, set())
+
+        owned = self.seeded.owned_products
+        other_company = next(p for p in self.seeded.products if p.company_id != staff.company_id)
+        client = self.client_for('STAFF')
+        client.patch(f"/api/products/{owned[0].id}/", {'name': 'Synced'}, format='json')
+        created = client.post('/api/products/', {'name': 'New since sync'}, format='json').data['id']
+        client.delete(f"/api/products/{owned[1].id}/")
+        self.client_for('ADMIN').delete(f"/api/products/{other_company.id}/")
+        self.assertEqual(
+            set(Tombstone.objects.filter(model='products.product').values_list('object_id', 'company_id')),
+            {(owned[1].id, owned[1].company_id), (other_company.id, other_company.company_id)},
+        )
+
+        expected = {
+            'ADMIN': ({str(owned[0].id), created}, {str(owned[1].id), str(other_company.id)}),
+            'STAFF': ({str(owned[0].id), created}, {str(owned[1].id)}),
+            'CUSTOMER': ({str(owned[0].id)}, {str(owned[1].id)}),
+        }
+        for role, (changed, deleted) in expected.items():
+            with self.subTest(role=role):
+                self.assertEqual(self.sync(role, cursors[role])[:2], (changed, deleted))
+                # Nothing new since: an empty page.
+                self.assertEqual(self.sync(role, self.sync(role, cursors[role])[2])[:2], (set(), set()))
+
+    def test_changes_settle(self):
+        with override_settings(CHANGE_FEED_SETTLE_SECONDS=0):
+            cursor = self.sync('ADMIN')[2]
+        self.client_for('STAFF').patch(
+            f"/api/products/{self.seeded.owned_products[0].id}/", {'name': 'Too fresh'}, format='json')
+        # Within the settle window the change is held back for a later sync.
+        with override_settings(CHANGE_FEED_SETTLE_SECONDS=60):
+            self.assertEqual(self.sync('ADMIN', cursor)[:2], (set(), set()))
+        with override_settings(CHANGE_FEED_SETTLE_SECONDS=0):
+            self.assertEqual(self.sync('ADMIN', cursor)[0], {str(self.seeded.owned_products[0].id)})
+
+    def search(self, role, q, queries=2):
+        response = self.assertBudget(role, 'GET', f'/api/products/search/?q={q}', queries)
+        return [row['name'] for row in response.data['results']]
+
+    def test_search(self):
+        self.assertIsInstance(search.backend(), search.FTS5Backend)
+        staff, customer = self.seeded.users['STAFF'], self.seeded.users['CUSTOMER']
+        client = self.client_for('STAFF')
+        lamp = client.post('/api/products/', {'name': 'Walnut reading lamp', 'description': 'Warm'},
+                           format='json').data['id']
+        client.post('/api/products/', {'name': 'Side table', 'description': 'Oiled walnut top'}, format='json')
+        other = User.objects.filter(role='STAFF', tenant=self.seeded.tenant).exclude(
+            company_id=staff.company_id).first()
+        other_client = APIClient()
+        other_client.credentials(HTTP_AUTHORIZATION=f'Bearer {TenantRefreshToken.for_user(other).access_token}')
+        other_client.post('/api/products/bulk/', [{'name': 'Walnut stool'}], format='json')
+
+        # Name matches outrank description matches; words match as prefixes.
+        self.assertEqual(self.search('STAFF', 'walnut'), ['Walnut reading lamp', 'Side table'])
+        self.assertEqual(self.search('STAFF', 'WALN%20lam'), ['Walnut reading lamp'])
+        self.assertEqual(sorted(self.search('ADMIN', 'walnut')), ['Side table', 'Walnut reading lamp', 'Walnut stool'])
+        self.assertEqual(self.search('CUSTOMER', 'walnut'), [])
+        with override_settings(PRODUCT_SEARCH_BACKEND='products.search.LikeBackend'):
+            self.assertEqual(self.search('STAFF', 'walnut', queries=1), ['Walnut reading lamp', 'Side table'])
+            self.assertEqual(self.search('CUSTOMER', 'walnut', queries=1), [])
+        search.backend()  # the settings change reset it; detecting the index is a query
+
+        APIClient().post('/api/public/products/claim/', {
+            'share_token': Product.objects.get(pk=lamp).share_token, 'email': customer.email, 'password': PASSWORD,
+        }, format='json')
+        self.assertEqual(self.search('CUSTOMER', 'walnut'), ['Walnut reading lamp'])
+        client.patch(f'/api/products/{lamp}/', {'name': 'Oak reading lamp'}, format='json')
+        self.assertEqual(self.search('STAFF', 'oak'), ['Oak reading lamp'])
+        client.delete(f'/api/products/{lamp}/')
+        self.assertEqual(self.search('STAFF', 'oak'), [])
+        # A stale index entry does not leak a product moved out of scope.
+        Product.objects.filter(name='Side table').update(company_id=other.company_id, created_by=other)
+        self.assertEqual(self.search('STAFF', 'walnut'), [])
+        self.assertBudget('STAFF', 'GET', '/api/products/search/?q=%20*', 0, status=400)
+
+        admin = User.objects.filter(is_superuser=True).first() or User.objects.create_superuser(
+            'root@search.test', PASSWORD)
+        self.client.force_login(admin)
+        changelist = self.client.get('/admin/products/product/?q=walnut')
+        self.assertEqual(changelist.context['cl'].result_count, 2)
+
+    def test_changes_cursor_errors(self):
+        def cursor(*positions):
+            raw = json.dumps(positions).encode()
+            return '/api/products/changes/?cursor=' + base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+        now = '2026-01-01T00:00:00+00:00'
+        for url in (cursor([now, None]), cursor([now, 'nope'], [now, None]), cursor(['2026-01-01', None], [now, None]),
+                    cursor([now, 5], [now, None]), cursor([now, [1]], [now, None]), cursor(5, [now, None]),
+                    '/api/products/changes/?cursor=%%%'):
+            with self.subTest(url=url):
+                self.assertBudget('ADMIN', 'GET', url, 0, status=404)
+        with override_settings(CHANGE_FEED_RETENTION_DAYS=1):
+            self.assertBudget('ADMIN', 'GET', cursor([now, None], ['2000-01-01T00:00:00+00:00', None]), 0,
+                              status=410)
+
+    def unclaimed_token(self, skip=0):
+        unclaimed = [product for product in self.seeded.products if product.customer_id is None]
+        return unclaimed[skip].share_token
+
+    def test_claim(self):
+        existing = self.seeded.customers[5].email
+        paths = ('/api/public/products/claim/', '/api/public/products/claim/async/')
+        for index, path in enumerate(paths):
+            with self.subTest(path=path, customer='new'):
+                # Lookups, then INSERT customer + conditional UPDATE + search
+                # reindex (DELETE, INSERT) in one transaction.
+                self.assertBudget(None, 'POST', path, 11, data={
+                    'share_token': self.unclaimed_token(2 * index), 'email': f"new{index}@budget.test",
+                    'password': PASSWORD,
+                })
+            with self.subTest(path=path, customer='existing'):
+                self.assertBudget(None, 'POST', path, 7, data={
+                    'share_token': self.unclaimed_token(2 * index + 1), 'email': existing,
+                    'password': PASSWORD,
+                })
+            with self.subTest(path=path, customer='already claimed'):
+                self.assertBudget(None, 'POST', path, 1, status=400, data={
+                    'share_token': self.seeded.owned_products[0].share_token, 'email': existing,
+                    'password': PASSWORD,
+                })
+
+
+class ClaimContractTests(QueryBudgetTestCase):
+    """The sync and ASGI-native claim endpoints answer every case the same way."""
+
+    paths = ('/api/public/products/claim/', '/api/public/products/claim/async/')
+
+    def claim(self, path, share_token, email, password=PASSWORD):
+        return self.client.post(path, {'share_token': share_token, 'email': email, 'password': password},
+                                content_type='application/json')
+
+    def test_new_customer_gets_tokens_for_the_product_tenant(self):
+        unclaimed = [p for p in self.seeded.products if p.customer_id is None]
+        for index, path in enumerate(self.paths):
+            with self.subTest(path=path):
+                product = unclaimed[index]
+                response = self.claim(path, product.share_token, f'claimer{index}@contract.test')
+                self.assertEqual(response.status_code, 200)
+                access = AccessToken(response.json()['access'])
+                self.assertEqual((access['role'], access['tenant_id']), ('CUSTOMER', str(product.tenant_id)))
+                product.refresh_from_db()
+                self.assertEqual(str(product.customer_id), access['user_id'])
+
+    def test_rejections_match(self):
+        unclaimed = next(p for p in self.seeded.products if p.customer_id is None)
+        cases = {
+            'claimed': (self.seeded.owned_products[0].share_token, self.seeded.customers[0].email),
+            'unknown token': ('no-such-token', 'someone@contract.test'),
+            'staff email': (unclaimed.share_token, self.seeded.users['STAFF'].email),
+        }
+        for case, (share_token, email) in cases.items():
+            with self.subTest(case=case):
+                sync, asynchronous = (self.claim(path, share_token, email) for path in self.paths)
+                self.assertEqual((sync.status_code, sync.json()), (asynchronous.status_code, asynchronous.json()))
+                self.assertEqual(sync.status_code, 400)
+        response = self.client.post(self.paths[1], 'not json', content_type='application/json')
+        self.assertEqual((response.status_code, response.json()), (400, {'detail': 'JSON parse error.'}))
+        self.assertEqual(self.client.get(self.paths[1]).status_code, 405)
+
+
+class ProductIntegrityTests(TestCase):
+    """
+    Product.clean()'s creator/customer rules: checked by save() without
+    refetching what the caller holds, and by the database for bulk writes
+    and updates.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name='Integrity tenant')
+        cls.company = Company.objects.create(tenant=cls.tenant, name='Integrity company')
+        cls.other_company = Company.objects.create(tenant=cls.tenant, name='Second company')
+        cls.staff = User.objects.create_user(
+            email='staff@integrity.test', password='pw', role='STAFF', tenant=cls.tenant, company=cls.company,
+        )
+        cls.customer = User.objects.create_user(
+            email='customer@integrity.test', password='pw', role='CUSTOMER', tenant=cls.tenant,
+        )
+        other = Tenant.objects.create(name='Other tenant')
+        cls.foreign_customer = User.objects.create_user(
+            email='foreign@integrity.test', password='pw', role='CUSTOMER', tenant=other,
+        )
+
+    def product(self, **fields):
+        return Product(**{
+            'tenant': self.tenant, 'company': self.company, 'created_by': self.staff, 'name': 'Checked',
+            **fields,
+        })
+
+    def test_save_runs_clean(self):
+        for fields in (
+            {'created_by': self.customer},
+            {'company': self.other_company},
+            {'customer': self.staff},
+            {'customer': self.foreign_customer},
+        ):
+            with self.subTest(fields=fields):
+                with self.assertRaises(ValidationError):
+                    self.product(**fields).save()
+        self.assertFalse(Product.objects.exists())
+
+    def test_save_uses_related_objects_it_is_given(self):
+        product = Product(tenant_id=self.tenant.id, company_id=self.company.id, created_by_id=self.staff.id,
+                          name='Checked')
+        # The INSERT and its search index entry; no creator, tenant or company SELECTs.
+        with self.assertNumQueries(2):
+            product.save(related={'created_by': self.staff}, validate_unique=False)
+        product.customer_id = self.foreign_customer.id
+        with self.assertNumQueries(0), self.assertRaises(ValidationError):
+            product.save(related={'created_by': self.staff, 'customer': self.foreign_customer}, validate_unique=False)
+
+    def test_bulk_create_is_checked(self):
+        for fields in (
+            {'company': self.other_company},
+            {'created_by': self.customer},
+            {'customer': self.staff},
+            {'customer': self.foreign_customer},
+        ):
+            with self.subTest(fields=fields):
+                with self.assertRaises(IntegrityError), transaction.atomic():
+                    Product.objects.bulk_create([self.product(), self.product(**fields)])
+        self.assertFalse(Product.objects.exists())
+        Product.objects.bulk_create([self.product(), self.product(customer=self.customer)])
+
+    def test_queryset_update_is_checked(self):
+        product = Product.objects.bulk_create([self.product()])[0]
+        for changes in ({'customer': self.foreign_customer}, {'company': self.other_company}):
+            with self.subTest(changes=changes):
+                with self.assertRaises(IntegrityError), transaction.atomic():
+                    Product.objects.filter(pk=product.pk).update(**changes)
+        Product.objects.filter(pk=product.pk).update(customer=self.customer, name='Claimed')
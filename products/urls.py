@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet, ProductClaimView
+from .views import ProductViewSet, ProductClaimView, AsyncProductClaimView
 
 router = DefaultRouter()
 router.register(r'products', ProductViewSet, basename='product')
@@ -8,4 +8,5 @@ router.register(r'products', ProductViewSet, basename='product')
 urlpatterns = [
     path('', include(router.urls)),
     path('public/products/claim/', ProductClaimView.as_view(), name='product-claim'),
+    path('public/products/claim/async/', AsyncProductClaimView.as_view(), name='product-claim-async'),
 ]
@@ -1,102 +1,305 @@
-from rest_framework import viewsets, permissions, status
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from rest_framework.throttling import AnonRateThrottle
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from core.mixins import TenantScopedMixin
-from core.permissions import IsStaff, IsStaffInSameCompany, IsCustomerOwner, IsAdminOrManager
+from core import metrics
+from core.cache import response_cache
+from core.changes import ChangeFeedMixin
+from core.exports import ExportMixin
+from core.imports import ImportAborted, ImportMixin
+from core.mixins import (
+    CachedListMixin, ConditionalGetMixin, DynamicFieldsQuerysetMixin, RowPolicyMixin, TenantScopedMixin,
+)
+from core.views import AsyncJSONView
+from core.permissions import HasRolePermission
+from core.policies import ALL, RowPolicy
+from accounts.hashing import amake_password
 from accounts.models import User
+from accounts.throttles import AnonCounterRateThrottle
+from accounts.tokens import TenantRefreshToken
+from tenants.cache import tenant_cache
 from .models import Product
-from .serializers import ProductSerializer, ProductClaimSerializer
+from . import search
+from .pagination import ProductPagination
+from .serializers import ProductSerializer, ProductClaimSerializer, AsyncProductClaimSerializer
 
 
-class ProductViewSet(TenantScopedMixin, viewsets.ModelViewSet):
+class ProductViewSet(CachedListMixin, ConditionalGetMixin, ChangeFeedMixin, ExportMixin, ImportMixin,
+                     TenantScopedMixin, RowPolicyMixin, DynamicFieldsQuerysetMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    pagination_class = ProductPagination
+    permission_classes = [HasRolePermission]
+    rbac_view = 'products.products'
+    bulk_max_items = 10000
+    always_loaded_fields = ('created_at', 'updated_at')  # the ETag reads updated_at
+    export_fields = (
+        'id', 'tenant', 'company', 'created_by', 'customer',
+        'name', 'description', 'share_token', 'created_at', 'updated_at',
+    )
+    export_name = 'products'
+    import_required_fields = ('name',)
+    search_limit = 20
+    search_max_limit = 100
 
-    # ====================== PERMISSIONS ======================
-    def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update']:
-            return [permissions.IsAuthenticated(), IsStaffInSameCompany()]
-        return [permissions.IsAuthenticated()]
+    # Staff reach their company's products, customers the ones they claimed;
+    # anything else is a 404 straight from the filtered query.
+    row_policy = RowPolicy(
+        ADMIN=ALL,
+        MANAGER=ALL,
+        STAFF={'company_id': 'company_id'},
+        CUSTOMER={'customer_id': 'id'},
+    )
 
-    # ====================== LIST FILTERING ======================
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        user = self.request.user
+    # ====================== CREATE ======================
+    def perform_create(self, serializer):
+        # Serializer already sets tenant, company, created_by (from Step 4)
+        serializer.save()
 
-        if user.role == 'STAFF':
-            return queryset.filter(company=user.company)          # own company only
-        elif user.role == 'CUSTOMER':
-            return queryset.filter(customer=user)                 # only claimed products
-        elif user.role in ['ADMIN', 'MANAGER']:
-            return queryset                                       # all in tenant (mixin already filters)
-        return queryset.none()
+    # ====================== SEARCH ======================
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        The best matches for ``?q=`` among the products the caller can see,
+        ranked; every word must match as a prefix. ``?limit=`` up to
+        ``search_max_limit``.
+        """
+        text = request.query_params.get('q', '')
+        if not search.terms(text):
+            raise ValidationError({'q': ["Enter at least one word to search for."]})
+        try:
+            limit = min(max(int(request.query_params['limit']), 1), self.search_max_limit)
+        except (KeyError, ValueError):
+            limit = self.search_limit
+        # Backends apply the tenant and row policy through the scope; as
+        # queryset filters they would steer SQLite off the primary key.
+        products = search.backend().ranked(
+            self.shape_queryset(self.queryset.all()), text, search.scope_of(request.user, self.row_policy), limit,
+        )
+        return Response({'results': self.get_serializer(products, many=True).data})
 
-    # ====================== DETAIL + OBJECT PERMISSIONS ======================
-    def check_object_permissions(self, request, obj):
-        user = request.user
+    # ====================== EXPORT ======================
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Stream every product the caller can see as NDJSON or CSV
+        (``?fmt=csv``), oldest first, gzipped if the client accepts it.
+        """
+        return self.export_response(request, self.get_queryset().order_by('created_at', 'id'))
 
-        if user.role in ['ADMIN', 'MANAGER']:
-            return  # tenant already scoped → full access
+    # ====================== IMPORT ======================
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_file(self, request):
+        """
+        Create products from an NDJSON or CSV upload of any size, sent as the
+        body or as a multipart ``file``. Rows are validated and inserted in
+        batches of ``import_batch_size``, each committed on its own; invalid
+        rows are skipped. The response streams one NDJSON progress line per
+        batch with that batch's row errors, then a ``done`` line.
+        """
+        return self.import_response(request)
 
-        elif user.role == 'STAFF':
-            if not IsStaffInSameCompany().has_object_permission(request, self, obj):
-                self.permission_denied(request, message="You can only access products in your company.")
+    def import_batch(self, rows):
+        # The list serializer stamps tenant, company and creator from the
+        # uploader and bulk-inserts, exactly as the bulk endpoint does.
+        serializer = self.get_serializer(many=True)
+        valid, errors = [], []
+        for line, data in rows:
+            try:
+                valid.append(serializer.child.run_validation(data))
+            except ValidationError as exc:
+                errors.append({'line': line, 'errors': exc.detail})
+        if valid:
+            try:
+                serializer.create(valid)
+            except ValidationError as exc:
+                raise ImportAborted(exc.detail['detail'])
+        return len(valid), errors
 
-        elif user.role == 'CUSTOMER':
-            if not IsCustomerOwner().has_object_permission(request, self, obj):
-                self.permission_denied(request, message="You can only access your own products.")
+    # ====================== BULK CREATE / UPDATE ======================
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        """
+        POST a list of products to create them, or PATCH a list of
+        ``{"id": ..., <fields>}`` to update them. The batch is all-or-nothing:
+        on failure the response is a list of per-item errors aligned with
+        the request (``{}`` for valid items).
+        """
+        if request.method == 'POST':
+            serializer = self.get_serializer(
+                data=request.data, many=True, allow_empty=False, max_length=self.bulk_max_items,
+            )
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            serializer.save()
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        super().check_object_permissions(request, obj)
+        items = request.data if isinstance(request.data, list) else []
+        ids = []
+        for item in items:
+            try:
+                ids.append(uuid.UUID(str(item.get('id'))) if isinstance(item, dict) else None)
+            except ValueError:
+                ids.append(None)
+        found = self.get_queryset().in_bulk([pk for pk in ids if pk])
+        instances = [found.get(pk) for pk in ids]
 
-    # ====================== CREATE ======================
-    def perform_create(self, serializer):
-        # Serializer already sets tenant, company, created_by (from Step 4)
+        serializer = self.get_serializer(
+            instances, data=request.data, many=True, partial=True,
+            allow_empty=False, max_length=self.bulk_max_items,
+        )
+        valid = serializer.is_valid()
+        errors = serializer.errors if not valid else [{} for _ in items]
+        if isinstance(errors, list):
+            for index, instance in enumerate(instances):
+                if instance is None:
+                    errors[index] = {**errors[index], 'id': ['Not found.']}
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
         serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+ALREADY_CLAIMED = "This product has already been claimed."
+DIFFERENT_ROLE = "This email is already registered with a different role."
+DIFFERENT_TENANT = "This email is already registered with a different organization."
+
+
+def claimant_error(customer, tenant_id):
+    """Why an existing account may not claim a product of ``tenant_id``, or None."""
+    if customer.role != 'CUSTOMER':
+        return {"detail": DIFFERENT_ROLE}
+    if customer.tenant_id != tenant_id:
+        return {"detail": DIFFERENT_TENANT}
+    return None
+
+
+def claim_product(share_token, tenant_id, customer):
+    """
+    Attach ``customer`` to the product behind ``share_token`` with a single
+    ``UPDATE ... WHERE customer_id IS NULL``; the row count decides the winner
+    when several claims race for one token. An unsaved ``customer`` is
+    inserted in the same transaction, so a lost claim leaves no account behind.
+
+    Returns ``(customer, error)``; ``customer`` may be the concurrently
+    created account with the same email.
+    """
+    with transaction.atomic():
+        if customer._state.adding:
+            try:
+                with transaction.atomic():
+                    customer.save(validate_unique=False)
+            except IntegrityError:
+                # Another request registered this email first.
+                customer = User.objects.get(email=customer.email)
+                error = claimant_error(customer, tenant_id)
+                if error:
+                    return customer, error
+
+        claimed = Product.objects.filter(
+            share_token=share_token, tenant_id=tenant_id, customer__isnull=True,
+        ).update(customer=customer, updated_at=timezone.now())
+        if not claimed:
+            transaction.set_rollback(True)
+            return customer, {"share_token": [ALREADY_CLAIMED]}
+        # The customer is a search scope; the UPDATE sent no signal.
+        search.backend().reindex(Product.objects.filter(share_token=share_token))
+        response_cache.bump(tenant_id)
+    metrics.product_claims.inc(str(tenant_id))
+    return customer, None
+
+
+def new_customer(email, tenant_id, password_hash):
+    # The cached tenant spares validation its existence query, so the claim
+    # transaction opens with a write.
+    return User(
+        email=email, role='CUSTOMER', tenant=tenant_cache.get(tenant_id),
+        is_active=True, password=password_hash,
+    )
+
+
+def claimed_response_data(customer):
+    refresh = TenantRefreshToken.for_user(customer)
+    return {
+        "detail": "Claimed",
+        "access": str(refresh.access_token),
+        "refresh": str(refresh),
+    }
 
 
 class ProductClaimView(APIView):
     permission_classes = [AllowAny]
-    throttle_classes = [AnonRateThrottle]
+    throttle_classes = [AnonCounterRateThrottle]
 
     def post(self, request):
         serializer = ProductClaimSerializer(data=request.data, context={})
-        if serializer.is_valid():
-            product = serializer.context['product']
-            email = serializer.validated_data['email']
-            password = serializer.validated_data['password']
-
-            customer, created = User.objects.get_or_create(
-                email=email,
-                defaults={
-                    'role': 'CUSTOMER',
-                    'tenant': product.tenant,
-                    'is_active': True,
-                    'password': User.objects.make_random_password(),
-                }
-            )
-            
-            if created:
-                customer.set_password(password)
-                customer.save()
-            else:
-                if customer.role != 'CUSTOMER':
-                    return Response(
-                        {"detail": "This email is already registered with a different role."},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-
-            product.customer = customer
-            product.save()
-
-            refresh = RefreshToken.for_user(customer)
-            return Response({
-                "detail": "Claimed",
-                "access": str(refresh.access_token),
-                "refresh": str(refresh),
-            }, status=status.HTTP_200_OK)
-
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        share_token = serializer.validated_data['share_token']
+        tenant_id = serializer.context['tenant_id']
+        email = serializer.validated_data['email']
+
+        customer = User.objects.filter(email=email).first()
+        if customer is None:
+            # Hash before the transaction so its locks are held only for the writes.
+            password_hash = make_password(serializer.validated_data['password'])
+            customer = new_customer(email, tenant_id, password_hash)
+        else:
+            error = claimant_error(customer, tenant_id)
+            if error:
+                return Response(error, status=status.HTTP_400_BAD_REQUEST)
+
+        customer, error = claim_product(share_token, tenant_id, customer)
+        if error:
+            return Response(error, status=status.HTTP_400_BAD_REQUEST)
+        return Response(claimed_response_data(customer), status=status.HTTP_200_OK)
+
+
+class AsyncProductClaimView(AsyncJSONView):
+    """
+    ASGI-native ProductClaimView with the same contract. Password hashing
+    runs on the bounded hashing pool, so a burst of claims does not pin the
+    worker while cheap requests wait.
+    """
+    throttle_classes = [AnonCounterRateThrottle]
+
+    async def post(self, request):
+        serializer = AsyncProductClaimSerializer(data=request.json)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        share_token = serializer.validated_data['share_token']
+        email = serializer.validated_data['email']
+
+        product = await Product.objects.filter(share_token=share_token).values(
+            'tenant_id', 'customer_id').afirst()
+        if product is None:
+            return JsonResponse({"share_token": ["Invalid share token."]}, status=status.HTTP_400_BAD_REQUEST)
+        if product['customer_id'] is not None:
+            return JsonResponse({"share_token": [ALREADY_CLAIMED]}, status=status.HTTP_400_BAD_REQUEST)
+        tenant_id = product['tenant_id']
+
+        customer = await User.objects.filter(email=email).afirst()
+        if customer is None:
+            password_hash = await amake_password(serializer.validated_data['password'])
+            customer = await sync_to_async(new_customer)(email, tenant_id, password_hash)
+        else:
+            error = claimant_error(customer, tenant_id)
+            if error:
+                return JsonResponse(error, status=status.HTTP_400_BAD_REQUEST)
+
+        # Django has no async transactions; run the short write transaction
+        # on the ORM's sync thread.
+        customer, error = await sync_to_async(claim_product)(share_token, tenant_id, customer)
+        if error:
+            return JsonResponse(error, status=status.HTTP_400_BAD_REQUEST)
+        return JsonResponse(claimed_response_data(customer), status=status.HTTP_200_OK)
@@ -0,0 +1,5 @@
+from core.cache import ModelCache
+from .models import Tenant, Company
+
+tenant_cache = ModelCache(Tenant, 'tenant')
+company_cache = ModelCache(Company, 'company', scope_field='tenant_id')
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-18 07:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tenants", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="company",
+            index=models.Index(
+                fields=["tenant", "created_at"], name="company_tenant_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-18 08:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tenants", "0003_uuid7_ids"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="company",
+            index=models.Index(
+                fields=["tenant", "updated_at", "id"], name="company_tenant_updated_idx"
+            ),
+        ),
+    ]
@@ -25,6 +25,6 @@ class CompanySerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         request = self.context.get('request')
-        if request and hasattr(request.user, 'tenant') and request.user.tenant:
-            data['tenant'] = request.user.tenant
+        if request and getattr(request.user, 'tenant_id', None):
+            data['tenant_id'] = request.user.tenant_id
         return data
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import response_cache
+from core.models import Tombstone
+from .cache import tenant_cache, company_cache
+from .models import Tenant, Company
+
+
+@receiver([post_save, post_delete], sender=Tenant)
+def invalidate_tenant(sender, instance, **kwargs):
+    tenant_cache.invalidate(instance)
+    response_cache.bump(instance.pk)  # expanded into product lists
+
+
+@receiver([post_save, post_delete], sender=Company)
+def invalidate_company(sender, instance, **kwargs):
+    company_cache.invalidate(instance)
+    response_cache.bump(instance.tenant_id)
+
+
+@receiver(post_delete, sender=Company)
+def record_deletion(sender, instance, **kwargs):
+    Tombstone.record(instance, instance.tenant_id, company_id=instance.pk)
@@ -1,3 +1,123 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from core.perf import QueryBudgetTestCase
+from .cache import company_cache, tenant_cache
+from .models import Company, Tenant
+
+
+class TenantRouteBudgetTests(QueryBudgetTestCase):
+    """Query and wall-time budgets for /api/tenant/me/ and /api/companies/."""
+
+    def test_tenant_me(self):
+        # Served from the tenant cache once warm; the cold read is one query.
+        self.assertBudgets('GET', '/api/tenant/me/', {
+            'ADMIN': (200, 1), 'MANAGER': (200, 1), 'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+        })
+
+    def test_tenant_me_update(self):
+        self.assertBudgets('PATCH', '/api/tenant/me/', {
+            'ADMIN': (200, 2), 'MANAGER': (403, 0), 'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+        }, data={})
+
+    def test_company_list(self):
+        self.assertBudgets('GET', '/api/companies/', {
+            'ADMIN': (200, 1), 'MANAGER': (200, 1), 'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+        })
+
+    def test_conditional_get(self):
+        paths = ('/api/tenant/me/', '/api/companies/', f"/api/companies/{self.seeded.companies[0].id}/")
+        for path, queries in zip(paths, (0, 1, 1)):
+            with self.subTest(path=path):
+                etag = self.client_for('MANAGER').get(path)['ETag']
+                self.assertBudget('MANAGER', 'GET', path, queries, status=304, headers={'HTTP_IF_NONE_MATCH': etag})
+
+        etag = self.client_for('ADMIN').get('/api/tenant/me/')['ETag']
+        self.client_for('ADMIN').patch('/api/tenant/me/', {}, format='json')
+        self.assertBudget('ADMIN', 'GET', '/api/tenant/me/', 1, headers={'HTTP_IF_NONE_MATCH': etag})
+
+    def test_company_create(self):
+        self.assertBudgets('POST', '/api/companies/', {
+            'ADMIN': (201, 1), 'MANAGER': (201, 1), 'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+        }, data=lambda role: {'name': f"New company ({role})"})
+
+    @override_settings(CHANGE_FEED_SETTLE_SECONDS=0)
+    def test_company_changes(self):
+        self.assertBudgets('GET', '/api/companies/changes/', {
+            'ADMIN': (200, 2), 'MANAGER': (200, 2), 'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+        })
+        first = self.client_for('ADMIN').get('/api/companies/changes/').data
+        self.assertEqual({row['id'] for row in first['results']}, {str(c.id) for c in self.seeded.companies})
+
+        company = self.seeded.companies[0]
+        self.client_for('ADMIN').patch(f"/api/companies/{company.id}/", {'name': 'Synced'}, format='json')
+        changes = self.assertBudget('MANAGER', 'GET', first['next'], 2).data
+        self.assertEqual([row['name'] for row in changes['results']], ['Synced'])
+        self.assertEqual(changes['deleted'], [])
+
+    def test_company_detail(self):
+        path = f"/api/companies/{self.seeded.companies[0].id}/"
+        self.assertBudgets('GET', path, {
+            'ADMIN': (200, 1), 'MANAGER': (200, 1), 'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+        })
+        self.assertBudgets('PATCH', path, {
+            'ADMIN': (200, 2), 'MANAGER': (200, 2), 'STAFF': (403, 0), 'CUSTOMER': (403, 0),
+        }, data=lambda role: {'name': f"Renamed ({role})"})
+
+
+class ModelCacheTests(TestCase):
+    """The tenant and company read-through caches: hits, scoping, invalidation and LRU eviction."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenants = [Tenant.objects.create(name=f'Cached tenant {i}') for i in range(3)]
+        cls.company = Company.objects.create(tenant=cls.tenants[0], name='Cached company')
+
+    def setUp(self):
+        cache.clear()
+        for model_cache in (tenant_cache, company_cache):
+            model_cache.clear_local()
+            self.addCleanup(model_cache.clear_local)
+
+    def test_repeat_reads_skip_the_database(self):
+        tenant = self.tenants[0]
+        with self.assertNumQueries(1):
+            self.assertEqual(tenant_cache.get(tenant.pk).name, tenant.name)
+        with self.assertNumQueries(0):
+            copy = tenant_cache.get(tenant.pk)
+        # Callers get their own copy.
+        copy.name = 'Mutated'
+        self.assertEqual(tenant_cache.get(tenant.pk).name, tenant.name)
+
+    def test_lookups_are_scoped(self):
+        self.assertEqual(company_cache.get(self.company.pk, scope=self.tenants[0].pk), self.company)
+        self.assertIsNone(company_cache.get(self.company.pk, scope=self.tenants[1].pk))
+        self.assertIsNone(tenant_cache.get(None))
+
+    def test_writes_invalidate_local_and_shared_copies(self):
+        tenant_cache.get(self.tenants[0].pk)
+        company_cache.get(self.company.pk, scope=self.company.tenant_id)
+        Tenant.objects.get(pk=self.tenants[0].pk).save()
+        company = Company.objects.get(pk=self.company.pk)
+        company.name = 'Renamed company'
+        company.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(company_cache.get(self.company.pk, scope=self.company.tenant_id).name,
+                             'Renamed company')
+        with self.assertNumQueries(1):
+            tenant_cache.get(self.tenants[0].pk)
+        company.delete()
+        self.assertIsNone(company_cache.get(self.company.pk, scope=self.company.tenant_id))
+
+    @override_settings(MODEL_CACHE_LOCAL_SIZE=2)
+    def test_least_recently_used_rows_leave_the_local_cache(self):
+        first, second, third = self.tenants
+        for tenant in (first, second, first, third):
+            tenant_cache.get(tenant.pk)
+        before = tenant_cache.stats()
+        with self.assertNumQueries(0):
+            tenant_cache.get(first.pk)   # recently used: still local
+            tenant_cache.get(second.pk)  # evicted: from the shared cache
+        after = tenant_cache.stats()
+        self.assertEqual(after['local_hits'] - before['local_hits'], 1)
+        self.assertEqual(after['shared_hits'] - before['shared_hits'], 1)
@@ -1,24 +1,30 @@
+from django.http import Http404
 from rest_framework import generics, viewsets
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import SAFE_METHODS
 
-from core.mixins import TenantScopedMixin
-from core.permissions import IsAdminOrManager, IsTenantAdmin
-from .models import Company
+from core.changes import ChangeFeedMixin
+from core.mixins import CachedListMixin, ConditionalGetMixin, TenantScopedMixin
+from core.permissions import HasRolePermission
+from .cache import tenant_cache
+from .models import Tenant, Company
 from .serializers import TenantSerializer, CompanySerializer
 
 
-class TenantMeView(generics.RetrieveUpdateAPIView):
+class TenantMeView(ConditionalGetMixin, generics.RetrieveUpdateAPIView):
     serializer_class = TenantSerializer
-    permission_classes = [IsAuthenticated, IsAdminOrManager]
+    permission_classes = [HasRolePermission]
+    rbac_view = 'tenants.me'
 
     def get_object(self):
-        print("TenantMeView.get_object called for user:", self.request.user.__dict__)
-        return self.request.user.tenant
-
-    def get_permissions(self):
-        if self.request.method in ('PATCH', 'PUT'):
-            return [IsAuthenticated(), IsTenantAdmin()]
-        return super().get_permissions()
+        tenant_id = self.request.user.tenant_id
+        if self.request.method in SAFE_METHODS:
+            tenant = tenant_cache.get(tenant_id)
+        else:
+            # Writes work on a fresh row, never on a cached copy.
+            tenant = Tenant.objects.filter(pk=tenant_id).first()
+        if tenant is None:
+            raise Http404
+        return tenant
 
     def perform_update(self, serializer):
         # Belt-and-suspenders: strip name even if serializer.validate() missed it
@@ -26,11 +32,12 @@ class TenantMeView(generics.RetrieveUpdateAPIView):
         serializer.save()
 
 
-class CompanyViewSet(TenantScopedMixin, viewsets.ModelViewSet):
+class CompanyViewSet(CachedListMixin, ConditionalGetMixin, ChangeFeedMixin, TenantScopedMixin, viewsets.ModelViewSet):
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
-    permission_classes = [IsAuthenticated, IsAdminOrManager]
+    permission_classes = [HasRolePermission]
+    rbac_view = 'tenants.companies'
     http_method_names = ['get', 'post', 'patch', 'head', 'options']
 
     def perform_create(self, serializer):
-        serializer.save(tenant=self.request.user.tenant)
+        serializer.save(tenant_id=self.request.user.tenant_id)